@@ -0,0 +1,169 @@
+"""
+Headless GUI responsiveness benchmark.
+
+Loads synthetic indexes into the main window on Qt's offscreen platform and times the operations
+users feel: populating the table, switching views (first time and cached), sorting, scrolling,
+resizing columns and copying a selection.  For every step it records the longest event-loop stall,
+measured by a QTimer heartbeat, and the process peak memory.
+
+    python benchmarks/gui_benchmark.py --sizes 10000 100000 1000000 --json results.json
+
+Compare the JSON of two runs to catch regressions.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import Qt, QTimer, QItemSelection, QItemSelectionModel
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+
+def peak_memory_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def synthetic_index(size: int, dup_ratio: float, seed: int = 1):
+    """An index of `size` groups, a share of them duplicated, with matching metadata."""
+    rng = random.Random(seed)
+    index, files = {}, {}
+    exts = [".jpg", ".png", ".mp4", ".cr2", ".txt"]
+    for i in range(size):
+        folder = f"folder{i % 997}/sub{i % 13}"
+        copies = 1 + (rng.randint(1, 3) if rng.random() < dup_ratio else 0)
+        ext = exts[i % len(exts)]
+        group = [Path(f"/volume{c}/photos/{folder}/img_{i:07d}{ext}") for c in range(copies)]
+        index[f"{i:064x}"] = group
+        info = {"size": rng.randint(1_000, 20_000_000), "mtime": 1.5e9 + i, "ext": ext, "mime": "", "taken": ""}
+        for p in group:
+            files[str(p)] = info
+    return index, {"files": files}
+
+
+class Heartbeat:
+    """Longest gap between ticks of a fast timer: how long the event loop was blocked."""
+    def __init__(self, interval_ms: int = 5):
+        self.timer = QTimer()
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.tick)
+
+    def start(self):
+        self.longest = 0.0
+        self.last = time.perf_counter()
+        self.timer.start()
+
+    def tick(self):
+        now = time.perf_counter()
+        self.longest = max(self.longest, now - self.last)
+        self.last = now
+
+    def stop(self) -> float:
+        self.timer.stop()
+        self.tick()
+        return round(self.longest * 1000, 1)
+
+
+def run_step(app, heartbeat, name, fn, settle_ms: int = 50):
+    """Run one operation from inside the event loop and let the loop settle afterwards."""
+    heartbeat.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    deadline = time.perf_counter() + settle_ms / 1000
+    while time.perf_counter() < deadline:
+        app.processEvents()
+    stall = heartbeat.stop()
+    return {"step": name, "seconds": round(elapsed, 4), "max_stall_ms": stall, "peak_mb": peak_memory_mb()}
+
+
+def scroll_through(app, table, pages: int = 50):
+    bar = table.verticalScrollBar()
+    step = max(bar.maximum() // pages, 1)
+    for value in range(0, bar.maximum() + 1, step):
+        bar.setValue(value)
+        table.viewport().repaint()
+        app.processEvents()
+
+
+def select_and_copy(window, rows: int = 5000):
+    model = window.table_model
+    selection = QItemSelection(model.index(0, 0), model.index(min(rows, model.rowCount()) - 1, model.columnCount() - 1))
+    window.table.selectionModel().select(selection, QItemSelectionModel.ClearAndSelect)
+    window.copy_selected_cells_as_csv()
+
+
+def benchmark(app, size: int, dup_ratio: float) -> list:
+    from gui.main_window import DuplicateViewerWindow
+    from gui.index_table_model import ViewMode
+    from core.group_stats import compute_group_stats, compute_longest_paths
+
+    window = DuplicateViewerWindow()
+    window.show()
+    heartbeat = Heartbeat()
+    build = time.perf_counter()
+    index, meta = synthetic_index(size, dup_ratio)
+    meta["groups"] = compute_group_stats(index, meta)
+    meta["longest"] = compute_longest_paths(index)
+    results = [{"step": "build synthetic index", "seconds": round(time.perf_counter() - build, 4),
+                "max_stall_ms": None, "peak_mb": peak_memory_mb()}]
+
+    def load():
+        window.master, window.master_meta = index, meta
+        window.populate_table(index, ViewMode.ALL)
+
+    steps = [
+        ("populate (All)", load),
+        ("switch to Duplicates", lambda: window.radio_duplicates.setChecked(True)),
+        ("switch to Unique", lambda: window.radio_unique.setChecked(True)),
+        ("switch to All (cached)", lambda: window.radio_all.setChecked(True)),
+        ("switch to Duplicates (cached)", lambda: window.radio_duplicates.setChecked(True)),
+        ("sort by File 1", lambda: window.table.sortByColumn(window.table_model.first_file_column, Qt.AscendingOrder)),
+        ("sort by Size", lambda: window.table.sortByColumn(window.table_model.headers().index("Size"), Qt.DescendingOrder)),
+        ("scroll through table", lambda: scroll_through(app, window.table)),
+        ("resize all columns", window.slow_col_resize),
+        ("select 5000 rows + copy", lambda: select_and_copy(window)),
+    ]
+    for name, fn in steps:
+        results.append(run_step(app, heartbeat, name, fn))
+    window.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless GUI responsiveness benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="index sizes (groups) to run, e.g. 10000 100000 1000000 5000000")
+    parser.add_argument("--dup-ratio", type=float, default=0.3, help="share of groups with duplicates")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    report = {"platform": sys.platform, "python": sys.version.split()[0], "runs": []}
+    for size in args.sizes:
+        print(f"\n{size:,} groups")
+        print(f"{'step':32} {'seconds':>9} {'max stall ms':>13} {'peak MB':>9}")
+        results = benchmark(app, size, args.dup_ratio)
+        for r in results:
+            stall = "" if r["max_stall_ms"] is None else r["max_stall_ms"]
+            print(f"{r['step']:32} {r['seconds']:>9} {stall:>13} {r['peak_mb'] or '':>9}")
+        report["runs"].append({"size": size, "dup_ratio": args.dup_ratio, "results": results})
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
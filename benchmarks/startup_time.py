@@ -0,0 +1,103 @@
+"""
+Application startup benchmark.
+
+Starts the application in fresh interpreters on Qt's offscreen platform and times each phase up
+to the first window on screen: importing the main window module, creating the QApplication and
+building and showing the window.  It also lists any of the heavy optional subsystems (face
+recognition, numpy, imaging, streaming JSON) that were loaded before the window appeared; they are
+meant to load on first use only.
+
+    python benchmarks/startup_time.py --runs 5 --budget 1.0 --json startup.json
+
+Exits with status 1 when the median time to first window is over the budget or a heavy module was
+loaded at startup, so it can guard against regressions.  To see which import is slow:
+
+    python -X importtime main.py 2> imports.txt
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must not be imported before the first window is shown
+HEAVY_MODULES = ("face_recognition", "dlib", "numpy", "PIL", "ijson",
+                 "core.face_detect", "core.face_index", "gui.image_window")
+
+
+def child():
+    """One startup, timed from inside the process; prints a JSON line of wall clock marks."""
+    marks = {"started": time.time()}
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, str(ROOT))
+    from PySide6.QtWidgets import QApplication
+    marks["qt_imported"] = time.time()
+    from gui.main_window import DuplicateViewerWindow
+    marks["window_imported"] = time.time()
+    app = QApplication([])
+    marks["app_created"] = time.time()
+    window = DuplicateViewerWindow()
+    window.show()
+    app.processEvents()
+    marks["window_shown"] = time.time()
+    marks["heavy_loaded"] = [name for name in HEAVY_MODULES if name in sys.modules]
+    print(json.dumps(marks), flush=True)
+    window.close()
+
+
+def run_once() -> dict:
+    # Phases relative to the moment the process was spawned, interpreter start up included
+    spawned = time.time()
+    output = subprocess.run([sys.executable, __file__, "--child"], cwd=ROOT, capture_output=True,
+                            text=True, check=True).stdout
+    marks = json.loads(output.strip().splitlines()[-1])
+    return {
+        "interpreter": round(marks["started"] - spawned, 3),
+        "qt_import": round(marks["qt_imported"] - marks["started"], 3),
+        "app_import": round(marks["window_imported"] - marks["qt_imported"], 3),
+        "qapplication": round(marks["app_created"] - marks["window_imported"], 3),
+        "window_shown": round(marks["window_shown"] - marks["app_created"], 3),
+        "first_window": round(marks["window_shown"] - spawned, 3),
+        "heavy_loaded": marks["heavy_loaded"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Application startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes to start; the first is the coldest")
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds allowed to the first window (median)")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    phases = ("interpreter", "qt_import", "app_import", "qapplication", "window_shown", "first_window")
+    print(f"{'run':>4} " + " ".join(f"{p:>13}" for p in phases))
+    runs = []
+    for number in range(1, args.runs + 1):
+        result = run_once()
+        runs.append(result)
+        print(f"{number:>4} " + " ".join(f"{result[p]:>13}" for p in phases))
+
+    median = round(statistics.median(r["first_window"] for r in runs), 3)
+    heavy = sorted({name for r in runs for name in r["heavy_loaded"]})
+    print(f"\nmedian time to first window: {median} s (budget {args.budget} s)")
+    if heavy:
+        print(f"loaded at startup: {', '.join(heavy)}")
+    if args.json:
+        report = {"platform": sys.platform, "python": sys.version.split()[0], "budget": args.budget,
+                  "median_first_window": median, "runs": runs}
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    if median > args.budget or heavy:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import os
+from pathlib import Path
+
+"""
+Per-user application folders.  Everything lives under ~/.pman unless PMAN_HOME points elsewhere:
+    journal/    batch action journals (undo logs)
+    thumbs/     scaled image cache, keyed by content digest
+    faces/      face detection results, keyed by content digest
+"""
+
+
+def app_home() -> Path:
+    home = Path(os.environ.get("PMAN_HOME") or Path.home() / ".pman")
+    home.mkdir(parents=True, exist_ok=True)
+    return home
+
+
+def app_dir(name: str) -> Path:
+    """A named folder under the application home, created on first use."""
+    folder = app_home() / name
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
+
+
+def journal_dir() -> Path:
+    return app_dir("journal")
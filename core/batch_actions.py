@@ -0,0 +1,350 @@
+import json
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from pathlib import Path
+from core.app_paths import app_dir, journal_dir
+from core.group_stats import update_group_stats
+from core.linking import HARDLINK, REFLINK, replace_with_link, unlink_copy
+
+"""
+Batch delete/move of indexed files with an undo journal.
+
+A plan is a list of actions, each a dict:
+    {"action": "delete" | "move" | "hardlink" | "reflink", "digest": str, "path": str,
+     "info": file metadata or None, "dest": target file path (move only), "keep": kept copy (links only)}
+Nothing is removed outright: a delete moves the file into a trash folder on the same volume,
+<volume root>/.pman_trash/<batch id>/<path relative to the volume root>, falling back to
+~/.pman/trash when the volume root is not writable.  Every completed action is appended to the
+batch journal (~/.pman/journal/<batch id>.jsonl) as soon as it finishes, together with where the
+file went, so a batch can be rolled back even after a crash.  Undoing appends "undone" records to
+the same journal.  Link actions replace the file in place (see core.linking) and are undone by
+copying the content back.
+"""
+
+DELETE = "delete"
+MOVE = "move"
+LINK_ACTIONS = (HARDLINK, REFLINK)
+
+DONE = "done"
+FAILED = "failed"
+UNDONE = "undone"
+
+TRASH_FOLDER = ".pman_trash"
+
+
+def new_batch_id() -> str:
+    return datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+
+
+def journal_file_for(batch_id: str) -> Path:
+    return journal_dir() / f"{batch_id}.jsonl"
+
+
+# ---- planning -------------------------------------------------------------------
+def plan_delete(items, meta: dict = None) -> list:
+    """
+    Plan moving files to the trash.
+
+    Args:
+        items (iterable): (digest, path) pairs
+        meta (dict, optional): index metadata, recorded so undo can restore it
+
+    Returns:
+        list: actions
+    """
+    files = meta.get("files", {}) if meta else {}
+    return [
+        {"action": DELETE, "digest": digest, "path": str(path), "info": files.get(str(path))}
+        for digest, path in items
+    ]
+
+
+def plan_move(items, dest_dir, meta: dict = None) -> list:
+    """
+    Plan moving files into a folder.  Names that clash within the plan get a numbered suffix here,
+    clashes with files already in the folder when the plan is carried out.
+    """
+    plan = plan_delete(items, meta)
+    taken = set()
+    for action in plan:
+        target = Path(dest_dir) / Path(action["path"]).name
+        candidate, n = target, 2
+        while candidate.name.lower() in taken:
+            candidate = target.with_name(f"{target.stem} ({n}){target.suffix}")
+            n += 1
+        taken.add(candidate.name.lower())
+        action["action"] = MOVE
+        action["dest"] = str(candidate)
+    return plan
+
+
+def plan_link(items, mode: str = HARDLINK, meta: dict = None) -> list:
+    """
+    Plan replacing redundant copies by links to a kept copy.
+
+    Args:
+        items (iterable): (digest, redundant path, kept path) triples
+        mode (str, optional): HARDLINK or REFLINK
+        meta (dict, optional): index metadata
+    """
+    items = list(items)
+    plan = plan_delete(((digest, path) for digest, path, _ in items), meta)
+    for action, (_, _, keep) in zip(plan, items):
+        action["action"] = mode
+        action["keep"] = str(keep)
+    return plan
+
+
+def plan_summary(plan, index: dict = None) -> dict:
+    """
+    Totals for a plan: files, bytes (where sizes are known) and, given the index, the number of
+    groups whose every copy the plan deletes.
+    """
+    summary = {"files": len(plan), "bytes": 0, "emptied_groups": 0}
+    deleting = {}
+    for action in plan:
+        summary["bytes"] += (action.get("info") or {}).get("size", 0)
+        if action["action"] == DELETE:
+            deleting.setdefault(action["digest"], set()).add(action["path"])
+    if index is not None:
+        for digest, paths in deleting.items():
+            group = index.get(digest, [])
+            if group and all(str(p) in paths for p in group):
+                summary["emptied_groups"] += 1
+    return summary
+
+
+# ---- carrying out ---------------------------------------------------------------
+def volume_root(path) -> Path:
+    path = Path(os.path.abspath(path))
+    for parent in path.parents:
+        if os.path.ismount(parent):
+            return parent
+    return Path(path.anchor)
+
+
+def trash_path_for(path, batch_id: str) -> Path:
+    path = Path(os.path.abspath(path))
+    root = volume_root(path)
+    return root / TRASH_FOLDER / batch_id / path.relative_to(root)
+
+
+def _unique_target(target: Path) -> Path:
+    candidate, n = target, 2
+    while candidate.exists():
+        candidate = target.with_name(f"{target.stem} ({n}){target.suffix}")
+        n += 1
+    return candidate
+
+
+def _move(src: Path, target: Path):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.move(str(src), str(target))
+
+
+def _perform(action: dict, batch_id: str, verified: set) -> dict:
+    result = dict(action)
+    src = Path(action["path"])
+    try:
+        if action["action"] in LINK_ACTIONS:
+            keep = action["keep"]
+            linked = replace_with_link(keep, src, action["digest"], action["action"], keep in verified)
+            verified.add(keep)
+            result.update(status=DONE, target=keep, linked=linked)
+            return result
+        if action["action"] == DELETE:
+            target = trash_path_for(src, batch_id)
+            try:
+                target.parent.mkdir(parents=True, exist_ok=True)
+            except OSError:
+                # Volume root not writable: use the per-user trash (a copy across volumes)
+                relative = Path(os.path.abspath(src)).relative_to(volume_root(src))
+                target = app_dir("trash") / batch_id / relative
+        else:
+            target = _unique_target(Path(action["dest"]))
+        _move(src, target)
+        result.update(status=DONE, target=str(target))
+    except Exception as e:
+        result.update(status=FAILED, error=str(e))
+    return result
+
+
+def _restore(entry: dict) -> dict:
+    result = dict(entry)
+    try:
+        original = Path(entry["path"])
+        if entry["action"] in LINK_ACTIONS:
+            if entry.get("linked"):
+                unlink_copy(entry["target"], original)
+            result.update(status=UNDONE)
+            return result
+        if original.exists():
+            raise FileExistsError(f"{original} already exists")
+        _move(Path(entry["target"]), original)
+        result.update(status=UNDONE)
+    except Exception as e:
+        result.update(status=FAILED, error=f"undo: {e}")
+    return result
+
+
+def _run_pool(fn, items, journal_file: Path, max_workers: int, cancel_flag):
+    # Keeps a bounded number of actions in flight so cancelling stops promptly, and journals each
+    # result from this thread only as soon as it completes
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            journal_file.open("a", encoding="utf-8") as journal:
+        pending = set()
+        while True:
+            while len(pending) < max_workers * 4 and not (cancel_flag is not None and cancel_flag.is_set()):
+                item = next(items, None)
+                if item is None:
+                    break
+                pending.add(executor.submit(fn, item))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                journal.write(json.dumps(result, ensure_ascii=False) + "\n")
+                journal.flush()
+                yield result
+
+
+def run_batch(plan, batch_id: str = None, max_workers: int = 4, cancel_flag=None):
+    """
+    Carry out a plan, journalling each action.
+
+    Args:
+        plan (list): actions from plan_delete() / plan_move()
+        batch_id (str, optional): defaults to a new id
+        max_workers (int, optional): actions run in parallel
+        cancel_flag (threading.Event, optional): stop starting new actions
+
+    Yields:
+        dict: the action with "status" (done/failed) and "target" or "error"
+    """
+    batch_id = batch_id or new_batch_id()
+    journal_file = journal_file_for(batch_id)
+    verified = set()    # kept copies already re-hashed, so a group's keeper is hashed once
+    yield from _run_pool(
+        lambda action: _perform(action, batch_id, verified), plan, journal_file, max_workers, cancel_flag
+    )
+
+
+def read_journal(journal_file) -> list:
+    with Path(journal_file).open("r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def undoable_entries(journal_file) -> list:
+    """Completed actions of a batch that have not been undone yet, most recent first."""
+    entries = read_journal(journal_file)
+    undone = {(e["path"], e.get("target")) for e in entries if e["status"] == UNDONE}
+    done = [e for e in entries if e["status"] == DONE and (e["path"], e.get("target")) not in undone]
+    return done[::-1]
+
+
+def last_undoable_journal():
+    """The most recent batch journal with actions left to undo, or None."""
+    for journal_file in sorted(journal_dir().glob("*.jsonl"), reverse=True):
+        try:
+            if undoable_entries(journal_file):
+                return journal_file
+        except (OSError, ValueError, KeyError):
+            continue
+    return None
+
+
+def undo_batch(journal_file, max_workers: int = 4, cancel_flag=None):
+    """
+    Move the files of a batch back where they were.  Files whose original path has been reused are
+    left in place and reported as failed.
+
+    Yields:
+        dict: the journal entry with "status" undone or failed
+    """
+    journal_file = Path(journal_file)
+    batch_id = journal_file.stem
+    entries = undoable_entries(journal_file)
+    yield from _run_pool(_restore, entries, journal_file, max_workers, cancel_flag)
+    trash_roots = set()
+    for entry in entries:
+        if entry["action"] == DELETE:
+            trash_roots.update(p for p in Path(entry["target"]).parents if p.name == batch_id)
+    for folder in trash_roots:
+        _prune_empty(folder)
+        if folder.parent.name == TRASH_FOLDER:
+            try:
+                folder.parent.rmdir()
+            except OSError:
+                pass
+
+
+def _prune_empty(folder: Path):
+    # Remove the emptied trash folders of an undone batch, deepest first
+    if not folder.is_dir():
+        return
+    for root, dirs, files in os.walk(folder, topdown=False):
+        try:
+            os.rmdir(root)
+        except OSError:
+            pass
+
+
+# ---- index updates --------------------------------------------------------------
+def apply_results(index: dict, meta: dict, results) -> set:
+    """
+    Fold batch or undo results into an index and its metadata.
+
+    Returns:
+        set: digests of the groups that changed
+    """
+    files = meta.setdefault("files", {}) if meta is not None else {}
+    touched = set()
+    for result in results:
+        digest, path, target = result["digest"], result["path"], result.get("target")
+        if result["action"] in LINK_ACTIONS:
+            # Paths are unchanged; the metadata records the link so the copy no longer counts as wasted,
+            # and the new file's size and time so verification does not report it as touched
+            if result["status"] in (DONE, UNDONE) and path in files:
+                files[path] = dict(files[path])
+                try:
+                    st = os.stat(path)
+                    files[path].update(size=st.st_size, mtime=st.st_mtime)
+                except OSError:
+                    pass
+                if result["status"] == DONE:
+                    files[path]["linked"] = target
+                else:
+                    files[path].pop("linked", None)
+                touched.add(digest)
+            continue
+        if result["status"] == DONE:
+            gone = {path}
+            added = [Path(target)] if result["action"] == MOVE else []
+            info = files.pop(path, None)
+            if added and info is not None:
+                files[target] = info
+        elif result["status"] == UNDONE:
+            gone = {target} if result["action"] == MOVE else set()
+            added = [Path(path)]
+            files.pop(target, None)
+            if result.get("info"):
+                files[path] = result["info"]
+        else:
+            continue
+        group = [p for p in index.get(digest, []) if str(p) not in gone]
+        group += [p for p in added if str(p) not in {str(q) for q in group}]
+        if group:
+            index[digest] = group
+        else:
+            index.pop(digest, None)
+        touched.add(digest)
+    if meta is not None and "groups" in meta:
+        update_group_stats(meta, index, touched)
+    if meta is not None and touched:
+        meta.pop("dirs", None)  # folder hashes are rebuilt from the index when next needed
+    return touched
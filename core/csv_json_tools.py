@@ -1,6 +1,5 @@
 import json
 import codecs
-import ijson
 import csv
 from collections import defaultdict
 import re
@@ -405,6 +404,7 @@ def json_reader(file, partial_predicate_fn=None, encoding="utf-8", json_type="au
         if encoding.lower() not in ("utf-8", "utf-8-sig"):
             raise ValueError(f"Standard JSON streaming requires UTF-8 encoding. Got: {encoding}")
 
+        import ijson    # only needed for streaming standard JSON, so not loaded at startup
         with open(file, "rb") as f:
             if skip_bytes:
                 f.seek(skip_bytes)
@@ -0,0 +1,149 @@
+import mmap
+import os
+import struct
+from pathlib import Path
+
+"""
+Read-only, memory-mapped digest file for membership checks against a master index.
+
+Layout (little endian):
+    header   MAGIC (8 bytes), version u32, digest length u32, entry count u64, reserved u64
+    digests  count fixed-width binary digests, sorted
+    offsets  count + 1 u64 offsets into the path section, one per digest plus the end
+    paths    utf-8 paths of each digest joined by newlines
+
+Opening the file maps it without reading it, lookups are a binary search over the digest section,
+and every process mapping the same file shares the same pages of the OS cache.
+"""
+
+MAGIC = b"PMDIGEST"
+VERSION = 1
+DIGEST_SIZE = 32  # SHA-256
+SUFFIX = ".pmdg"
+
+_HEADER = struct.Struct("<8sIIQQ")
+_OFFSET = struct.Struct("<Q")
+
+
+def export_digest_file(index: dict, file) -> int:
+    """
+    Write an index (hex digest -> paths) to a digest file.
+
+    Args:
+        index (dict): index to export
+        file (str | Path): target file, replaced atomically
+
+    Returns:
+        int: number of digests written
+    """
+    filepath = Path(file)
+    keys = sorted(bytes.fromhex(digest) for digest in index)
+    temp = filepath.with_name(filepath.name + ".tmp")
+    with temp.open("wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, DIGEST_SIZE, len(keys), 0))
+        for key in keys:
+            f.write(key)
+        blobs = []
+        offset = 0
+        for key in keys:
+            f.write(_OFFSET.pack(offset))
+            blob = "\n".join(str(p) for p in index[key.hex()]).encode("utf-8")
+            blobs.append(blob)
+            offset += len(blob)
+        f.write(_OFFSET.pack(offset))
+        for blob in blobs:
+            f.write(blob)
+    os.replace(temp, filepath)
+    return len(keys)
+
+
+class DigestFile:
+    """
+    Memory-mapped digest file with a read-only, dict-like interface (digest -> [Path]).
+    """
+    def __init__(self, file):
+        self.path = Path(file)
+        self._file = self.path.open("rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file cannot be mapped
+            self._file.close()
+            raise ValueError(f"Not a digest file: {self.path}")
+        if len(self._mm) < _HEADER.size:
+            self.close()
+            raise ValueError(f"Not a digest file: {self.path}")
+        magic, version, digest_size, count, _ = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Not a digest file: {self.path}")
+        self._size = digest_size
+        self._count = count
+        self._digests = _HEADER.size
+        self._offsets = self._digests + count * digest_size
+        self._paths = self._offsets + (count + 1) * _OFFSET.size
+        # A file cut short (interrupted copy, full disk) would fail on lookups; refuse it up front
+        if len(self._mm) < self._paths or \
+                len(self._mm) < self._paths + _OFFSET.unpack_from(self._mm, self._paths - _OFFSET.size)[0]:
+            self.close()
+            raise ValueError(f"Truncated digest file: {self.path}")
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def _digest_at(self, i: int) -> bytes:
+        start = self._digests + i * self._size
+        return self._mm[start:start + self._size]
+
+    def _find(self, digest: str) -> int:
+        try:
+            key = bytes.fromhex(digest)
+        except (TypeError, ValueError):
+            return -1
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._digest_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self._count and self._digest_at(lo) == key else -1
+
+    def _paths_at(self, i: int) -> list:
+        start, end = struct.unpack_from("<QQ", self._mm, self._offsets + i * _OFFSET.size)
+        blob = self._mm[self._paths + start:self._paths + end]
+        return [Path(p) for p in blob.decode("utf-8").split("\n")] if blob else []
+
+    def __contains__(self, digest) -> bool:
+        return self._find(digest) >= 0
+
+    def __getitem__(self, digest) -> list:
+        i = self._find(digest)
+        if i < 0:
+            raise KeyError(digest)
+        return self._paths_at(i)
+
+    def get(self, digest, default=None):
+        i = self._find(digest)
+        return self._paths_at(i) if i >= 0 else default
+
+    def keys(self):
+        for i in range(self._count):
+            yield self._digest_at(i).hex()
+
+    __iter__ = keys
+
+    def items(self):
+        for i in range(self._count):
+            yield self._digest_at(i).hex(), self._paths_at(i)
@@ -0,0 +1,187 @@
+import hashlib
+import os
+from collections import defaultdict
+from pathlib import Path
+from core.batch_actions import plan_delete
+
+"""
+Merkle-style directory hashes for finding duplicated folders and subtrees.
+
+Every folder holding indexed files (directly or below) gets, bottom-up from the deepest folders:
+    hash      digest of its file names + file digests and its sub-folder names + sub-folder hashes,
+              so two folders share it only if the whole subtree is identical
+    content   digest of the sorted file digests and sub-folder content hashes, ignoring names,
+              so renamed copies of a subtree still match
+    files     number of files in the subtree
+    size      bytes in the subtree (where sizes are known)
+The result is kept in the index metadata under "dirs" and dropped whenever the index changes;
+it is cheap to rebuild from the index alone.
+"""
+
+IDENTICAL = "identical"
+SAME_CONTENT = "same content"
+PARTIAL = "partial"
+
+
+def compute_dir_hashes(index: dict, meta: dict = None, cancel_flag=None) -> dict:
+    """
+    Hash every folder of an index.
+
+    Args:
+        index (dict): digest -> [paths]
+        meta (dict, optional): index metadata, for file sizes
+        cancel_flag (threading.Event, optional): stop early; returns None
+
+    Returns:
+        dict: folder -> {"hash", "content", "files", "size"}
+    """
+    files_meta = meta.get("files", {}) if meta else {}
+    entries = defaultdict(list)     # folder -> [(name, digest)]
+    sizes = defaultdict(int)
+    for n, (digest, group) in enumerate(index.items()):
+        if cancel_flag is not None and n % 10000 == 0 and cancel_flag.is_set():
+            return None
+        for p in group:
+            text = str(p)
+            folder, name = os.path.split(text)
+            entries[folder].append((name, digest))
+            sizes[folder] += (files_meta.get(text) or {}).get("size", 0)
+    if not entries:
+        return {}
+
+    try:
+        top = os.path.commonpath(list(entries))
+    except ValueError:
+        top = None  # several drives: go up to each drive root
+    subdirs = defaultdict(set)
+    for folder in list(entries):
+        while folder != top:
+            parent = os.path.dirname(folder)
+            if parent == folder:
+                break
+            if folder in subdirs[parent]:
+                break   # this branch is already linked up to the top
+            subdirs[parent].add(folder)
+            folder = parent
+
+    dirs = {}
+    # Deepest first, so every subfolder is done before its parent.  Counted in path parts: a drive
+    # root ("/", "D:\\") ends in a separator and would tie with its children by separator count.
+    folders = sorted(set(entries) | set(subdirs), key=lambda d: len(Path(d).parts), reverse=True)
+    for n, folder in enumerate(folders):
+        if cancel_flag is not None and n % 10000 == 0 and cancel_flag.is_set():
+            return None
+        tree = hashlib.sha256()
+        content_parts = []
+        files = len(entries.get(folder, ()))
+        size = sizes.get(folder, 0)
+        for name, digest in sorted(entries.get(folder, ())):
+            tree.update(f"f\0{name}\0{digest}\n".encode("utf-8", "surrogateescape"))
+            content_parts.append(digest)
+        for sub in sorted(subdirs.get(folder, ())):
+            child = dirs[sub]
+            tree.update(f"d\0{os.path.basename(sub)}\0{child['hash']}\n".encode("utf-8", "surrogateescape"))
+            content_parts.append("d" + child["content"])
+            files += child["files"]
+            size += child["size"]
+        content = hashlib.sha256("\n".join(sorted(content_parts)).encode()).hexdigest()
+        dirs[folder] = {"hash": tree.hexdigest(), "content": content, "files": files, "size": size}
+    return dirs
+
+
+def duplicate_subtrees(dirs: dict) -> list:
+    """
+    Sets of folders whose whole subtree is duplicated, largest waste first.  Only the topmost
+    duplicated folders are reported: a folder is left out when its parent is reported too.
+
+    Returns:
+        list: [{"kind", "dirs", "files", "size", "wasted"}]
+    """
+    report = []
+    identical_sets = set()
+    for key, kind in (("hash", IDENTICAL), ("content", SAME_CONTENT)):
+        by_hash = defaultdict(list)
+        for folder, info in dirs.items():
+            if info["files"]:
+                by_hash[info[key]].append(folder)
+        sets = [sorted(folders) for folders in by_hash.values() if len(folders) > 1]
+        if kind == SAME_CONTENT:
+            # Renamed copies only; folders already reported as identical are not repeated
+            sets = [folders for folders in sets if len({dirs[f]["hash"] for f in folders}) > 1]
+        duplicated = {folder for folders in sets for folder in folders}
+        if kind == IDENTICAL:
+            identical_sets = duplicated
+        for folders in sets:
+            if all(os.path.dirname(f) in duplicated or os.path.dirname(f) in identical_sets for f in folders):
+                continue
+            info = dirs[folders[0]]
+            # For renamed copies, only the copies beyond those already counted as identical
+            copies = len(folders) if kind == IDENTICAL else len({dirs[f]["hash"] for f in folders})
+            report.append({
+                "kind": kind, "dirs": folders, "files": info["files"], "size": info["size"],
+                "wasted": info["size"] * (copies - 1),
+            })
+    return sorted(report, key=lambda r: r["wasted"], reverse=True)
+
+
+def partial_duplicates(index: dict, meta: dict, dirs: dict = None, min_ratio: float = 0.5,
+                       max_group: int = 50, cancel_flag=None) -> list:
+    """
+    Pairs of folders sharing much of their direct contents without being duplicates of each other.
+
+    Args:
+        min_ratio (float, optional): shared bytes (or files, where sizes are unknown) as a share of
+            the smaller folder
+        max_group (int, optional): groups with more copies are skipped to bound the pair count
+
+    Returns:
+        list: [{"kind", "dirs", "files", "size", "wasted", "ratio"}], most shared first
+    """
+    files_meta = meta.get("files", {}) if meta else {}
+    dirs = dirs or {}
+    shared = defaultdict(lambda: [0, 0])    # (folder a, folder b) -> [files, bytes]
+    totals = defaultdict(lambda: [0, 0])
+    for n, (digest, group) in enumerate(index.items()):
+        if cancel_flag is not None and n % 10000 == 0 and cancel_flag.is_set():
+            return None
+        size = next(((files_meta.get(str(p)) or {}).get("size", 0) for p in group), 0)
+        folders = sorted({os.path.dirname(str(p)) for p in group})
+        for folder in folders:
+            totals[folder][0] += 1
+            totals[folder][1] += size
+        if len(folders) < 2 or len(folders) > max_group:
+            continue
+        for i, a in enumerate(folders):
+            for b in folders[i + 1:]:
+                shared[(a, b)][0] += 1
+                shared[(a, b)][1] += size
+    report = []
+    for (a, b), (count, size) in shared.items():
+        if a in dirs and b in dirs and dirs[a]["content"] == dirs[b]["content"]:
+            continue    # already reported as a duplicated subtree
+        smaller = min(totals[a], totals[b], key=lambda t: (t[1], t[0]))
+        ratio = size / smaller[1] if smaller[1] else count / max(smaller[0], 1)
+        if ratio >= min_ratio:
+            report.append({"kind": PARTIAL, "dirs": [a, b], "files": count, "size": size,
+                           "wasted": size, "ratio": ratio})
+    return sorted(report, key=lambda r: r["wasted"], reverse=True)
+
+
+def _under(path: str, folder: str) -> bool:
+    return path.startswith(folder.rstrip(os.sep) + os.sep)
+
+
+def plan_folder_dedupe(index: dict, meta: dict, keep_dir: str, other_dirs) -> list:
+    """
+    Plan trashing the files under other folders whose content also exists under the kept folder.
+    Files with no copy under the kept folder are never included.
+    """
+    others = list(other_dirs)
+    items = []
+    for digest, group in index.items():
+        paths = [str(p) for p in group]
+        if not any(_under(p, keep_dir) for p in paths):
+            continue
+        items += [(digest, p) for p, text in zip(group, paths)
+                  if not _under(text, keep_dir) and any(_under(text, o) for o in others)]
+    return plan_delete(items, meta)
@@ -0,0 +1,245 @@
+import struct
+from datetime import datetime
+
+"""
+Minimal EXIF reader working on the leading bytes of a file, so tags can be read from the
+chunk the scanner has already read for hashing without opening or decoding the image again.
+Supports JPEG (APP1 Exif segment) and TIFF based files (TIFF, DNG and most camera RAW formats).
+Pixel dimensions fall back to the JPEG frame header, PNG and GIF headers when EXIF has none.
+"""
+
+TAG_EXIF_IFD = 0x8769
+TAG_GPS_IFD = 0x8825
+TAG_MAKE = 0x010F
+TAG_MODEL = 0x0110
+TAG_IMAGE_WIDTH = 0x0100
+TAG_IMAGE_LENGTH = 0x0101
+TAG_PIXEL_X = 0xA002
+TAG_PIXEL_Y = 0xA003
+TAG_ORIENTATION = 0x0112
+# GPS IFD tags
+TAG_GPS_LAT_REF = 0x0001
+TAG_GPS_LAT = 0x0002
+TAG_GPS_LON_REF = 0x0003
+TAG_GPS_LON = 0x0004
+TAG_DATETIME = 0x0132
+TAG_DATETIME_ORIGINAL = 0x9003
+TAG_DATETIME_DIGITIZED = 0x9004
+TAG_THUMBNAIL_OFFSET = 0x0201   # IFD1: JPEGInterchangeFormat
+TAG_THUMBNAIL_LENGTH = 0x0202   # IFD1: JPEGInterchangeFormatLength
+
+# Bytes per component for each TIFF field type
+_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8}
+_TYPE_FORMATS = {3: "H", 4: "I", 8: "h", 9: "i", 11: "f", 12: "d"}
+
+
+def find_tiff_block(data: bytes) -> bytes:
+    """
+    Locate the TIFF structure holding the EXIF tags.
+
+    Args:
+        data (bytes): leading bytes of the file
+
+    Returns:
+        bytes: the TIFF block (starting at the byte order mark) or b"" if none was found
+    """
+    if data[:4] in (b"II*\x00", b"MM\x00*"):
+        return data
+    if data[:2] != b"\xff\xd8":
+        return b""
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return b""
+        marker = data[pos + 1]
+        if marker in (0xD9, 0xDA):  # end of image / start of scan: no more metadata
+            return b""
+        length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+        if marker == 0xE1 and data[pos + 4:pos + 10] == b"Exif\x00\x00":
+            return data[pos + 10:pos + 2 + length]
+        pos += 2 + length
+    return b""
+
+
+def _read_value(tiff: bytes, endian: str, field_type: int, count: int, value_bytes: bytes, offset: int):
+    size = _TYPE_SIZES.get(field_type, 1) * count
+    raw = value_bytes[:size] if size <= 4 else tiff[offset:offset + size]
+    if len(raw) < size:
+        return None
+    if field_type == 2:
+        return raw.split(b"\x00", 1)[0].decode("ascii", errors="replace").strip()
+    if field_type in (5, 10):
+        fmt = endian + ("I" if field_type == 5 else "i") * (2 * count)
+        parts = struct.unpack(fmt, raw)
+        values = [(parts[i] / parts[i + 1]) if parts[i + 1] else 0.0 for i in range(0, len(parts), 2)]
+    elif field_type in _TYPE_FORMATS:
+        values = list(struct.unpack(endian + _TYPE_FORMATS[field_type] * count, raw))
+    else:
+        return raw
+    return values[0] if count == 1 else values
+
+
+def read_ifd(tiff: bytes, offset: int, endian: str) -> tuple[dict, int]:
+    """
+    Read one image file directory.
+
+    Returns:
+        tuple: ({tag: value}, offset of the next IFD or 0)
+    """
+    tags = {}
+    if offset <= 0 or offset + 2 > len(tiff):
+        return tags, 0
+    count = struct.unpack(endian + "H", tiff[offset:offset + 2])[0]
+    for i in range(count):
+        entry = offset + 2 + i * 12
+        if entry + 12 > len(tiff):
+            break
+        tag, field_type, n, value_offset = struct.unpack(endian + "HHII", tiff[entry:entry + 12])
+        value = _read_value(tiff, endian, field_type, n, tiff[entry + 8:entry + 12], value_offset)
+        if value is not None:
+            tags[tag] = value
+    next_pos = offset + 2 + count * 12
+    next_ifd = struct.unpack(endian + "I", tiff[next_pos:next_pos + 4])[0] if next_pos + 4 <= len(tiff) else 0
+    return tags, next_ifd
+
+
+def read_exif_tags(data: bytes, gps: bool = False) -> dict:
+    """
+    Read the IFD0 and Exif sub-IFD tags from the leading bytes of an image.
+
+    Args:
+        data (bytes): leading bytes of the file (the first 64KB is enough for almost all JPEGs)
+        gps (bool, optional): also read the GPS IFD, returned under "gps"
+
+    Returns:
+        dict: {tag id: value}, empty if the data holds no readable EXIF
+    """
+    tiff = find_tiff_block(data)
+    if len(tiff) < 8:
+        return {}
+    endian = "<" if tiff[:2] == b"II" else ">"
+    try:
+        ifd0_offset = struct.unpack(endian + "I", tiff[4:8])[0]
+        tags, _ = read_ifd(tiff, ifd0_offset, endian)
+        if isinstance(tags.get(TAG_EXIF_IFD), int):
+            exif_tags, _ = read_ifd(tiff, tags[TAG_EXIF_IFD], endian)
+            tags.update(exif_tags)
+        if gps and isinstance(tags.get(TAG_GPS_IFD), int):
+            # GPS tag ids overlap the main ones, so they are kept apart
+            tags["gps"], _ = read_ifd(tiff, tags[TAG_GPS_IFD], endian)
+    except struct.error:
+        return {}
+    return tags
+
+
+def parse_exif_datetime(value) -> str:
+    """Convert an EXIF "YYYY:MM:DD HH:MM:SS" value to an ISO string, or "" if unparseable."""
+    if not isinstance(value, str):
+        return ""
+    try:
+        return datetime.strptime(value[:19], "%Y:%m:%d %H:%M:%S").isoformat()
+    except ValueError:
+        return ""
+
+
+def exif_capture_date(data: bytes) -> str:
+    """
+    Capture date of an image as an ISO string, from the leading bytes of the file.
+
+    Falls back from DateTimeOriginal to DateTimeDigitized to the IFD0 DateTime.
+
+    Returns:
+        str: ISO formatted capture date or "" if not available
+    """
+    tags = read_exif_tags(data)
+    for tag in (TAG_DATETIME_ORIGINAL, TAG_DATETIME_DIGITIZED, TAG_DATETIME):
+        taken = parse_exif_datetime(tags.get(tag))
+        if taken:
+            return taken
+    return ""
+
+
+def exif_thumbnail(data: bytes) -> bytes:
+    """
+    The JPEG thumbnail embedded in the EXIF IFD1 of an image (typically 160x120).
+
+    Args:
+        data (bytes): leading bytes of the file; the thumbnail sits inside the EXIF block
+
+    Returns:
+        bytes: the thumbnail JPEG, or b"" if there is none
+    """
+    tiff = find_tiff_block(data)
+    if len(tiff) < 8:
+        return b""
+    endian = "<" if tiff[:2] == b"II" else ">"
+    try:
+        _, ifd1_offset = read_ifd(tiff, struct.unpack(endian + "I", tiff[4:8])[0], endian)
+        tags, _ = read_ifd(tiff, ifd1_offset, endian)
+    except struct.error:
+        return b""
+    offset, length = tags.get(TAG_THUMBNAIL_OFFSET), tags.get(TAG_THUMBNAIL_LENGTH)
+    if not isinstance(offset, int) or not isinstance(length, int) or offset + length > len(tiff):
+        return b""
+    thumbnail = tiff[offset:offset + length]
+    return thumbnail if thumbnail[:2] == b"\xff\xd8" else b""
+
+
+def _gps_degrees(value, ref) -> float:
+    if not isinstance(value, list) or len(value) != 3:
+        return None
+    degrees = value[0] + value[1] / 60 + value[2] / 3600
+    return round(-degrees if ref in ("S", "W") else degrees, 6)
+
+
+def header_dimensions(data: bytes) -> tuple:
+    """(width, height) from a JPEG frame header or PNG/GIF header in the leading bytes, or None."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        return struct.unpack(">II", data[16:24])
+    if data[:6] in (b"GIF87a", b"GIF89a") and len(data) >= 10:
+        return struct.unpack("<HH", data[6:10])
+    if data[:2] != b"\xff\xd8":
+        return None
+    pos = 2
+    while pos + 9 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker in (0xD9, 0xDA):
+            return None
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):   # start of frame
+            height, width = struct.unpack(">HH", data[pos + 5:pos + 9])
+            return width, height
+        pos += 2 + struct.unpack(">H", data[pos + 2:pos + 4])[0]
+    return None
+
+
+def exif_details(data: bytes) -> dict:
+    """
+    Camera, pixel dimensions and GPS position of an image, from the leading bytes of the file.
+
+    Returns:
+        dict: any of {"camera": str, "width": int, "height": int, "gps": [latitude, longitude]}
+    """
+    tags = read_exif_tags(data, gps=True)
+    details = {}
+    make, model = tags.get(TAG_MAKE), tags.get(TAG_MODEL)
+    make = make if isinstance(make, str) else ""
+    model = model if isinstance(model, str) else ""
+    camera = model if model.lower().startswith(make.lower()) else f"{make} {model}".strip()
+    if camera:
+        details["camera"] = camera
+    width = tags.get(TAG_PIXEL_X, tags.get(TAG_IMAGE_WIDTH))
+    height = tags.get(TAG_PIXEL_Y, tags.get(TAG_IMAGE_LENGTH))
+    if not (isinstance(width, int) and isinstance(height, int) and width and height):
+        width, height = header_dimensions(data) or (None, None)
+    if width and height:
+        if tags.get(TAG_ORIENTATION) in (5, 6, 7, 8):   # stored rotated a quarter turn
+            width, height = height, width
+        details["width"], details["height"] = width, height
+    gps = tags.get("gps") or {}
+    lat = _gps_degrees(gps.get(TAG_GPS_LAT), gps.get(TAG_GPS_LAT_REF))
+    lon = _gps_degrees(gps.get(TAG_GPS_LON), gps.get(TAG_GPS_LON_REF))
+    if lat is not None and lon is not None:
+        details["gps"] = [lat, lon]
+    return details
@@ -0,0 +1,160 @@
+import base64
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from core.app_paths import app_dir
+from core.file_info import IMAGE_EXTENSIONS
+
+"""
+Library-wide face detection on a process pool.
+
+Detection and encoding are CPU bound and hold the GIL, so every image is processed in a separate
+process.  Results are keyed by content digest, so each distinct photo is processed once however
+many copies the index holds, and appended as soon as they arrive to a JSONL store
+(~/.pman/faces/faces.jsonl), one record per digest:
+    {"digest": str, "path": str, "shape": [height, width],
+     "faces": [{"box": [top, right, bottom, left], "encoding": base64 of 128 float32}]}
+or {"digest", "path", "error"} when the image could not be read.  A run skips digests already in
+the store, so a cancelled or crashed run resumes where it stopped.
+"""
+
+FACE_STORE = "faces.jsonl"
+
+# Types face_recognition (PIL) can decode; camera RAW files are left out
+FACE_EXTENSIONS = IMAGE_EXTENSIONS - {".dng", ".cr2", ".nef", ".arw", ".orf", ".rw2", ".pef", ".srw", ".heic", ".heif"}
+
+
+def face_store_file() -> Path:
+    return app_dir("faces") / FACE_STORE
+
+
+def encode_vector(vector) -> str:
+    """128-d face encoding -> compact base64 float32 text."""
+    import numpy as np
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def decode_vector(text: str):
+    """Inverse of encode_vector(), as a float32 NumPy array."""
+    import numpy as np
+    return np.frombuffer(base64.b64decode(text), dtype=np.float32)
+
+
+def load_face_records(store_file=None) -> dict:
+    """
+    Read the face store.
+
+    Returns:
+        dict: digest -> record, the last record of a digest winning; a line cut short by a crash is skipped
+    """
+    store_file = Path(store_file) if store_file else face_store_file()
+    records = {}
+    if not store_file.exists():
+        return records
+    with store_file.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            records[record["digest"]] = record
+    return records
+
+
+def pending_images(index: dict, meta: dict, done) -> list:
+    """
+    Images of an index still to be processed, one path per digest.
+
+    Args:
+        done (set | dict): digests already in the store
+
+    Returns:
+        list: [(digest, path)]
+    """
+    files = meta.get("files", {}) if meta else {}
+    items = []
+    for digest, group in index.items():
+        if digest in done or not group:
+            continue
+        path = str(group[0])
+        ext = (files.get(path) or {}).get("ext") or os.path.splitext(path)[1].lower()
+        if ext in FACE_EXTENSIONS:
+            items.append((digest, path))
+    return items
+
+
+def detect_faces_in_file(item, model: str = "hog", upsample: int = 1, max_edge: int = None) -> dict:
+    """
+    Detect and encode the faces of one image.  Runs in a pool process.
+
+    Args:
+        item (tuple): (digest, path)
+        max_edge (int, optional): working resolution; defaults to core.face_detect.WORKING_EDGE
+
+    Returns:
+        dict: face store record
+    """
+    digest, path = item
+    record = {"digest": digest, "path": path}
+    try:
+        from core.face_detect import detect_faces, WORKING_EDGE   # loaded in the pool processes only
+        found = detect_faces(path, WORKING_EDGE if max_edge is None else max_edge, model, upsample, encodings=True)
+    except Exception as e:
+        record["error"] = str(e)
+        return record
+    record["shape"] = list(found["shape"])
+    record["faces"] = [{"box": list(box), "encoding": encode_vector(encoding)}
+                       for box, encoding in zip(found["boxes"], found["encodings"])]
+    return record
+
+
+def _detect(args):
+    item, model, upsample, max_edge = args
+    return detect_faces_in_file(item, model, upsample, max_edge)
+
+
+def run_face_batch(items, store_file=None, max_workers: int = None, cancel_flag=None,
+                   model: str = "hog", upsample: int = 1, max_edge: int = None):
+    """
+    Detect faces in images on a process pool, appending each result to the face store.
+
+    Args:
+        items (list): (digest, path) pairs, e.g. from pending_images()
+        store_file (Path, optional): defaults to ~/.pman/faces/faces.jsonl
+        max_workers (int, optional): processes; defaults to the number of cores
+        cancel_flag (threading.Event, optional): stop submitting; images in progress are finished
+        model (str, optional): "hog" (fast, CPU) or "cnn" (accurate, slow without a GPU)
+        upsample (int, optional): times to upsample the image to find smaller faces
+        max_edge (int, optional): working resolution of detection; 0 for full resolution
+
+    Yields:
+        dict: each face store record as it is written
+    """
+    store_file = Path(store_file) if store_file else face_store_file()
+    max_workers = max_workers or os.cpu_count() or 1
+    items = iter(items)
+    # Spawned rather than forked: forking a process that runs Qt and other threads is unsafe
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor, \
+            store_file.open("a", encoding="utf-8") as store:
+        pending = set()
+        try:
+            while True:
+                while len(pending) < max_workers * 2 and not (cancel_flag is not None and cancel_flag.is_set()):
+                    item = next(items, None)
+                    if item is None:
+                        break
+                    pending.add(executor.submit(_detect, (item, model, upsample, max_edge)))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record = future.result()
+                    store.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    store.flush()
+                    yield record
+        finally:
+            for future in pending:
+                future.cancel()
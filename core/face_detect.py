@@ -0,0 +1,73 @@
+import numpy as np
+from PIL import Image
+
+"""
+Face detection at a working resolution rather than the full image.
+
+Detection time grows with the pixel count, and faces worth tagging are still found well below
+camera resolution, so images are reduced before detection (JPEGs through the decoder's draft mode,
+which skips most of the full decode) and the boxes are mapped back to full image coordinates.
+Landmarks and encodings are computed only when asked for.  face_recognition (dlib and its models)
+is imported on the first detection, not with this module.
+"""
+
+HOG = "hog"     # fast, CPU
+CNN = "cnn"     # more accurate, slow without a GPU
+MODELS = (HOG, CNN)
+
+WORKING_EDGE = 1600     # longest edge detection runs at; 0 for full resolution
+
+
+def load_working_image(path, max_edge: int = WORKING_EDGE):
+    """
+    Load an image as an RGB array no larger than max_edge.
+
+    Returns:
+        tuple: (array, (full height, full width))
+    """
+    with Image.open(path) as image:
+        full_width, full_height = image.size
+        if max_edge and max(image.size) > max_edge:
+            image.draft("RGB", (max_edge, max_edge))    # JPEG: decode at a reduced scale
+            image = image.convert("RGB")
+            image.thumbnail((max_edge, max_edge), Image.BILINEAR)
+        else:
+            image = image.convert("RGB")
+        return np.asarray(image), (full_height, full_width)
+
+
+def detect_faces(path, max_edge: int = WORKING_EDGE, model: str = HOG, upsample: int = 1,
+                 landmarks: bool = False, encodings: bool = False) -> dict:
+    """
+    Find the faces of an image at a working resolution.
+
+    Args:
+        path (str | Path): image file
+        max_edge (int, optional): longest edge to detect at; 0 for full resolution
+        model (str, optional): HOG or CNN
+        upsample (int, optional): times to upsample while detecting, to find smaller faces
+        landmarks (bool, optional): also locate facial features
+        encodings (bool, optional): also compute the 128-d encodings
+
+    Returns:
+        dict: {"shape": (height, width), "boxes": [(top, right, bottom, left)] in full image pixels,
+               plus "landmarks" (in full image pixels) and "encodings" when asked for}
+    """
+    import face_recognition     # slow to load; only when a detection is actually run
+    image, shape = load_working_image(path, max_edge)
+    y_scale = shape[0] / image.shape[0]
+    x_scale = shape[1] / image.shape[1]
+    locations = face_recognition.face_locations(image, number_of_times_to_upsample=upsample, model=model)
+    result = {
+        "shape": shape,
+        "boxes": [(round(top * y_scale), round(right * x_scale), round(bottom * y_scale), round(left * x_scale))
+                  for top, right, bottom, left in locations],
+    }
+    if landmarks:
+        result["landmarks"] = [
+            {feature: [(round(x * x_scale), round(y * y_scale)) for x, y in points] for feature, points in face.items()}
+            for face in face_recognition.face_landmarks(image, face_locations=locations)
+        ]
+    if encodings:
+        result["encodings"] = face_recognition.face_encodings(image, known_face_locations=locations)
+    return result
@@ -0,0 +1,220 @@
+import threading
+import numpy as np
+from collections import Counter
+from core.face_batch import decode_vector, face_store_file, load_face_records
+
+"""
+In-memory index of every face encoding in the face store, for finding a person across the library.
+
+All 128-d encodings sit in one contiguous float32 matrix (row = one face) with their squared norms
+precomputed, so a batch of queries is a single matrix product per block of rows:
+    |q - x|^2 = |q|^2 + |x|^2 - 2 q.x
+Blocks bound the memory of the distance matrix, so hundreds of thousands of faces are searched in
+well under a second on a CPU.  Distances are euclidean, as used by face_recognition, where 0.6 is
+the usual same-person threshold.
+
+Clustering is greedy leader clustering with running centroids, done in blocks of faces against all
+centroids at once: linear in the number of faces times clusters rather than quadratic in faces.
+"""
+
+ENCODING_SIZE = 128
+TOLERANCE = 0.6
+CLUSTER_TOLERANCE = 0.5
+BLOCK_ROWS = 65536
+
+
+class FaceIndex:
+    """
+    Args:
+        keys (list): (digest, face number) of each row
+        encodings (np.ndarray): n x 128 float32
+        boxes (list, optional): (top, right, bottom, left) of each row as fractions of the image size
+    """
+    def __init__(self, keys: list, encodings, boxes: list = None):
+        self.keys = list(keys)
+        self.encodings = np.ascontiguousarray(encodings, dtype=np.float32).reshape(len(self.keys), ENCODING_SIZE)
+        self.norms = np.einsum("ij,ij->i", self.encodings, self.encodings)
+        self.boxes = boxes or [None] * len(self.keys)
+        self._rows = {}     # digest -> [rows]
+        for row, (digest, _) in enumerate(self.keys):
+            self._rows.setdefault(digest, []).append(row)
+
+    @classmethod
+    def from_records(cls, records: dict):
+        """Build from face store records (digest -> record)."""
+        keys, vectors, boxes = [], [], []
+        for digest, record in records.items():
+            height, width = record.get("shape") or (1, 1)
+            for n, face in enumerate(record.get("faces", ())):
+                top, right, bottom, left = face["box"]
+                keys.append((digest, n))
+                vectors.append(decode_vector(face["encoding"]))
+                boxes.append((top / height, right / width, bottom / height, left / width))
+        encodings = np.vstack(vectors) if vectors else np.empty((0, ENCODING_SIZE), dtype=np.float32)
+        return cls(keys, encodings, boxes)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def rows_for(self, digest: str) -> list:
+        """Rows of the faces found in a photo."""
+        return self._rows.get(digest, [])
+
+    def face_at(self, digest: str, x: float, y: float):
+        """
+        Row of the face of a photo closest to a point given as fractions of the image size.
+
+        Returns:
+            int: row, or None if the photo has no faces in the index
+        """
+        def gap(row):
+            top, right, bottom, left = self.boxes[row]
+            return ((left + right) / 2 - x) ** 2 + ((top + bottom) / 2 - y) ** 2
+        rows = self.rows_for(digest)
+        return min(rows, key=gap) if rows else None
+
+    def _blocks(self, queries):
+        # Yield (first row, squared distances of every query to a block of rows)
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        q_norms = np.einsum("ij,ij->i", queries, queries)[:, None]
+        for start in range(0, len(self.keys), BLOCK_ROWS):
+            block = self.encodings[start:start + BLOCK_ROWS]
+            d2 = q_norms + self.norms[None, start:start + BLOCK_ROWS] - 2.0 * (queries @ block.T)
+            yield start, np.maximum(d2, 0.0)
+
+    def within(self, queries, tolerance: float = TOLERANCE) -> list:
+        """
+        Rows within tolerance of each query.
+
+        Returns:
+            list: one array of row numbers per query
+        """
+        queries = np.atleast_2d(queries)
+        found = [[] for _ in range(len(queries))]
+        limit = tolerance * tolerance
+        for start, d2 in self._blocks(queries):
+            for i, hits in enumerate(d2 <= limit):
+                found[i].append(np.flatnonzero(hits) + start)
+        return [np.concatenate(rows) if rows else np.empty(0, dtype=np.int64) for rows in found]
+
+    def nearest(self, queries, k: int = 10, tolerance: float = TOLERANCE) -> list:
+        """
+        The k closest rows within tolerance of each query.
+
+        Returns:
+            list: one [(row, distance)] list per query, closest first
+        """
+        queries = np.atleast_2d(queries)
+        best = [([], []) for _ in range(len(queries))]
+        for start, d2 in self._blocks(queries):
+            take = min(k, d2.shape[1])
+            part = np.argpartition(d2, take - 1, axis=1)[:, :take] if take < d2.shape[1] else \
+                np.tile(np.arange(d2.shape[1]), (len(queries), 1))
+            for i in range(len(queries)):
+                best[i][0].extend(part[i] + start)
+                best[i][1].extend(d2[i, part[i]])
+        limit = tolerance * tolerance
+        results = []
+        for rows, d2s in best:
+            pairs = sorted((d, r) for r, d in zip(rows, d2s) if d <= limit)[:k]
+            results.append([(int(r), float(np.sqrt(d))) for d, r in pairs])
+        return results
+
+    def photos_of(self, queries, tolerance: float = TOLERANCE) -> set:
+        """Digests of the photos holding a face within tolerance of any of the query encodings."""
+        rows = self.within(queries, tolerance)
+        return {self.keys[row][0] for found in rows for row in found}
+
+    def cluster(self, tolerance: float = CLUSTER_TOLERANCE, block_size: int = 4096, cancel_flag=None):
+        """
+        Group the faces by person without any names.
+
+        Returns:
+            np.ndarray: cluster label of each row, or None if cancelled
+        """
+        n = len(self.keys)
+        labels = np.full(n, -1, dtype=np.int64)
+        sums = np.zeros((0, ENCODING_SIZE), dtype=np.float64)
+        counts = np.zeros(0, dtype=np.int64)
+        limit = tolerance * tolerance
+        for start in range(0, n, block_size):
+            if cancel_flag is not None and cancel_flag.is_set():
+                return None
+            block = self.encodings[start:start + block_size]
+            if len(counts):
+                centroids = (sums / counts[:, None]).astype(np.float32)
+                d2 = (np.einsum("ij,ij->i", block, block)[:, None]
+                      + np.einsum("ij,ij->i", centroids, centroids)[None, :] - 2.0 * (block @ centroids.T))
+                closest = d2.argmin(axis=1)
+                matched = d2[np.arange(len(block)), closest] <= limit
+                labels[start:start + len(block)][matched] = closest[matched]
+            else:
+                matched = np.zeros(len(block), dtype=bool)
+            # Faces matching no existing person seed new clusters, taking the rest of the block with them
+            left = np.flatnonzero(~matched)
+            new_sums, new_counts = [], []
+            while len(left):
+                seed = block[left[0]]
+                d2 = ((block[left] - seed) ** 2).sum(axis=1)
+                members = left[d2 <= limit]
+                labels[start + members] = len(counts) + len(new_counts)
+                new_sums.append(block[members].sum(axis=0))
+                new_counts.append(len(members))
+                left = left[d2 > limit]
+            if new_counts:
+                sums = np.vstack([sums, np.array(new_sums)])
+                counts = np.concatenate([counts, new_counts])
+            block_labels = labels[start:start + len(block)]
+            old = block_labels[matched]
+            np.add.at(sums, old, block[matched])
+            np.add.at(counts, old, 1)
+        return labels
+
+    def propose_names(self, labels, names: dict, min_share: float = 0.5) -> dict:
+        """
+        Names for unnamed faces from the named faces clustered with them.
+
+        Args:
+            labels (np.ndarray): from cluster()
+            names (dict): (digest, face number) -> name for the faces already named
+            min_share (float, optional): share of a cluster's named faces that must agree
+
+        Returns:
+            dict: (digest, face number) -> (proposed name, share)
+        """
+        votes = {}
+        for key, name in names.items():
+            for row in self.rows_for(key[0]):
+                if self.keys[row] == key and name:
+                    votes.setdefault(int(labels[row]), Counter())[name] += 1
+        winners = {}
+        for label, counter in votes.items():
+            name, count = counter.most_common(1)[0]
+            share = count / sum(counter.values())
+            if share >= min_share:
+                winners[label] = (name, share)
+        return {key: winners[int(label)] for key, label in zip(self.keys, labels)
+                if key not in names and int(label) in winners}
+
+
+_cached = (None, None)
+_lock = threading.Lock()
+
+
+def load_face_index(store_file=None) -> FaceIndex:
+    """
+    The face index of the face store, rebuilt only when the store has changed since the last call.
+    """
+    global _cached
+    store_file = store_file or face_store_file()
+    try:
+        st = store_file.stat()
+        stamp = (str(store_file), st.st_size, st.st_mtime)
+    except OSError:
+        stamp = (str(store_file), 0, 0)
+    with _lock:
+        if _cached[0] == stamp:
+            return _cached[1]
+        index = FaceIndex.from_records(load_face_records(store_file))
+        _cached = (stamp, index)
+        return index
@@ -0,0 +1,132 @@
+import json
+import os
+from pathlib import Path
+from core.app_paths import app_dir
+
+"""
+Persistent face tags, keyed by content digest so every copy of a photo shares them.
+
+Stored in ~/.pman/faces/tags.json as
+    {"photos": {digest: [{"rect": [x, y, width, height], "name": str}]}}
+with each rect given as fractions of the image size, so tags fit the photo at any display size.
+Two indexes are kept in memory: digest -> regions (the stored dict itself) and name -> digests,
+so restoring a photo's tags and listing every photo tagged with a name are lookups, not scans.
+"""
+
+TAGS_FILE = "tags.json"
+
+
+class FaceTagStore:
+    def __init__(self, file=None):
+        self.file = Path(file) if file else app_dir("faces") / TAGS_FILE
+        self._photos = {}
+        if self.file.exists():
+            with self.file.open("r", encoding="utf-8") as f:
+                self._photos = json.load(f).get("photos", {})
+        self._by_name = {}
+        for digest, regions in self._photos.items():
+            self._index(digest, regions)
+
+    def _index(self, digest: str, regions: list):
+        for region in regions:
+            if region.get("name"):
+                self._by_name.setdefault(region["name"], set()).add(digest)
+
+    def _unindex(self, digest: str):
+        for region in self._photos.get(digest, ()):
+            photos = self._by_name.get(region.get("name"))
+            if photos is not None:
+                photos.discard(digest)
+                if not photos:
+                    del self._by_name[region["name"]]
+
+    def regions(self, digest: str) -> list:
+        """Tagged regions of a photo: [{"rect": [x, y, width, height] as fractions, "name"}]."""
+        return [dict(region) for region in self._photos.get(digest, ())]
+
+    def set_regions(self, digest: str, regions: list):
+        """Replace the regions of a photo; call save() to persist."""
+        self._unindex(digest)
+        regions = [{"rect": [float(v) for v in region["rect"]], "name": region.get("name", "")}
+                   for region in regions]
+        if regions:
+            self._photos[digest] = regions
+            self._index(digest, regions)
+        else:
+            self._photos.pop(digest, None)
+
+    def tag_face(self, digest: str, rect, name: str) -> bool:
+        """
+        Name a face of a photo, given as a rect of fractions.  An unnamed region over the face takes
+        the name; a region already named is left alone.  Call save() to persist.
+
+        Returns:
+            bool: True if the photo's tags changed
+        """
+        x, y, width, height = rect
+        centre = (x + width / 2, y + height / 2)
+        regions = self.regions(digest)
+        for region in regions:
+            rx, ry, rw, rh = region["rect"]
+            if rx <= centre[0] <= rx + rw and ry <= centre[1] <= ry + rh:
+                if region["name"]:
+                    return False
+                region["name"] = name
+                break
+        else:
+            regions.append({"rect": list(rect), "name": name})
+        self.set_regions(digest, regions)
+        return True
+
+    def names(self) -> dict:
+        """Tag names with the number of photos carrying each."""
+        return {name: len(photos) for name, photos in sorted(self._by_name.items(), key=lambda kv: kv[0].lower())}
+
+    def photos_of(self, name: str) -> set:
+        """Digests of the photos tagged with a name."""
+        return set(self._by_name.get(name, ()))
+
+    def named_regions(self) -> dict:
+        """digest -> [(rect, name)] of the named regions only."""
+        return {digest: [(region["rect"], region["name"]) for region in regions if region.get("name")]
+                for digest, regions in self._photos.items()
+                if any(region.get("name") for region in regions)}
+
+    def save(self):
+        # Written to a temporary file first so a crash never leaves the tags half written
+        temp = self.file.with_name(self.file.name + ".tmp")
+        with temp.open("w", encoding="utf-8") as f:
+            json.dump({"photos": self._photos}, f, ensure_ascii=False)
+        os.replace(temp, self.file)
+
+
+def face_index_names(face_index, named_regions: dict) -> dict:
+    """
+    Map tag names onto the faces of a face index, matching each named region to the detected face
+    nearest its centre.
+
+    Args:
+        face_index (FaceIndex): detected faces
+        named_regions (dict): from FaceTagStore.named_regions()
+
+    Returns:
+        dict: (digest, face number) -> name
+    """
+    names = {}
+    for digest, regions in named_regions.items():
+        for (x, y, width, height), name in regions:
+            row = face_index.face_at(digest, x + width / 2, y + height / 2)
+            if row is not None:
+                names[face_index.keys[row]] = name
+    return names
+
+
+_shared = None
+
+
+def shared_tag_store() -> FaceTagStore:
+    """The application wide face tag store."""
+    global _shared
+    if _shared is None:
+        _shared = FaceTagStore()
+    return _shared
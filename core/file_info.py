@@ -0,0 +1,127 @@
+import mimetypes
+import os
+from pathlib import Path
+from core.csv_json_tools import load_dict_from_json, save_dict_to_json
+from core.exif import exif_capture_date
+
+"""
+Per-file metadata recorded by the scanner while each file is open for hashing, so the GUI can
+sort and filter by size, date and type without touching the filesystem.
+
+Metadata for an index is kept in a sidecar next to the saved index (master.json -> master.meta.json):
+    {"files": {str(path): {"size": int, "mtime": float, "ext": str, "mime": str, "taken": str}}}
+Images scanned with near-duplicate detection also carry "phash" (see core.perceptual).
+"""
+
+IMAGE_EXTENSIONS = {
+    ".jpg", ".jpeg", ".jpe", ".tif", ".tiff", ".png", ".gif", ".bmp", ".webp", ".heic", ".heif",
+    ".dng", ".cr2", ".nef", ".arw", ".orf", ".rw2", ".pef", ".srw",
+}
+
+# Image types whose leading bytes can hold EXIF
+EXIF_EXTENSIONS = {".jpg", ".jpeg", ".jpe", ".tif", ".tiff", ".dng", ".cr2", ".nef", ".arw", ".orf", ".pef", ".srw"}
+
+
+def file_info(path: Path, st: os.stat_result, head: bytes = b"") -> dict:
+    """
+    Build the metadata record for a file from its stat result and leading bytes.
+
+    Args:
+        path (Path): file path
+        st (os.stat_result): stat of the open file
+        head (bytes, optional): leading bytes of the file, used for the EXIF capture date
+
+    Returns:
+        dict: {"size", "mtime", "ext", "mime", "taken"}
+    """
+    ext = path.suffix.lower()
+    info = {
+        "size": st.st_size,
+        "mtime": st.st_mtime,
+        "ext": ext,
+        "mime": mimetypes.guess_type(path.name)[0] or "",
+        "taken": "",
+    }
+    if head and ext in EXIF_EXTENSIONS:
+        info["taken"] = exif_capture_date(head)
+    return info
+
+
+def meta_path_for(index_file) -> Path:
+    """Sidecar metadata file for a saved index (master.json -> master.meta.json)."""
+    filepath = Path(index_file)
+    return filepath.with_name(f"{filepath.stem}.meta.json")
+
+
+def save_index_meta(meta: dict, index_file):
+    """
+    Save index metadata to the sidecar of a saved index.
+
+    Returns:
+        a tuple with (success : boolean, error : string)
+    """
+    return save_dict_to_json(meta, meta_path_for(index_file), save_type_hints=False)
+
+
+def load_index_meta(index_file) -> dict:
+    """Load the metadata sidecar of a saved index, or an empty metadata dict if there is none."""
+    sidecar = meta_path_for(index_file)
+    if not sidecar.exists():
+        return {"files": {}}
+    meta = load_dict_from_json(sidecar, use_type_hints=False)
+    meta.setdefault("files", {})
+    return meta
+
+
+def group_info(meta: dict, group) -> dict:
+    """
+    Metadata for a group of identical files, taken from the index metadata without any file access.
+
+    Size, type and capture date come from the content so are shared by the group; the
+    modified time is the oldest in the group.
+
+    Returns:
+        dict: metadata record for the group, empty if none of its files have metadata
+    """
+    files = meta.get("files", {}) if meta else {}
+    infos = [info for info in (files.get(str(p)) for p in group) if info]
+    if not infos:
+        return {}
+    info = dict(infos[0])
+    info["mtime"] = min(i.get("mtime", 0) for i in infos)
+    return info
+
+
+def indexed_digest(index: dict, meta: dict, path) -> str:
+    """
+    Digest of a file from an index, if the index holds the path and the file is unchanged since.
+
+    Only paths recorded in the metadata are looked up, and only while their size and modified time
+    still match, so a stale digest is never returned.
+
+    Returns:
+        str: hex digest, or None if the file has to be hashed
+    """
+    text = str(path)
+    known = (meta.get("files", {}) if meta else {}).get(text)
+    if not known:
+        return None
+    try:
+        st = os.stat(text)
+    except OSError:
+        return None
+    if known.get("size") != st.st_size or known.get("mtime") != st.st_mtime:
+        return None
+    for digest, group in list(index.items()):
+        if any(str(p) == text for p in group):
+            return digest
+    return None
+
+
+def format_size(size: int) -> str:
+    """Human readable size, e.g. 1536 -> "1.5 KB"."""
+    value = float(size)
+    for unit in ("bytes", "KB", "MB", "GB", "TB"):
+        if value < 1024 or unit == "TB":
+            return f"{int(value)} {unit}" if unit == "bytes" else f"{value:.1f} {unit}"
+        value /= 1024
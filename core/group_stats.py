@@ -0,0 +1,123 @@
+"""
+Group level aggregates for an index, computed once (at the end of a scan, or on load for older
+saved indexes) and kept in the index metadata under "groups":
+    {digest: {"size": bytes per copy, "count": copies, "total": size * count, "wasted": size * (count - 1)}}
+"wasted" is the space reclaimable by keeping a single copy (copies already replaced by links do not count).
+
+The longest paths are kept alongside under "longest", so the table can size its columns without
+a pass over every row:
+    {"unique": [[path, digest]], "duplicates": [[[path, digest]] for each file column]}
+"""
+import heapq
+
+LONGEST_KEPT = 20   # longest paths kept per file column
+
+
+def stats_for_group(meta: dict, group) -> dict:
+    files = meta.get("files", {}) if meta else {}
+    size = None
+    linked = 0
+    for p in group:
+        info = files.get(str(p))
+        if info:
+            if size is None:
+                size = info.get("size")
+            linked += bool(info.get("linked"))
+    count = len(group)
+    if size is None:
+        return {"size": None, "count": count, "total": None, "wasted": None}
+    # Copies replaced by links to the kept copy take no extra space
+    return {"size": size, "count": count, "total": size * count, "wasted": size * max(count - 1 - linked, 0)}
+
+
+def compute_group_stats(index: dict, meta: dict) -> dict:
+    """
+    Aggregates for every group of an index.
+
+    Args:
+        index (dict): digest -> [paths]
+        meta (dict): index metadata holding the per-file sizes
+
+    Returns:
+        dict: digest -> {"size", "count", "total", "wasted"}
+    """
+    return {digest: stats_for_group(meta, group) for digest, group in index.items()}
+
+
+def compute_longest_paths(index: dict, keep: int = LONGEST_KEPT) -> dict:
+    """
+    The longest paths of an index, for single files and for each file column of duplicate groups.
+
+    Returns:
+        dict: {"unique": [[path, digest]], "duplicates": [[[path, digest]] per column]}, longest first
+    """
+    unique, duplicates = [], []
+    for digest, group in index.items():
+        for slot, p in enumerate(group):
+            heap = unique if len(group) == 1 else None
+            if heap is None:
+                if slot == len(duplicates):
+                    duplicates.append([])
+                heap = duplicates[slot]
+            text = str(p)
+            if len(heap) < keep:
+                heapq.heappush(heap, (len(text), text, digest))
+            elif len(text) > heap[0][0]:
+                heapq.heapreplace(heap, (len(text), text, digest))
+
+    def entries(heap):
+        return [[text, digest] for _, text, digest in sorted(heap, reverse=True)]
+    return {"unique": entries(unique), "duplicates": [entries(heap) for heap in duplicates]}
+
+
+def update_longest_paths(longest: dict, index: dict, digests, keep: int = LONGEST_KEPT):
+    """Replace the entries of some groups after their paths changed, keeping the longest."""
+    digests = set(digests)
+    lists = [longest["unique"]] + longest["duplicates"]
+    for entries in lists:
+        entries[:] = [e for e in entries if e[1] not in digests]
+    for digest in digests:
+        group = index.get(digest, [])
+        for slot, p in enumerate(group):
+            if len(group) == 1:
+                entries = longest["unique"]
+            else:
+                while slot >= len(longest["duplicates"]):
+                    longest["duplicates"].append([])
+                entries = longest["duplicates"][slot]
+            entries.append([str(p), digest])
+    for entries in [longest["unique"]] + longest["duplicates"]:
+        entries.sort(key=lambda e: len(e[0]), reverse=True)
+        del entries[keep:]
+
+
+def update_group_stats(meta: dict, index: dict, digests):
+    """Refresh the stored aggregates (and longest paths) of some groups after their paths changed."""
+    digests = list(digests)
+    groups = meta.setdefault("groups", {})
+    for digest in digests:
+        if digest in index:
+            groups[digest] = stats_for_group(meta, index[digest])
+        else:
+            groups.pop(digest, None)
+    if "longest" in meta:
+        update_longest_paths(meta["longest"], index, digests)
+
+
+def summarize(groups: dict, digests) -> dict:
+    """
+    Totals over a selection of groups.
+
+    Returns:
+        dict: {"groups", "files", "total", "wasted"} where sizes count only groups with a known size
+    """
+    summary = {"groups": 0, "files": 0, "total": 0, "wasted": 0}
+    for digest in digests:
+        stats = groups.get(digest)
+        if not stats:
+            continue
+        summary["groups"] += 1
+        summary["files"] += stats["count"]
+        summary["total"] += stats["total"] or 0
+        summary["wasted"] += stats["wasted"] or 0
+    return summary
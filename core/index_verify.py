@@ -0,0 +1,160 @@
+import hashlib
+import os
+import random
+from pathlib import Path
+from core.file_info import file_info
+from core.throttle import RateLimiter
+from core.group_stats import update_group_stats
+
+"""
+Verification of a saved index against the disk.
+
+Every entry gets a cheap existence and size/mtime check against the index metadata. Entries whose
+size or mtime changed are suspicious and can be re-hashed; a configurable sample of unchanged
+entries is re-hashed too, which is what catches silent bit rot.  Results are reported as drift
+records which apply_repairs() can fold back into the index.
+"""
+
+OK = "ok"
+MISSING = "missing"        # path no longer exists
+TOUCHED = "touched"        # size/mtime changed but content still matches the digest
+MODIFIED = "modified"      # size/mtime changed and content changed
+CORRUPT = "corrupt"        # size/mtime unchanged but content no longer matches: bit rot
+UNRECORDED = "unrecorded"  # exists but the index holds no metadata for it yet
+SUSPECT = "suspect"        # unreadable, or size/mtime changed and was not re-hashed
+
+DRIFT_STATUSES = (MISSING, TOUCHED, MODIFIED, CORRUPT, UNRECORDED, SUSPECT)
+
+# Metadata fields read from the file content rather than the file system
+CONTENT_FIELDS = ("taken", "media", "phash")
+
+
+def hash_file_throttled(path: Path, limiter: RateLimiter = None, cancel_flag=None, chunk_size: int = 65536) -> str:
+    """
+    SHA-256 of a file, reading no faster than the limiter allows.
+
+    Returns:
+        str: hex digest, or None if cancelled part way through
+    """
+    hasher = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        while chunk := f.read(chunk_size):
+            if cancel_flag is not None and cancel_flag.is_set():
+                return None
+            if limiter:
+                limiter.consume(len(chunk))
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def verify_entries(entries, meta: dict, sample_rate: float = 0.0, rehash_suspicious: bool = True,
+                   limiter: RateLimiter = None, cancel_flag=None, rng=None):
+    """
+    Generator checking index entries against the disk, yielding one record per path.
+
+    Args:
+        entries (iterable): (digest, [paths]) pairs, e.g. list(index.items())
+        meta (dict): index metadata ({"files": {str(path): info}})
+        sample_rate (float, optional): fraction (0..1) of unchanged entries to re-hash. Defaults to 0.
+        rehash_suspicious (bool, optional): re-hash entries whose size/mtime changed. Defaults to True.
+        limiter (RateLimiter, optional): read rate limit for re-hashing
+        cancel_flag (threading.Event, optional): stops the walk when set
+        rng (random.Random, optional): source for sampling
+
+    Yields:
+        dict: {"status", "digest", "path", "new_digest", "info"} where info is the fresh metadata
+              (None for missing files)
+    """
+    files = meta.get("files", {}) if meta else {}
+    rng = rng or random.Random()
+    for digest, paths in entries:
+        for path in paths:
+            if cancel_flag is not None and cancel_flag.is_set():
+                return
+            record = {"status": OK, "digest": digest, "path": path, "new_digest": digest, "info": None}
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                record["status"] = MISSING
+                yield record
+                continue
+            except OSError:
+                record["status"] = SUSPECT
+                yield record
+                continue
+
+            info = file_info(Path(path), st)
+            known = files.get(str(path))
+            if known:
+                # Content derived fields stay valid unless the content turns out to have changed
+                for field in CONTENT_FIELDS:
+                    if field in known:
+                        info[field] = known[field]
+            record["info"] = info
+            changed = bool(known) and (known.get("size") != st.st_size or known.get("mtime") != st.st_mtime)
+            if changed:
+                rehash = rehash_suspicious
+            else:
+                rehash = sample_rate > 0 and rng.random() < sample_rate
+
+            if rehash:
+                try:
+                    new_digest = hash_file_throttled(path, limiter, cancel_flag)
+                except OSError:
+                    record["status"] = SUSPECT
+                    yield record
+                    continue
+                if new_digest is None:
+                    return
+                record["new_digest"] = new_digest
+                if new_digest == digest:
+                    record["status"] = TOUCHED if changed else (OK if known else UNRECORDED)
+                else:
+                    record["status"] = MODIFIED if changed else CORRUPT
+                    info["taken"] = ""
+                    for field in CONTENT_FIELDS[1:]:
+                        info.pop(field, None)
+            elif changed:
+                record["status"] = SUSPECT
+            elif not known:
+                record["status"] = UNRECORDED
+            yield record
+
+
+def apply_repairs(index: dict, meta: dict, drifts) -> int:
+    """
+    Fold drift records back into an index and its metadata.
+
+    Missing paths are dropped, modified paths move to the group of their new digest and metadata
+    is refreshed for everything that was re-checked.  Suspect and corrupt entries are only reported:
+    a corrupt file keeps its original digest so an intact copy can still be found by it.
+
+    Returns:
+        int: number of repairs made
+    """
+    files = meta.setdefault("files", {})
+    repairs = 0
+    touched = set()
+    for drift in drifts:
+        status, digest, path = drift["status"], drift["digest"], drift["path"]
+        if status in (OK, SUSPECT, CORRUPT):
+            continue
+        touched.add(digest)
+        if status in (MISSING, MODIFIED) and digest in index:
+            index[digest] = [p for p in index[digest] if p != path]
+            if not index[digest]:
+                del index[digest]
+        if status == MISSING:
+            files.pop(str(path), None)
+        else:
+            if status == MODIFIED:
+                index.setdefault(drift["new_digest"], []).append(path)
+                touched.add(drift["new_digest"])
+            if drift["info"]:
+                files[str(path)] = drift["info"]
+        repairs += 1
+    if "groups" in meta:
+        update_group_stats(meta, index, touched)
+    if repairs:
+        meta.pop("dirs", None)
+    return repairs
@@ -0,0 +1,111 @@
+import os
+import shutil
+import sys
+import uuid
+from pathlib import Path
+from core.index_verify import hash_file_throttled
+
+"""
+Space reclamation without changing any paths: a redundant copy is replaced by a hard link to the
+kept copy, or by a copy-on-write reflink (btrfs/XFS via the FICLONE ioctl, APFS via clonefile()).
+
+A link is first created under a temporary name next to the redundant copy and then renamed over
+it with os.replace(), so the path never disappears and a failure leaves the original in place.
+Both files are re-hashed right before linking and must still match the digest in the index.
+"""
+
+HARDLINK = "hardlink"
+REFLINK = "reflink"
+
+FICLONE = 0x40049409    # _IOW(0x94, 9, int) from linux/fs.h
+
+
+class LinkError(OSError):
+    pass
+
+
+def reflink(src, dst):
+    """Create dst as a copy-on-write clone of src.  Raises LinkError where unsupported."""
+    if sys.platform.startswith("linux"):
+        import fcntl
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            try:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            except OSError as e:
+                d.close()
+                os.unlink(dst)
+                raise LinkError(f"reflinks not supported here: {e}") from e
+        shutil.copystat(src, dst)
+    elif sys.platform == "darwin":
+        import ctypes
+        libc = ctypes.CDLL("libc.dylib", use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            raise LinkError(f"reflinks not supported here: {os.strerror(ctypes.get_errno())}")
+    else:
+        raise LinkError("reflinks are not supported on this platform")
+
+
+def hardlink(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        raise LinkError(f"can't hard link: {e}") from e
+
+
+LINKERS = {HARDLINK: hardlink, REFLINK: reflink}
+
+
+def _temp_name(path: Path) -> Path:
+    return path.with_name(f".{path.name}.pman-{uuid.uuid4().hex[:8]}")
+
+
+def same_file(a, b) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def replace_with_link(keep, redundant, digest: str, mode: str = HARDLINK, keep_verified: bool = False):
+    """
+    Replace a redundant copy by a link to the kept copy.
+
+    Args:
+        keep (str | Path): copy that stays
+        redundant (str | Path): identical copy to replace
+        digest (str): content digest both must still have
+        mode (str, optional): HARDLINK or REFLINK
+        keep_verified (bool, optional): the kept copy was already re-hashed in this batch
+
+    Returns:
+        bool: True if linked, False if already the same file
+    """
+    keep, redundant = Path(keep), Path(redundant)
+    if same_file(keep, redundant):
+        return False
+    if mode == HARDLINK and os.stat(keep).st_dev != os.stat(redundant).st_dev:
+        raise LinkError("files are on different volumes")
+    if not keep_verified and hash_file_throttled(keep) != digest:
+        raise LinkError(f"{keep} no longer matches the index")
+    if hash_file_throttled(redundant) != digest:
+        raise LinkError(f"{redundant} no longer matches the index")
+    temp = _temp_name(redundant)
+    LINKERS[mode](keep, temp)
+    try:
+        os.replace(temp, redundant)
+    except OSError:
+        temp.unlink(missing_ok=True)
+        raise
+    return True
+
+
+def unlink_copy(keep, linked):
+    """Undo a link: give the linked path an independent copy of the content again."""
+    keep, linked = Path(keep), Path(linked)
+    temp = _temp_name(linked)
+    shutil.copy2(keep, temp)
+    try:
+        os.replace(temp, linked)
+    except OSError:
+        temp.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,93 @@
+from pathlib import Path
+from core.csv_json_tools import load_dict_from_json
+from core.digest_file import DigestFile, SUFFIX as DIGEST_SUFFIX
+
+
+class MasterSet:
+    """
+    A set of named master indexes (one per archive disk) that a candidate can be
+    checked against in a single pass.
+
+    Archives are attached by file and only loaded the first time they are needed,
+    so attaching many large masters costs nothing until a comparison is made.
+    Digest files (.pmdg) are memory-mapped rather than loaded.
+    """
+
+    def __init__(self):
+        self._sources: dict[str, Path] = {}
+        self._loaded: dict[str, dict] = {}
+
+    def __len__(self):
+        return len(self._sources)
+
+    def __contains__(self, name):
+        return name in self._sources
+
+    def names(self) -> list[str]:
+        return list(self._sources)
+
+    def attach(self, file, name: str = None) -> str:
+        """
+        Attach a saved master index without loading it.
+
+        Args:
+            file (str | Path): saved master index
+            name (str, optional): archive name. Defaults to the file stem, made unique.
+
+        Returns:
+            str: the name the archive was attached under
+        """
+        filepath = Path(file)
+        base = name or filepath.stem
+        name, n = base, 2
+        while name in self._sources and self._sources[name] != filepath:
+            name, n = f"{base} ({n})", n + 1
+        self._unload(name)
+        self._sources[name] = filepath
+        return name
+
+    def _unload(self, name: str):
+        index = self._loaded.pop(name, None)
+        if isinstance(index, DigestFile):
+            index.close()
+
+    def detach(self, name: str):
+        self._unload(name)
+        self._sources.pop(name, None)
+
+    def clear(self):
+        for name in list(self._loaded):
+            self._unload(name)
+        self._sources.clear()
+
+    def index(self, name: str):
+        """Return the index for an archive, loading it on first use."""
+        if name not in self._loaded:
+            source = self._sources[name]
+            if source.suffix.lower() == DIGEST_SUFFIX:
+                self._loaded[name] = DigestFile(source)
+            else:
+                self._loaded[name] = load_dict_from_json(source)
+        return self._loaded[name]
+
+    def archives_holding(self, digest: str) -> list[str]:
+        return [name for name in self._sources if digest in self.index(name)]
+
+    def match(self, candidate: dict) -> dict[str, list[str]]:
+        """
+        Check every digest of a candidate index against all attached archives.
+
+        Args:
+            candidate (dict): index of digest -> paths
+
+        Returns:
+            dict: digest -> names of the archives that already hold that content,
+                  for matched digests only
+        """
+        indexes = [(name, self.index(name)) for name in self._sources]
+        matches = {}
+        for digest in candidate:
+            held = [name for name, index in indexes if digest in index]
+            if held:
+                matches[digest] = held
+        return matches
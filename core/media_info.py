@@ -0,0 +1,262 @@
+import json
+import struct
+import threading
+from pathlib import Path
+from core.app_paths import app_dir
+from core.exif import exif_details
+
+"""
+Media metadata read from file headers only, never by decoding or reading whole files.
+
+    photos         camera, width, height, gps ([latitude, longitude]) from EXIF, with dimensions
+                   falling back to the JPEG/PNG/GIF headers
+    WAV / FLAC     duration, sample_rate, channels, bits from the format header
+    MP3            duration, sample_rate, channels, bitrate from the first frame (and Xing/Info
+                   frame count where present); a leading ID3 tag is skipped by seeking
+    MP4 / MOV      duration, codec, width, height, sample_rate, channels from the moov box, found
+                   by seeking from box header to box header
+
+The scanner reads it from the leading bytes it already holds for hashing, seeking the open file
+only for MP3 behind a large ID3 tag and for MP4/MOV.  Results are cached by content digest in
+~/.pman/media/media.jsonl, so a file already seen (under any path, in any scan) is never parsed
+again, and are kept in the index metadata as files[path]["media"].
+"""
+
+MEDIA_STORE = "media.jsonl"
+
+PHOTO_EXTENSIONS = {".jpg", ".jpeg", ".jpe", ".tif", ".tiff", ".png", ".gif",
+                    ".dng", ".cr2", ".nef", ".arw", ".orf", ".pef", ".srw"}
+AUDIO_EXTENSIONS = {".wav", ".flac", ".mp3"}
+VIDEO_EXTENSIONS = {".mp4", ".m4v", ".m4a", ".mov", ".3gp"}
+MEDIA_EXTENSIONS = PHOTO_EXTENSIONS | AUDIO_EXTENSIONS | VIDEO_EXTENSIONS
+
+MAX_MOOV = 32 * 1024 * 1024     # larger movie headers are not read
+
+
+def _wav_details(head: bytes) -> dict:
+    if head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+        return {}
+    details, pos, byte_rate = {}, 12, 0
+    while pos + 8 <= len(head):
+        chunk, size = head[pos:pos + 4], struct.unpack("<I", head[pos + 4:pos + 8])[0]
+        if chunk == b"fmt " and pos + 24 <= len(head):
+            _, channels, rate, byte_rate, _, bits = struct.unpack("<HHIIHH", head[pos + 8:pos + 24])
+            details.update(codec="pcm", channels=channels, sample_rate=rate, bits=bits)
+        elif chunk == b"data":
+            if byte_rate:
+                details["duration"] = round(size / byte_rate, 3)
+            break
+        pos += 8 + size + (size & 1)
+    return details
+
+
+def _flac_details(head: bytes) -> dict:
+    if head[:4] != b"fLaC" or len(head) < 26 or head[4] & 0x7F != 0:     # STREAMINFO comes first
+        return {}
+    info = int.from_bytes(head[18:26], "big")
+    rate = info >> 44
+    channels = ((info >> 41) & 0x7) + 1
+    bits = ((info >> 36) & 0x1F) + 1
+    samples = info & 0xFFFFFFFFF
+    details = {"codec": "flac", "sample_rate": rate, "channels": channels, "bits": bits}
+    if rate and samples:
+        details["duration"] = round(samples / rate, 3)
+    return details
+
+
+_MP3_BITRATES = {   # (MPEG-1, layer III) and (MPEG-2/2.5, layer III), kbit/s
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _mp3_details(f, head: bytes, size: int) -> dict:
+    offset = 0
+    if head[:3] == b"ID3" and len(head) >= 10:
+        offset = 10 + ((head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9])
+    data = head[offset:offset + 4096] if offset + 4096 <= len(head) else None
+    if data is None:
+        f.seek(offset)
+        data = f.read(4096)
+    # First frame sync within the block
+    for pos in range(len(data) - 4):
+        if data[pos] == 0xFF and data[pos + 1] & 0xE0 == 0xE0:
+            header = int.from_bytes(data[pos:pos + 4], "big")
+            version = (header >> 19) & 0x3
+            layer = (header >> 17) & 0x3
+            bitrate_index = (header >> 12) & 0xF
+            rate_index = (header >> 10) & 0x3
+            if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+                continue    # not a layer III frame header
+            bitrate = _MP3_BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+            rate = _MP3_RATES[version][rate_index]
+            channels = 1 if (header >> 6) & 0x3 == 3 else 2
+            details = {"codec": "mp3", "sample_rate": rate, "channels": channels, "bitrate": bitrate}
+            samples_per_frame = 1152 if version == 3 else 576
+            xing = data.find(b"Xing", pos, pos + 64)
+            if xing < 0:
+                xing = data.find(b"Info", pos, pos + 64)
+            if xing >= 0 and len(data) >= xing + 12 and data[xing + 7] & 0x1:
+                frames = struct.unpack(">I", data[xing + 8:xing + 12])[0]
+                details["duration"] = round(frames * samples_per_frame / rate, 3)
+            elif bitrate:
+                details["duration"] = round((size - offset - pos) * 8 / bitrate, 3)
+            return details
+    return {}
+
+
+def _boxes(data: bytes, start: int = 0, end: int = None):
+    # Yield (type, body start, body end) of the ISO media boxes in data[start:end]
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        header = 8
+        if size == 1 and pos + 16 <= end:
+            size, header = struct.unpack(">Q", data[pos + 8:pos + 16])[0], 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield kind, pos + header, min(pos + size, end)
+        pos += size
+
+
+def _find_moov(f, size: int) -> bytes:
+    # Walk the top level box headers by seeking; the movie header can sit after the media data
+    pos = 0
+    while pos + 8 <= size:
+        f.seek(pos)
+        header = f.read(16)
+        if len(header) < 8:
+            return b""
+        box_size, kind = struct.unpack(">I4s", header[:8])
+        header_size = 8
+        if box_size == 1 and len(header) == 16:
+            box_size, header_size = struct.unpack(">Q", header[8:16])[0], 16
+        elif box_size == 0:
+            box_size = size - pos
+        if box_size < header_size:
+            return b""
+        if kind == b"moov":
+            if box_size > MAX_MOOV:
+                return b""
+            f.seek(pos + header_size)
+            return f.read(box_size - header_size)
+        pos += box_size
+    return b""
+
+
+def _mp4_details(f, head: bytes, size: int) -> dict:
+    if head[4:8] not in (b"ftyp", b"moov", b"mdat", b"wide", b"free", b"skip"):
+        return {}
+    moov = _find_moov(f, size)
+    details = {}
+    for kind, start, end in _boxes(moov):
+        if kind == b"mvhd":
+            version = moov[start]
+            if version == 1:
+                timescale, duration = struct.unpack(">IQ", moov[start + 20:start + 32])
+            else:
+                timescale, duration = struct.unpack(">II", moov[start + 12:start + 20])
+            if timescale:
+                details["duration"] = round(duration / timescale, 3)
+        elif kind == b"trak":
+            _track_details(moov, start, end, details)
+    return details
+
+
+def _track_details(moov: bytes, start: int, end: int, details: dict):
+    width = height = 0
+    for kind, s, e in _boxes(moov, start, end):
+        if kind == b"tkhd":
+            width, height = (v >> 16 for v in struct.unpack(">II", moov[e - 8:e]))
+        elif kind == b"mdia":
+            handler, entry = None, None
+            for kind2, s2, e2 in _boxes(moov, s, e):
+                if kind2 == b"hdlr":
+                    handler = moov[s2 + 8:s2 + 12]
+                elif kind2 == b"minf":
+                    for kind3, s3, e3 in _boxes(moov, s2, e2):
+                        if kind3 == b"stbl":
+                            for kind4, s4, e4 in _boxes(moov, s3, e3):
+                                if kind4 == b"stsd" and e4 >= s4 + 16:
+                                    entry = s4 + 8     # first sample description
+            if entry is None:
+                continue
+            codec = moov[entry + 4:entry + 8].decode("latin-1").strip()
+            if handler == b"vide" and "codec" not in details:
+                details["codec"] = codec
+                if width and height:
+                    details["width"], details["height"] = width, height
+            elif handler == b"soun" and "audio_codec" not in details and entry + 36 <= len(moov):
+                details["audio_codec"] = codec
+                details["channels"] = struct.unpack(">H", moov[entry + 24:entry + 26])[0]
+                details["sample_rate"] = struct.unpack(">I", moov[entry + 32:entry + 36])[0] >> 16
+
+
+def media_details(f, head: bytes, ext: str, size: int) -> dict:
+    """
+    Header metadata of a photo, audio or video file.
+
+    Args:
+        f (file): the file, open in binary mode; only seeked for MP3 and MP4/MOV
+        head (bytes): leading bytes of the file (64KB)
+        ext (str): lower-case extension
+        size (int): file size
+
+    Returns:
+        dict: the fields found, empty for other types or unreadable headers
+    """
+    try:
+        if ext in PHOTO_EXTENSIONS:
+            return exif_details(head)
+        if ext == ".wav":
+            return _wav_details(head)
+        if ext == ".flac":
+            return _flac_details(head)
+        if ext == ".mp3":
+            return _mp3_details(f, head, size)
+        if ext in VIDEO_EXTENSIONS:
+            return _mp4_details(f, head, size)
+    except (struct.error, IndexError, ValueError, OSError):
+        pass
+    return {}
+
+
+class MediaCache:
+    """
+    Media details by content digest, appended to a JSONL file as they are found.
+
+    Args:
+        file (Path, optional): defaults to ~/.pman/media/media.jsonl
+        field (str, optional): record key of the cached value, for other per-digest details
+    """
+    def __init__(self, file=None, field: str = "media"):
+        self.file = Path(file) if file else app_dir("media") / MEDIA_STORE
+        self.field = field
+        self._details = {}
+        self._lock = threading.Lock()
+        if self.file.exists():
+            with self.file.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue    # a line cut short by a crash
+                    self._details[record["digest"]] = record[self.field]
+
+    def get(self, digest: str):
+        return self._details.get(digest)
+
+    def add_many(self, records: dict):
+        """Store {digest: details} for digests not cached yet."""
+        with self._lock:
+            new = {d: m for d, m in records.items() if d not in self._details}
+            if not new:
+                return
+            with self.file.open("a", encoding="utf-8") as f:
+                for digest, details in new.items():
+                    f.write(json.dumps({"digest": digest, self.field: details}, ensure_ascii=False) + "\n")
+            self._details.update(new)
@@ -0,0 +1,134 @@
+import fnmatch
+import re
+from array import array
+
+"""
+Substring and glob search over the paths of an index, fast enough to run as the user types.
+
+Paths repeat the same folder names over and over, so the index is built over the unique path
+components rather than the full strings:
+    components   unique lower-cased folder/file names, each with the ids of the paths using it
+    trigrams     3-character grams of the components -> component ids
+A query is split into literal fragments; each fragment of 3 or more characters selects the
+components containing it through the trigram postings, and the paths using those components are
+intersected across fragments.  Only the surviving candidates are checked against the full query.
+"""
+
+_GLOB_CHARS = re.compile(r"[*?\[]")
+_GLOB_SPLIT = re.compile(r"\[[^\]]*\]|[*?]")
+
+
+def _normalise(path: str) -> str:
+    return path.replace("\\", "/").lower()
+
+
+def _trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class PathSearchIndex:
+    def __init__(self):
+        self._keys = []          # path id -> index key (digest)
+        self._paths = []         # path id -> normalised path
+        self._components = {}    # component -> component id
+        self._component_text = []
+        self._component_paths = []   # component id -> array of path ids
+        self._grams = {}         # trigram -> array of component ids
+
+    def __len__(self):
+        return len(self._paths)
+
+    @classmethod
+    def from_index(cls, index: dict, cancel_flag=None):
+        """
+        Build a search index over every path of an index (digest -> [paths]).
+
+        Returns:
+            PathSearchIndex: the index, or None if cancelled
+        """
+        search = cls()
+        for n, (key, paths) in enumerate(list(index.items())):
+            if cancel_flag is not None and n % 10000 == 0 and cancel_flag.is_set():
+                return None
+            for p in paths:
+                search.add(key, str(p))
+        return search
+
+    def add(self, key, path: str):
+        path_id = len(self._paths)
+        text = _normalise(path)
+        self._keys.append(key)
+        self._paths.append(text)
+        for part in set(text.split("/")):
+            if not part:
+                continue
+            comp_id = self._components.get(part)
+            if comp_id is None:
+                comp_id = len(self._component_text)
+                self._components[part] = comp_id
+                self._component_text.append(part)
+                self._component_paths.append(array("I"))
+                for gram in _trigrams(part):
+                    self._grams.setdefault(gram, array("I")).append(comp_id)
+            self._component_paths[comp_id].append(path_id)
+
+    def _fragment_paths(self, fragment: str):
+        # Ids of the paths with a component containing the fragment (fragment has no separators)
+        grams = sorted(_trigrams(fragment), key=lambda g: len(self._grams.get(g, ())))
+        if not grams or grams[0] not in self._grams:
+            return set()
+        comps = self._grams[grams[0]]
+        matches = set()
+        for comp_id in comps:
+            if fragment in self._component_text[comp_id]:
+                matches.update(self._component_paths[comp_id])
+        return matches
+
+    def search(self, query: str, limit: int = None) -> set:
+        """
+        Keys of the groups with a path matching the query.
+
+        A query containing *, ? or [...] is a glob matched against the whole path and against the
+        file name (so "IMG_*.jpg" and "*/2019/*" both work); anything else is a case-insensitive
+        substring.  Folder separators may be / or \\.
+
+        Args:
+            query (str): substring or glob
+            limit (int, optional): stop after this many matching paths
+
+        Returns:
+            set: matching keys
+        """
+        query = _normalise(query.strip())
+        if not query:
+            return set()
+        is_glob = bool(_GLOB_CHARS.search(query))
+        literal = _GLOB_SPLIT.sub("/", query) if is_glob else query
+        fragments = [f for f in literal.split("/") if len(f) >= 3]
+
+        candidates = None
+        for fragment in sorted(fragments, key=len, reverse=True):
+            paths = self._fragment_paths(fragment)
+            candidates = paths if candidates is None else candidates & paths
+            if not candidates:
+                return set()
+        if candidates is None:
+            candidates = range(len(self._paths))  # nothing indexable: check every path
+
+        if is_glob:
+            regex = re.compile(fnmatch.translate(query))
+            def matches(text):
+                return regex.match(text) is not None or regex.match(text.rsplit("/", 1)[-1]) is not None
+        else:
+            def matches(text):
+                return query in text
+
+        keys = set()
+        found = 0
+        for path_id in candidates:
+            if matches(self._paths[path_id]):
+                keys.add(self._keys[path_id])
+                found += 1
+                if limit is not None and found >= limit:
+                    break
+        return keys
@@ -0,0 +1,132 @@
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage
+from core.thumbnails import decode_scaled
+
+"""
+Perceptual hashes for finding near-duplicate images: resized, re-encoded or metadata-stripped
+copies that the content digest cannot match.
+
+dHash: the image reduced to 9x8 grey pixels, one bit per horizontally adjacent pair telling
+whether brightness rises, giving 64 bits that change little under scaling and recompression.
+Similar images have hashes a small Hamming distance apart.  Grouping uses multi-index hashing:
+each hash is filed under its four 16-bit chunks, and two hashes within distance 6 must be within
+distance 1 in at least one chunk, so each hash is compared only with the few entries filed under
+the 17 chunk values next to its own rather than with every other image.
+
+Hashes are stored per file in the index metadata ("phash": 16 hex digits) and the groups, as lists
+of digests, under "similar".  Scans also cache them by content digest in ~/.pman/media/phash.jsonl,
+so an image is hashed once however many copies and rescans it has.
+"""
+
+PHASH_STORE = "phash.jsonl"
+
+HASH_EDGE = 256         # decode size before reducing; large enough to avoid the EXIF thumbnail
+MAX_DISTANCE = 6        # bits out of 64 for two images to count as near duplicates
+
+CHUNKS = 4              # multi-index hashing: the 64 bits as four 16-bit table keys
+CHUNK_BITS = 16
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+# Types Qt decodes; camera RAW files are left out
+DHASH_EXTENSIONS = {".jpg", ".jpeg", ".jpe", ".tif", ".tiff", ".png", ".gif", ".bmp", ".webp"}
+
+
+def dhash(path) -> int:
+    """
+    64-bit difference hash of an image.
+
+    Returns:
+        int: the hash, or None if the image could not be decoded
+    """
+    image = decode_scaled(path, HASH_EDGE)
+    if image.isNull():
+        return None
+    grey = image.convertToFormat(QImage.Format_Grayscale8).scaled(9, 8, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+    bits = grey.constBits()
+    stride = grey.bytesPerLine()
+    value = 0
+    for y in range(8):
+        row = bytes(bits[y * stride:y * stride + 9])
+        for x in range(8):
+            value = (value << 1) | (row[x + 1] > row[x])
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _masks(bits: int, radius: int) -> list:
+    # Every xor mask of up to radius set bits within a chunk
+    masks = [0]
+    for _ in range(radius):
+        masks = sorted({m | (1 << b) for m in masks for b in range(bits)} | set(masks))
+    return masks
+
+
+def near_duplicate_groups(index: dict, meta: dict, max_distance: int = MAX_DISTANCE, cancel_flag=None) -> list:
+    """
+    Groups of distinct images (by digest) whose perceptual hashes are within max_distance of
+    each other, joined transitively.
+
+    Returns:
+        list: [[digests]] of two or more digests, largest groups first, or None if cancelled
+    """
+    files = meta.get("files", {}) if meta else {}
+    by_value = {}
+    for digest, group in index.items():
+        for p in group:
+            phash = (files.get(str(p)) or {}).get("phash")
+            if phash:
+                by_value.setdefault(int(phash, 16), []).append(digest)
+                break
+    values = list(by_value)
+
+    # Multi-index hashing: two hashes within max_distance differ by at most max_distance // CHUNKS
+    # bits in at least one of the chunks, so only the entries near a hash in some chunk are compared
+    tables = [{} for _ in range(CHUNKS)]
+    for i, value in enumerate(values):
+        for c, table in enumerate(tables):
+            table.setdefault((value >> (CHUNK_BITS * c)) & CHUNK_MASK, []).append(i)
+    masks = _masks(CHUNK_BITS, max_distance // CHUNKS)
+
+    # Union-find over distinct hash values; identical hashes start out joined
+    parent = list(range(len(values)))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    for i, value in enumerate(values):
+        if cancel_flag is not None and i % 5000 == 0 and cancel_flag.is_set():
+            return None
+        for c, table in enumerate(tables):
+            key = (value >> (CHUNK_BITS * c)) & CHUNK_MASK
+            for mask in masks:
+                for j in table.get(key ^ mask, ()):
+                    if j > i and hamming(value, values[j]) <= max_distance:
+                        a, b = find(i), find(j)
+                        if a != b:
+                            parent[a] = b
+    groups = {}
+    for i, value in enumerate(values):
+        groups.setdefault(find(i), []).extend(by_value[value])
+    return sorted((sorted(g) for g in groups.values() if len(g) > 1), key=len, reverse=True)
+
+
+def near_duplicate_index(index: dict, similar: list) -> tuple[dict, dict]:
+    """
+    View of the near-duplicate groups as an index: one row per group, holding the paths of every
+    image in it.  Digests no longer in the index are skipped.
+
+    Returns:
+        tuple: ({first digest: [paths]}, {first digest: [digests]})
+    """
+    rows, members = {}, {}
+    for digests in similar or ():
+        present = [d for d in digests if index.get(d)]
+        if len(present) < 2:
+            continue
+        rows[present[0]] = [p for d in present for p in index[d]]
+        members[present[0]] = present
+    return rows, members
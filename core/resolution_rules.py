@@ -0,0 +1,151 @@
+import os
+from core.batch_actions import plan_delete, plan_link, DELETE
+from core.group_stats import stats_for_group
+
+"""
+Rule-based resolution of duplicate groups: pick one copy to keep in every group and plan the
+removal of the rest, in a single pass over the index and without touching the disk.
+
+Rules:
+    keep              which copy wins: oldest / newest modified, shortest / longest path, or the
+                      copy filed in a folder named after its capture date
+    prefer_roots      folders whose copies win over copies elsewhere (earlier folders first)
+    protected_roots   folders never touched: their copies are always kept, and a group with a
+                      protected copy loses all its other copies
+The redundant copies are either moved to the trash or, with a link action, replaced in place by
+hard links / reflinks to the kept copy.
+"""
+
+KEEP_OLDEST = "oldest"
+KEEP_NEWEST = "newest"
+KEEP_SHORTEST = "shortest"
+KEEP_LONGEST = "longest"
+KEEP_DATED = "dated"
+
+
+def _mtime(info) -> tuple:
+    # Files without metadata rank after those with a known date
+    return (True, 0) if not info else (False, info.get("mtime", 0))
+
+
+def _starts_with(component: str, value: str) -> bool:
+    # A whole folder name, or one beginning with the value and a separator ("2019", "2019-05 Trip")
+    return component == value or (component.startswith(value) and component[len(value)] in "-_. ")
+
+
+def _dated(p: str, info) -> tuple:
+    # Copies filed under their capture date win: a folder named after the year, better still the
+    # year and month (.../2019/05/... or .../2019-05...).  Only folder names count, never the file
+    # name, as camera file names carry the date wherever the file is.  Ties go to the oldest.
+    taken = (info or {}).get("taken", "")
+    year, month = taken[:4], taken[5:7]
+    if not (year.isdigit() and len(year) == 4):
+        return (True, True, _mtime(info))
+    folders = [c for c in p.replace("\\", "/").split("/")[:-1] if c]
+    has_year = any(_starts_with(c, year) for c in folders)
+    has_month = month.isdigit() and (
+        any(c == year and _starts_with(nxt, month) for c, nxt in zip(folders, folders[1:]))
+        or any(_starts_with(c[len(year) + 1:], month) for c in folders
+               if len(c) > len(year) + 1 and _starts_with(c, year))
+    )
+    return (not has_year, not has_month, _mtime(info))
+
+
+# keep rule -> (description, fn(path str, file info) -> sort key, lowest wins)
+KEEP_RULES = {
+    KEEP_OLDEST: ("Keep the oldest copy", lambda p, info: _mtime(info)),
+    KEEP_NEWEST: ("Keep the newest copy", lambda p, info: (_mtime(info)[0], -_mtime(info)[1])),
+    KEEP_SHORTEST: ("Keep the copy with the shortest path", lambda p, info: len(p)),
+    KEEP_LONGEST: ("Keep the copy with the longest path", lambda p, info: -len(p)),
+    KEEP_DATED: ("Keep the copy filed under its capture date", _dated),
+}
+
+
+def _normalise_root(root) -> str:
+    root = os.path.normcase(os.path.abspath(str(root)))
+    return root if root.endswith(os.sep) else root + os.sep
+
+
+def _under(path: str, roots) -> int:
+    """Position of the first root holding the path, or -1."""
+    path = os.path.normcase(path)
+    for n, root in enumerate(roots):
+        if path.startswith(root):
+            return n
+    return -1
+
+
+def resolve_group(group, files: dict, keep: str = KEEP_OLDEST, prefer_roots=(), protected_roots=()):
+    """
+    Split a group into the copies to keep and the copies to remove.
+
+    Args:
+        group (list): paths of identical files
+        files (dict): per-file metadata (index meta["files"])
+        keep (str, optional): one of KEEP_RULES
+        prefer_roots (list, optional): normalised preferred folders, most preferred first
+        protected_roots (list, optional): normalised folders never touched
+
+    Returns:
+        tuple: (kept paths, removed paths)
+    """
+    paths = [str(p) for p in group]
+    protected = [p for p in paths if _under(p, protected_roots) >= 0]
+    if protected:
+        kept = set(protected)
+    else:
+        rule = KEEP_RULES[keep][1]
+        def rank(p):
+            preferred = _under(p, prefer_roots)
+            return (preferred < 0, preferred, rule(p, files.get(p)), p)
+        kept = {min(paths, key=rank)}
+    keep_list = [p for p in group if str(p) in kept]
+    remove_list = [p for p in group if str(p) not in kept]
+    return keep_list, remove_list
+
+
+def build_resolution(index: dict, meta: dict, keep: str = KEEP_OLDEST, prefer_roots=(), protected_roots=(),
+                     keys=None, cancel_flag=None, action: str = DELETE):
+    """
+    Build a dry-run resolution over the duplicate groups of an index.
+
+    Args:
+        index (dict): digest -> [paths]
+        meta (dict): index metadata (sizes and dates)
+        keep (str, optional): one of KEEP_RULES
+        prefer_roots (list, optional): preferred folders, most preferred first
+        protected_roots (list, optional): folders never touched
+        keys (iterable, optional): restrict to these groups, e.g. the rows shown in the table
+        cancel_flag (threading.Event, optional): stop early; returns None
+        action (str, optional): DELETE, or HARDLINK / REFLINK to link redundant copies to the kept one
+
+    Returns:
+        dict: {"plan": batch actions, "groups": [(digest, kept, removed, bytes reclaimed)],
+               "files": files removed, "bytes": bytes reclaimed}, or None if cancelled
+    """
+    files = meta.get("files", {}) if meta else {}
+    prefer = [_normalise_root(r) for r in prefer_roots]
+    protected = [_normalise_root(r) for r in protected_roots]
+    groups = []
+    items = []
+    total = 0
+    for n, digest in enumerate(index if keys is None else keys):
+        if cancel_flag is not None and n % 10000 == 0 and cancel_flag.is_set():
+            return None
+        group = index.get(digest, [])
+        if len(group) < 2:
+            continue
+        kept, removed = resolve_group(group, files, keep, prefer, protected)
+        if action != DELETE:
+            removed = [p for p in removed if not (files.get(str(p)) or {}).get("linked")]
+        if not removed:
+            continue
+        size = stats_for_group(meta, group)["size"] or 0
+        groups.append((digest, kept, removed, size * len(removed)))
+        items += [(digest, p, kept[0]) for p in removed]
+        total += size * len(removed)
+    if action == DELETE:
+        plan = plan_delete(((digest, p) for digest, p, _ in items), meta)
+    else:
+        plan = plan_link(items, action, meta)
+    return {"plan": plan, "groups": groups, "files": len(items), "bytes": total}
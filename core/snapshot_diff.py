@@ -0,0 +1,139 @@
+import json
+from pathlib import Path
+from core.csv_json_tools import load_dict_from_json
+
+"""
+Diff two saved scans of the same tree using sort-merge joins, streaming the categorised changes.
+
+Both snapshots are flattened into sorted (path, digest) lists and merged on path, which gives the
+modified files (same path, new digest).  The paths only in one snapshot are then re-sorted by digest
+and merged again, which pairs them up into moves/renames (same digest, new path); whatever is
+left is added or deleted.  Nothing is held in per-key dictionaries, only two flat sorted lists.
+"""
+
+ADDED = "added"
+DELETED = "deleted"
+MOVED = "moved"
+MODIFIED = "modified"
+
+CHANGES = (ADDED, DELETED, MOVED, MODIFIED)
+
+
+def _path_text(value) -> str:
+    # Saved paths are either plain strings or {"__type__": "Path", "value": ...} type hints
+    if isinstance(value, dict):
+        return str(value.get("value", ""))
+    return str(value)
+
+
+def iter_saved_index(file):
+    """
+    Stream (digest, path) pairs from a saved index without building the index dict.
+
+    Uses ijson when it is installed and falls back to load_dict_from_json otherwise.
+
+    Args:
+        file (str | Path): saved index (json)
+
+    Yields:
+        tuple: (digest, path string)
+    """
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+    if ijson is None:
+        for digest, paths in load_dict_from_json(file, use_type_hints=False).items():
+            for p in paths:
+                yield digest, _path_text(p)
+        return
+    with Path(file).open("rb") as f:
+        for digest, paths in ijson.kvitems(f, ""):
+            for p in paths:
+                yield digest, _path_text(p)
+
+
+def iter_index(index: dict):
+    """(digest, path string) pairs of an in-memory index."""
+    for digest, paths in index.items():
+        for p in paths:
+            yield digest, str(p)
+
+
+def diff_snapshots(old_pairs, new_pairs):
+    """
+    Generator of the changes between two snapshots.
+
+    Args:
+        old_pairs (iterable): (digest, path) pairs of the earlier scan
+        new_pairs (iterable): (digest, path) pairs of the later scan
+
+    Yields:
+        dict: {"change", "path", "old_path", "digest", "old_digest"} with change one of
+              added, deleted, moved, modified.  Missing sides are "".
+    """
+    old = sorted((p, d) for d, p in old_pairs)
+    new = sorted((p, d) for d, p in new_pairs)
+
+    # Merge join on path
+    old_only, new_only = [], []
+    i = j = 0
+    while i < len(old) and j < len(new):
+        (op, od), (np_, nd) = old[i], new[j]
+        if op == np_:
+            if od != nd:
+                yield {"change": MODIFIED, "path": np_, "old_path": op, "digest": nd, "old_digest": od}
+            i += 1
+            j += 1
+        elif op < np_:
+            old_only.append((od, op))
+            i += 1
+        else:
+            new_only.append((nd, np_))
+            j += 1
+    old_only.extend((d, p) for p, d in old[i:])
+    new_only.extend((d, p) for p, d in new[j:])
+    del old, new
+
+    # Merge join of the unmatched paths on digest
+    old_only.sort()
+    new_only.sort()
+    i = j = 0
+    while i < len(old_only) or j < len(new_only):
+        if j >= len(new_only) or (i < len(old_only) and old_only[i][0] < new_only[j][0]):
+            od, op = old_only[i]
+            yield {"change": DELETED, "path": "", "old_path": op, "digest": "", "old_digest": od}
+            i += 1
+        elif i >= len(old_only) or new_only[j][0] < old_only[i][0]:
+            nd, np_ = new_only[j]
+            yield {"change": ADDED, "path": np_, "old_path": "", "digest": nd, "old_digest": ""}
+            j += 1
+        else:
+            od, op = old_only[i]
+            nd, np_ = new_only[j]
+            yield {"change": MOVED, "path": np_, "old_path": op, "digest": nd, "old_digest": od}
+            i += 1
+            j += 1
+
+
+def diff_saved_indexes(old_file, new_file):
+    """Generator of the changes between two saved index files (see diff_snapshots)."""
+    return diff_snapshots(iter_saved_index(old_file), iter_saved_index(new_file))
+
+
+def write_ndjson(entries, file, cancel_flag=None) -> int:
+    """
+    Write diff entries (or any dicts) to a newline delimited json file as they are produced.
+
+    Returns:
+        int: number of entries written
+    """
+    count = 0
+    with Path(file).open("w", encoding="utf-8") as f:
+        for entry in entries:
+            if cancel_flag is not None and cancel_flag.is_set():
+                break
+            f.write(json.dumps(entry, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
@@ -0,0 +1,89 @@
+import csv
+import gzip
+from pathlib import Path
+from core.file_info import group_info
+
+"""
+CSV export of an index table straight from the index, one row per group: the info column texts
+followed by the group's paths.  Rows are generated lazily and written through csv.writer in
+batches, so memory stays flat and quoting is correct for any path.
+"""
+
+
+def iter_table_rows(index: dict, meta: dict, keys, info_columns, file_cols: int = None):
+    """
+    Table rows for the given keys of an index.
+
+    Args:
+        index (dict): digest -> [paths]
+        meta (dict): index metadata passed to the info columns
+        keys (iterable): row keys, in output order
+        info_columns (list): [(header, fn(key, group, info) -> (text, sort_key))]
+        file_cols (int, optional): number of path columns; rows are padded to it when given
+
+    Yields:
+        list[str]: cell texts
+    """
+    meta = meta or {}
+    for key in keys:
+        group = index.get(key)
+        if group is None:
+            continue
+        row = []
+        if info_columns:
+            info = group_info(meta, group)
+            row = [fn(key, group, info)[0] for _, fn in info_columns]
+        row += [str(p) for p in group]
+        if file_cols is not None and len(group) < file_cols:
+            row += [""] * (file_cols - len(group))
+        yield row
+
+
+def table_headers(info_columns, file_cols: int) -> list:
+    return [h for h, _ in info_columns] + [f"File {i+1}" for i in range(file_cols)]
+
+
+def write_csv_rows(rows, file, header=None, compress: bool = None, batch_size: int = 5000,
+                   cancel_flag=None, progress=None) -> int:
+    """
+    Stream rows to a CSV file.
+
+    Args:
+        rows (iterable): lists of cell values
+        file (str | Path): output file
+        header (list, optional): header row written first
+        compress (bool, optional): gzip the output. Defaults to True for a .gz file name.
+        batch_size (int, optional): rows per writerows() call and per progress report
+        cancel_flag (threading.Event, optional): stop early; the partial file is removed
+        progress (callable, optional): fn(rows written so far)
+
+    Returns:
+        int: rows written (excluding the header), or -1 if cancelled
+    """
+    filepath = Path(file)
+    if compress is None:
+        compress = filepath.suffix.lower() == ".gz"
+    opener = gzip.open if compress else open
+    count = 0
+    with opener(filepath, "wt", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(header)
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                if cancel_flag is not None and cancel_flag.is_set():
+                    break
+                writer.writerows(batch)
+                count += len(batch)
+                batch = []
+                if progress is not None:
+                    progress(count)
+        else:
+            writer.writerows(batch)
+            count += len(batch)
+    if cancel_flag is not None and cancel_flag.is_set():
+        filepath.unlink(missing_ok=True)
+        return -1
+    return count
@@ -0,0 +1,81 @@
+import ctypes
+import os
+import platform
+import sys
+import threading
+import time
+
+"""
+Helpers for running long background jobs (verification, batch hashing) without starving
+other workloads of disk and CPU: per-thread background priority and a simple byte rate limiter.
+"""
+
+# ioprio_set syscall numbers by machine, and the idle I/O class for a thread
+_IOPRIO_SET = {"x86_64": 251, "amd64": 251, "i386": 289, "i686": 289, "aarch64": 30, "arm64": 30}
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_IDLE = 3
+_IOPRIO_CLASS_SHIFT = 13
+
+_THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+_THREAD_MODE_BACKGROUND_END = 0x00020000
+
+
+def enter_background_priority() -> bool:
+    """
+    Lower the CPU and I/O priority of the calling thread only.
+
+    On Windows this uses the thread background mode (low I/O and memory priority); on Linux the
+    thread gets nice 19 and the idle I/O class. Best effort: failures leave the priority unchanged.
+
+    Returns:
+        bool: True if the priority was lowered
+    """
+    try:
+        if sys.platform.startswith("win"):
+            kernel32 = ctypes.windll.kernel32
+            return bool(kernel32.SetThreadPriority(kernel32.GetCurrentThread(), _THREAD_MODE_BACKGROUND_BEGIN))
+        if sys.platform.startswith("linux"):
+            tid = threading.get_native_id()
+            os.setpriority(os.PRIO_PROCESS, tid, 19)
+            number = _IOPRIO_SET.get(platform.machine().lower())
+            if number is not None:
+                libc = ctypes.CDLL(None, use_errno=True)
+                libc.syscall(number, _IOPRIO_WHO_PROCESS, tid, _IOPRIO_CLASS_IDLE << _IOPRIO_CLASS_SHIFT)
+            return True
+    except Exception:
+        pass
+    return False
+
+
+def leave_background_priority():
+    """Undo enter_background_priority where that is possible (Windows thread background mode)."""
+    try:
+        if sys.platform.startswith("win"):
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), _THREAD_MODE_BACKGROUND_END)
+    except Exception:
+        pass
+
+
+class RateLimiter:
+    """
+    Token bucket limiting the bytes per second read by a job.  A rate of 0 means unlimited.
+    Safe to share between threads.
+    """
+    def __init__(self, bytes_per_second: float = 0):
+        self.rate = bytes_per_second
+        self._lock = threading.Lock()
+        self._allowance = bytes_per_second
+        self._last = time.monotonic()
+
+    def consume(self, n: int):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._allowance = min(self.rate, self._allowance + (now - self._last) * self.rate)
+            self._last = now
+            self._allowance -= n
+            wait = -self._allowance / self.rate if self._allowance < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
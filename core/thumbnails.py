@@ -0,0 +1,208 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from PySide6.QtCore import QSize, Qt
+from PySide6.QtGui import QImage, QImageReader
+from core.app_paths import app_dir
+from core.exif import exif_thumbnail
+from core.file_info import EXIF_EXTENSIONS
+
+"""
+Thumbnail and preview service.
+
+Images are decoded straight to the requested size (QImageReader.setScaledSize lets the JPEG
+decoder skip most of the work) or taken from the embedded EXIF thumbnail when that is big enough,
+and never decoded at full resolution just to be shrunk.  Results are cached by content digest and
+size, in memory and in a size-bounded LRU folder on disk (~/.pman/thumbs), so a photo opens
+instantly from any of its duplicate paths and in later sessions.
+
+QImage (unlike QPixmap) is safe to use off the GUI thread, so the service can run in workers.
+"""
+
+# Requested sizes are rounded up to one of these so nearby window sizes share cache entries
+SIZE_STEPS = (128, 256, 512, 1024, 1600, 2048, 3072)
+
+
+def size_step(size: int) -> int:
+    for step in SIZE_STEPS:
+        if size <= step:
+            return step
+    return SIZE_STEPS[-1]
+
+
+def decode_scaled(path, max_edge: int, head: bytes = None) -> QImage:
+    """
+    Decode an image to fit in max_edge x max_edge, without a full resolution decode.
+
+    Args:
+        path (str | Path): image file
+        max_edge (int): longest edge of the result
+        head (bytes, optional): leading bytes of the file, checked for an EXIF thumbnail
+
+    Returns:
+        QImage: the scaled image, null if unreadable
+    """
+    path = Path(path)
+    if max_edge <= 160 and path.suffix.lower() in EXIF_EXTENSIONS:
+        if head is None:
+            with path.open("rb") as f:
+                head = f.read(65536)
+        data = exif_thumbnail(head)
+        if data:
+            image = QImage.fromData(data)
+            if not image.isNull() and max(image.width(), image.height()) >= max_edge:
+                return image.scaled(max_edge, max_edge, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    reader = QImageReader(str(path))
+    full = reader.size()
+    if full.isValid() and max(full.width(), full.height()) > max_edge:
+        reader.setScaledSize(full.scaled(QSize(max_edge, max_edge), Qt.KeepAspectRatio))
+    image = reader.read()
+    if not image.isNull() and max(image.width(), image.height()) > max_edge:
+        image = image.scaled(max_edge, max_edge, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image
+
+
+class ThumbnailCache:
+    """
+    Memory + disk LRU cache of scaled images keyed by (content digest, size step).
+
+    Args:
+        folder (Path, optional): cache folder. Defaults to ~/.pman/thumbs.
+        max_disk_bytes (int, optional): disk budget; least recently used files are removed beyond it
+        memory_items (int, optional): images kept in memory
+    """
+    def __init__(self, folder=None, max_disk_bytes: int = 512 * 1024 * 1024, memory_items: int = 64):
+        self.folder = Path(folder) if folder else app_dir("thumbs")
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_items = memory_items
+        self._memory = OrderedDict()
+        self._disk_bytes = None     # measured on first store
+        self._lock = threading.Lock()
+        self._loading = {}          # key: lock held while one thread loads it, so it is decoded once
+
+    def _file_for(self, digest: str, step: int, alpha: bool = False) -> Path:
+        # JPEG unless the image has transparency to keep
+        return self.folder / digest[:2] / f"{digest}_{step}.{'png' if alpha else 'jpg'}"
+
+    def get(self, path, max_edge: int, digest: str = None) -> QImage:
+        """
+        A scaled image of path fitting in max_edge, from the cache when the digest is known.
+
+        Returns:
+            QImage: scaled to max_edge (null if unreadable)
+        """
+        if not digest:
+            return decode_scaled(path, max_edge)
+        step = size_step(max_edge)
+        key = (digest, step)
+        image = self._recall(key)
+        if image is None:
+            with self._lock:
+                key_lock = self._loading.setdefault(key, threading.Lock())
+            with key_lock:
+                # Another thread may have loaded it while this one waited
+                image = self._recall(key)
+                if image is None:
+                    image = self._load(path, key)
+            with self._lock:
+                self._loading.pop(key, None)
+            if image.isNull():
+                return image
+        if max(image.width(), image.height()) > max_edge:
+            return image.scaled(max_edge, max_edge, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        return image
+
+    def _recall(self, key):
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+            return image
+
+    def _load(self, path, key) -> QImage:
+        # From the disk cache, else decoded and stored; remembered in memory unless unreadable
+        digest, step = key
+        image = None
+        for cached in (self._file_for(digest, step), self._file_for(digest, step, True)):
+            if cached.exists():
+                image = QImage(str(cached))
+                try:
+                    os.utime(cached)    # mark as recently used
+                except OSError:
+                    pass
+                break
+        if image is None or image.isNull():
+            image = decode_scaled(path, step)
+            if image.isNull():
+                return image
+            self._store(self._file_for(digest, step, image.hasAlphaChannel()), image)
+        self._remember(key, image)
+        return image
+
+    def in_memory(self, digest: str, max_edge: int) -> bool:
+        """True when get() would be answered from memory, without touching the disk."""
+        with self._lock:
+            return (digest, size_step(max_edge)) in self._memory
+
+    def _remember(self, key, image: QImage):
+        with self._lock:
+            self._memory[key] = image
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _store(self, file: Path, image: QImage):
+        # A temp file of its own per call, so writers never share one; the disk copy is only a cache,
+        # so failing to write it is not an error
+        file.parent.mkdir(parents=True, exist_ok=True)
+        handle, temp = tempfile.mkstemp(dir=file.parent, prefix=file.name, suffix=".tmp")
+        os.close(handle)
+        try:
+            if not image.save(temp, file.suffix[1:].upper(), 90):
+                raise OSError("could not write " + temp)
+            os.replace(temp, file)
+        except OSError:
+            try:
+                os.unlink(temp)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(f.stat().st_size for f in self._cached_files())
+            else:
+                self._disk_bytes += file.stat().st_size
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict()
+
+    def _cached_files(self):
+        return [f for f in self.folder.glob("*/*") if f.suffix in (".jpg", ".png")]
+
+    def _evict(self):
+        # Drop least recently used files until a tenth under budget
+        files = sorted(self._cached_files(), key=lambda f: f.stat().st_mtime)
+        target = self.max_disk_bytes * 0.9
+        total = sum(f.stat().st_size for f in files)
+        for f in files:
+            if total <= target:
+                break
+            try:
+                size = f.stat().st_size
+                f.unlink()
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+
+_shared = None
+
+
+def shared_cache() -> ThumbnailCache:
+    """The application wide thumbnail cache."""
+    global _shared
+    if _shared is None:
+        _shared = ThumbnailCache()
+    return _shared
@@ -16,9 +16,10 @@ class ClickableImageLabel(QLabel):
         
     def clear_face_regions(self):
         self.face_regions = []
+        self.selected_index = -1
         
-    def add_face_region(self, rect):
-        self.face_regions.append(FaceRegion(rect))
+    def add_face_region(self, rect, name=""):
+        self.face_regions.append(FaceRegion(rect, name))
 
     def mousePressEvent(self, event):
         click_pos = self._adjusted_mouse_pos(event.pos())
@@ -1,11 +1,10 @@
-
-from PySide6.QtWidgets import QTableWidget, QApplication, QAbstractItemView
+from PySide6.QtWidgets import QTableView, QApplication, QAbstractItemView
 from PySide6.QtGui import QMouseEvent
-from PySide6.QtCore import QMimeData, QUrl, Qt
-from PySide6.QtGui import QDrag,  QBrush, QColor
+from PySide6.QtCore import QMimeData, QUrl, Qt, QPersistentModelIndex
+from PySide6.QtGui import QDrag
 from pathlib import Path
 
-class DraggableTableWidget(QTableWidget):
+class DraggableTableView(QTableView):
     def __init__(self, parent=None):
         super().__init__(parent)
         
@@ -17,21 +16,23 @@ class DraggableTableWidget(QTableWidget):
         self.setDragDropMode(QAbstractItemView.DragOnly)
 
         self._drag_start_pos = None
+        self._dragged_indexes = []
 
  
 
-    def startDrag(self):
-        selected_items = self.selectedItems()
-        if not selected_items:
+    def startDrag(self, supported_actions=Qt.CopyAction):
+        selected = self.selectedIndexes()
+        if not selected:
             return
 
+        model = self.model()
         file_paths = []
-        self._dragged_items = []
-        for item in selected_items:
-            path = Path(item.text())
-            if path.exists():
+        self._dragged_indexes = []
+        for index in selected:
+            path = model.path_at(index)
+            if path is not None and path.exists():
                 file_paths.append(QUrl.fromLocalFile(str(path)))
-                self._dragged_items.append((item.row(), item.column()))
+                self._dragged_indexes.append(QPersistentModelIndex(index))
 
 
         if not file_paths:
@@ -64,13 +65,7 @@ class DraggableTableWidget(QTableWidget):
         self.startDrag()
 
     def mark_items_as_dropped(self):
-        for row, col in self._dragged_items:
-            item = self.item(row, col)
-            if item:
-                item.setBackground(QBrush(QColor("#d0f0c0")))  # Light green
-                item.setData(Qt.UserRole + 1, "copied")
+        self.model().set_copied(self._dragged_indexes, True)
     
-    def restore_item_state(self, item):
-        item.setBackground(QBrush(Qt.white))
-        item.setData(Qt.UserRole + 1, None)
-
+    def restore_item_state(self, index):
+        self.model().set_copied([index], False)
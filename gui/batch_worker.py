@@ -0,0 +1,57 @@
+from PySide6.QtCore import QObject, QRunnable, Signal, Slot
+from collections import Counter
+import time
+from core.batch_actions import run_batch, undo_batch
+
+
+class BatchSignals(QObject):
+    progress = Signal(int, int)          # Emit (actions finished, total actions)
+    results = Signal(list)               # Emit a batch of action results for incremental index updates
+    finished = Signal(dict)              # Emit counts per status
+    error = Signal(str)                  # Emit error message
+    cancelled = Signal()                 # Emit if cancelled
+
+
+class BatchWorker(QRunnable):
+    """
+    Carry out a batch action plan (or undo a journalled batch), passing results back to the GUI
+    in chunks so the index and table can be updated as the batch runs.
+    """
+    def __init__(self, plan: list, cancel_flag, batch_id: str = None, undo_journal=None,
+                 max_workers: int = 4, interval: float = 0.25):
+        super().__init__()
+        self.plan = plan
+        self.cancel_flag = cancel_flag
+        self.batch_id = batch_id
+        self.undo_journal = undo_journal
+        self.max_workers = max_workers
+        self.interval = interval
+        self.signals = BatchSignals()
+
+    @Slot()
+    def run(self):
+        try:
+            if self.undo_journal is not None:
+                results = undo_batch(self.undo_journal, self.max_workers, self.cancel_flag)
+                total = 0
+            else:
+                results = run_batch(self.plan, self.batch_id, self.max_workers, self.cancel_flag)
+                total = len(self.plan)
+            counts = Counter()
+            chunk = []
+            last = time.monotonic()
+            for result in results:
+                counts[result["status"]] += 1
+                chunk.append(result)
+                if time.monotonic() - last >= self.interval:
+                    self.signals.results.emit(chunk)
+                    self.signals.progress.emit(sum(counts.values()), total)
+                    chunk = []
+                    last = time.monotonic()
+            if chunk:
+                self.signals.results.emit(chunk)
+            if self.cancel_flag.is_set():
+                self.signals.cancelled.emit()
+            self.signals.finished.emit(dict(counts))
+        except Exception as e:
+            self.signals.error.emit(str(e))
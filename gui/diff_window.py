@@ -0,0 +1,114 @@
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QComboBox,
+    QTableWidget, QTableWidgetItem, QFileDialog, QAbstractItemView
+)
+from PySide6.QtCore import Qt, QThreadPool
+from pathlib import Path
+import threading
+from core.snapshot_diff import CHANGES
+from gui.diff_worker import DiffWorker
+
+
+class SnapshotDiffWindow(QDialog):
+    """Shows what changed between two saved scans of the same tree."""
+    def __init__(self, parent=None, old_file=None, new_file=None):
+        super().__init__(parent)
+        self.old_file = old_file
+        self.new_file = new_file
+        self.threadpool = QThreadPool.globalInstance()
+        self.cancel_flag = threading.Event()
+        self.setWindowTitle("Snapshot Diff")
+        self.resize(1000, 600)
+
+        self.summary = QLabel(f"Comparing {Path(old_file).name} -> {Path(new_file).name}")
+
+        self.change_filter = QComboBox()
+        self.change_filter.addItem("All Changes", "")
+        for change in CHANGES:
+            self.change_filter.addItem(change.capitalize(), change)
+        self.change_filter.currentIndexChanged.connect(self.apply_filter)
+
+        self.save_button = QPushButton("Save as NDJSON")
+        self.save_button.clicked.connect(self.save_ndjson)
+
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_flag.set)
+
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(["Change", "Old Path", "New Path", "Digest"])
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+        controls = QHBoxLayout()
+        controls.addWidget(self.change_filter)
+        controls.addStretch()
+        controls.addWidget(self.save_button)
+        controls.addWidget(self.cancel_button)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.summary)
+        layout.addLayout(controls)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+
+        self.start_diff()
+
+    def start_diff(self, ndjson_file=None):
+        # One run at a time: the runs share the cancel flag, so Save waits for the running diff to end
+        self.save_button.setEnabled(False)
+        self.cancel_flag.clear()
+        self.ndjson_file = ndjson_file
+        worker = DiffWorker(self.old_file, self.new_file, self.cancel_flag, ndjson_file)
+        if ndjson_file is None:
+            worker.signals.batch.connect(self.add_entries)
+        worker.signals.finished.connect(self.diff_finished)
+        worker.signals.error.connect(self.show_error)
+        worker.signals.cancelled.connect(self.diff_cancelled)
+        self.threadpool.start(worker)
+
+    def add_entries(self, entries):
+        self.table.setSortingEnabled(False)
+        row = self.table.rowCount()
+        self.table.setRowCount(row + len(entries))
+        selected = self.change_filter.currentData()
+        for entry in entries:
+            values = (entry["change"], entry["old_path"], entry["path"], entry["digest"] or entry["old_digest"])
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
+                self.table.setItem(row, col, item)
+            self.table.setRowHidden(row, bool(selected) and entry["change"] != selected)
+            row += 1
+        self.table.setSortingEnabled(True)
+
+    def apply_filter(self):
+        selected = self.change_filter.currentData()
+        for row in range(self.table.rowCount()):
+            item = self.table.item(row, 0)
+            self.table.setRowHidden(row, bool(selected) and item is not None and item.text() != selected)
+
+    def diff_finished(self, counts):
+        text = ", ".join(f"{counts.get(change, 0)} {change}" for change in CHANGES)
+        if self.ndjson_file:
+            text += f" - saved to {self.ndjson_file}"
+        self.summary.setText(f"{Path(self.old_file).name} -> {Path(self.new_file).name}: {text}")
+        if self.ndjson_file is None:
+            self.table.resizeColumnsToContents()
+        self.save_button.setEnabled(True)
+
+    def show_error(self, msg):
+        self.summary.setText(f"Error: {msg}")
+        self.save_button.setEnabled(True)
+
+    def diff_cancelled(self):
+        self.summary.setText("Diff cancelled.")
+        self.save_button.setEnabled(True)
+
+    def save_ndjson(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Diff", "", "NDJSON Files (*.ndjson)")
+        if path:
+            self.summary.setText(f"Writing {path}...")
+            self.start_diff(path)
+
+    def closeEvent(self, event):
+        self.cancel_flag.set()
+        super().closeEvent(event)
@@ -0,0 +1,52 @@
+from PySide6.QtCore import QObject, QRunnable, Signal, Slot
+from collections import Counter
+from core.snapshot_diff import diff_saved_indexes, write_ndjson
+
+
+class DiffSignals(QObject):
+    batch = Signal(list)                 # Emit a batch of diff entries for display
+    finished = Signal(dict)              # Emit counts per change type
+    error = Signal(str)                  # Emit error message
+    cancelled = Signal()                 # Emit if cancelled
+
+
+class DiffWorker(QRunnable):
+    """Diff two saved scans, streaming the changes to the GUI in batches or straight to NDJSON."""
+    def __init__(self, old_file, new_file, cancel_flag, ndjson_file=None, batch_size: int = 2000):
+        super().__init__()
+        self.old_file = old_file
+        self.new_file = new_file
+        self.cancel_flag = cancel_flag
+        self.ndjson_file = ndjson_file
+        self.batch_size = batch_size
+        self.signals = DiffSignals()
+
+    def counted(self, entries, counts):
+        for entry in entries:
+            counts[entry["change"]] += 1
+            yield entry
+
+    @Slot()
+    def run(self):
+        try:
+            counts = Counter()
+            entries = self.counted(diff_saved_indexes(self.old_file, self.new_file), counts)
+            if self.ndjson_file:
+                write_ndjson(entries, self.ndjson_file, self.cancel_flag)
+            else:
+                batch = []
+                for entry in entries:
+                    if self.cancel_flag.is_set():
+                        break
+                    batch.append(entry)
+                    if len(batch) >= self.batch_size:
+                        self.signals.batch.emit(batch)
+                        batch = []
+                if batch:
+                    self.signals.batch.emit(batch)
+            if self.cancel_flag.is_set():
+                self.signals.cancelled.emit()
+                return
+            self.signals.finished.emit(dict(counts))
+        except Exception as e:
+            self.signals.error.emit(str(e))
@@ -0,0 +1,108 @@
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QComboBox,
+    QTableWidget, QTableWidgetItem, QAbstractItemView
+)
+from PySide6.QtCore import Qt, QThreadPool, Signal
+import threading
+from core.file_info import format_size
+from core.dir_hashes import IDENTICAL, SAME_CONTENT, PARTIAL, plan_folder_dedupe
+from gui.dir_report_worker import DirReportWorker
+
+REPORT_ROWS = 5000
+
+
+class DirReportWindow(QDialog):
+    """
+    Fully and partially duplicated folders of an index, largest waste first.  A row can be
+    resolved in one go: the first folder is kept and its content is trashed from the others.
+    """
+    plan_ready = Signal(list)            # Emit a batch plan for the main window to carry out
+
+    def __init__(self, parent=None, index: dict = None, meta: dict = None):
+        super().__init__(parent)
+        self.index = index or {}
+        self.meta = meta if meta is not None else {}
+        self.report = []
+        self.threadpool = QThreadPool.globalInstance()
+        self.cancel_flag = threading.Event()
+        self.setWindowTitle("Duplicate Folders")
+        self.resize(1000, 600)
+
+        self.summary = QLabel("Hashing folders...")
+
+        self.kind_filter = QComboBox()
+        self.kind_filter.addItem("All Folders", "")
+        for kind in (IDENTICAL, SAME_CONTENT, PARTIAL):
+            self.kind_filter.addItem(kind.capitalize(), kind)
+        self.kind_filter.currentIndexChanged.connect(self.apply_filter)
+
+        self.resolve_button = QPushButton("Keep First Folder, Trash Its Copies")
+        self.resolve_button.setToolTip("Only files that also exist under the first folder are trashed")
+        self.resolve_button.clicked.connect(self.resolve_selected)
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["Kind", "Folders", "Files", "Size", "Wasted"])
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+
+        controls = QHBoxLayout()
+        controls.addWidget(self.kind_filter)
+        controls.addStretch()
+        controls.addWidget(self.resolve_button)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.summary)
+        layout.addLayout(controls)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+
+        self.start_report()
+
+    def start_report(self):
+        worker = DirReportWorker(self.index, self.meta, self.cancel_flag)
+        worker.signals.finished.connect(self.show_report)
+        worker.signals.error.connect(self.show_error)
+        self.threadpool.start(worker)
+
+    def show_report(self, dirs, report):
+        self.meta.setdefault("dirs", dirs)
+        self.report = report[:REPORT_ROWS]
+        self.table.setRowCount(len(self.report))
+        for row, entry in enumerate(self.report):
+            values = (
+                entry["kind"], "\n".join(entry["dirs"]), str(entry["files"]),
+                format_size(entry["size"]), format_size(entry["wasted"]),
+            )
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
+                self.table.setItem(row, col, item)
+        self.table.resizeColumnsToContents()
+        self.table.resizeRowsToContents()
+        wasted = sum(entry["wasted"] for entry in report if entry["kind"] != PARTIAL)
+        text = f"{len(report)} duplicated folder sets, {format_size(wasted)} in duplicated subtrees"
+        if len(report) > REPORT_ROWS:
+            text += f" (showing the first {REPORT_ROWS})"
+        self.summary.setText(text)
+        self.apply_filter()
+
+    def apply_filter(self):
+        selected = self.kind_filter.currentData()
+        for row, entry in enumerate(self.report):
+            self.table.setRowHidden(row, bool(selected) and entry["kind"] != selected)
+
+    def show_error(self, msg):
+        self.summary.setText(f"Error: {msg}")
+
+    def resolve_selected(self):
+        rows = sorted({index.row() for index in self.table.selectedIndexes()})
+        plan = []
+        for row in rows:
+            keep, *others = self.report[row]["dirs"]
+            plan += plan_folder_dedupe(self.index, self.meta, keep, others)
+        if plan:
+            self.plan_ready.emit(plan)
+
+    def done(self, result):
+        self.cancel_flag.set()
+        super().done(result)
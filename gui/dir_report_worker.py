@@ -0,0 +1,34 @@
+from PySide6.QtCore import QObject, QRunnable, Signal, Slot
+from core.dir_hashes import compute_dir_hashes, duplicate_subtrees, partial_duplicates
+
+
+class DirReportSignals(QObject):
+    finished = Signal(dict, list)        # Emit (folder hashes, report rows)
+    error = Signal(str)                  # Emit error message
+
+
+class DirReportWorker(QRunnable):
+    """Find duplicated folders, hashing the folders of the index first if the metadata has none."""
+    def __init__(self, index: dict, meta: dict, cancel_flag, min_ratio: float = 0.5):
+        super().__init__()
+        self.index = index
+        self.meta = meta
+        self.cancel_flag = cancel_flag
+        self.min_ratio = min_ratio
+        self.signals = DirReportSignals()
+
+    @Slot()
+    def run(self):
+        try:
+            dirs = self.meta.get("dirs")
+            if dirs is None:
+                dirs = compute_dir_hashes(self.index, self.meta, self.cancel_flag)
+                if dirs is None:
+                    return
+            report = duplicate_subtrees(dirs)
+            partial = partial_duplicates(self.index, self.meta, dirs, self.min_ratio, cancel_flag=self.cancel_flag)
+            if partial is None:
+                return
+            self.signals.finished.emit(dirs, report + partial)
+        except Exception as e:
+            self.signals.error.emit(str(e))
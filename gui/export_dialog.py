@@ -0,0 +1,40 @@
+from PySide6.QtWidgets import (
+    QDialog, QFormLayout, QComboBox, QCheckBox, QDialogButtonBox
+)
+
+ALL_ROWS = "all"
+FILTERED_ROWS = "filtered"
+SELECTED_ROWS = "selected"
+
+
+class ExportOptionsDialog(QDialog):
+    """Options for exporting the table to CSV."""
+    def __init__(self, parent=None, has_selection: bool = False):
+        super().__init__(parent)
+        self.setWindowTitle("Export Table to CSV")
+
+        self.scope = QComboBox()
+        self.scope.addItem("All rows of the index", ALL_ROWS)
+        self.scope.addItem("Rows shown in the table", FILTERED_ROWS)
+        if has_selection:
+            self.scope.addItem("Selected rows", SELECTED_ROWS)
+        self.scope.setCurrentIndex(1)
+
+        self.compress = QCheckBox("Compress with gzip (.csv.gz)")
+        self.compress.setChecked(False)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QFormLayout()
+        layout.addRow("Export", self.scope)
+        layout.addRow(self.compress)
+        layout.addRow(buttons)
+        self.setLayout(layout)
+
+    def options(self) -> dict:
+        return {
+            "scope": self.scope.currentData(),
+            "compress": self.compress.isChecked(),
+        }
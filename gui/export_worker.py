@@ -0,0 +1,43 @@
+from PySide6.QtCore import QObject, QRunnable, Signal, Slot
+from core.table_export import iter_table_rows, table_headers, write_csv_rows
+
+
+class ExportSignals(QObject):
+    progress = Signal(int, int)          # Emit (rows written, total rows)
+    finished = Signal(int)               # Emit rows written
+    error = Signal(str)                  # Emit error message
+    cancelled = Signal()                 # Emit if cancelled
+
+
+class ExportWorker(QRunnable):
+    """Stream table rows from an index to a (optionally gzipped) CSV file."""
+    def __init__(self, index: dict, meta: dict, keys: list, info_columns, file_cols: int,
+                 file, cancel_flag, compress: bool = False):
+        super().__init__()
+        self.index = index
+        self.meta = meta
+        self.keys = keys
+        self.info_columns = info_columns
+        self.file_cols = file_cols
+        self.file = file
+        self.cancel_flag = cancel_flag
+        self.compress = compress
+        self.signals = ExportSignals()
+
+    def report(self, written):
+        self.signals.progress.emit(written, len(self.keys))
+
+    @Slot()
+    def run(self):
+        try:
+            rows = iter_table_rows(self.index, self.meta, self.keys, self.info_columns, self.file_cols)
+            written = write_csv_rows(
+                rows, self.file, table_headers(self.info_columns, self.file_cols),
+                self.compress, cancel_flag=self.cancel_flag, progress=self.report
+            )
+            if written < 0:
+                self.signals.cancelled.emit()
+                return
+            self.signals.finished.emit(written)
+        except Exception as e:
+            self.signals.error.emit(str(e))
@@ -0,0 +1,53 @@
+from PySide6.QtCore import QObject, QRunnable, Signal, Slot
+import time
+from core.face_batch import load_face_records, pending_images, run_face_batch
+
+
+class FaceBatchSignals(QObject):
+    progress = Signal(int, int, int)     # Emit (images processed, images to process, faces found)
+    finished = Signal(dict)              # Emit {"images", "faces", "errors", "skipped"}
+    error = Signal(str)                  # Emit error message
+    cancelled = Signal()                 # Emit if cancelled
+
+
+class FaceBatchWorker(QRunnable):
+    """
+    Detect faces in every image of an index not yet in the face store, on a process pool.
+    Images that could not be read last time (a drive unplugged, a file locked) are tried again.
+    Only coordinates the pool, so it can share the global thread pool.
+    """
+    def __init__(self, index: dict, meta: dict, cancel_flag, max_workers: int = None,
+                 model: str = "hog", upsample: int = 1, max_edge: int = None, interval: float = 0.5):
+        super().__init__()
+        # Snapshot so the GUI can keep editing the index during a long run
+        self.index = {digest: list(paths[:1]) for digest, paths in index.items()}
+        self.meta = meta
+        self.cancel_flag = cancel_flag
+        self.max_workers = max_workers
+        self.model = model
+        self.upsample = upsample
+        self.max_edge = max_edge
+        self.interval = interval
+        self.signals = FaceBatchSignals()
+
+    @Slot()
+    def run(self):
+        try:
+            done = {digest for digest, record in load_face_records().items() if "error" not in record}
+            items = pending_images(self.index, self.meta, done)
+            counts = {"images": 0, "faces": 0, "errors": 0, "skipped": len(done & self.index.keys())}
+            last = time.monotonic()
+            self.signals.progress.emit(0, len(items), 0)
+            for record in run_face_batch(items, max_workers=self.max_workers, cancel_flag=self.cancel_flag,
+                                         model=self.model, upsample=self.upsample, max_edge=self.max_edge):
+                counts["images"] += 1
+                counts["faces"] += len(record.get("faces", ()))
+                counts["errors"] += "error" in record
+                if time.monotonic() - last >= self.interval:
+                    self.signals.progress.emit(counts["images"], len(items), counts["faces"])
+                    last = time.monotonic()
+            if self.cancel_flag.is_set():
+                self.signals.cancelled.emit()
+            self.signals.finished.emit(counts)
+        except Exception as e:
+            self.signals.error.emit(str(e))
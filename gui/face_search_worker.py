@@ -0,0 +1,125 @@
+from PySide6.QtCore import QObject, QRunnable, Signal, Slot
+from core.face_index import load_face_index, TOLERANCE, CLUSTER_TOLERANCE
+from core.face_tags import face_index_names
+
+
+class FaceSearchSignals(QObject):
+    finished = Signal(list)              # Emit digests of the photos showing the person
+    error = Signal(str)                  # Emit error message
+
+
+class FaceSearchWorker(QRunnable):
+    """
+    Find every photo of the person whose face is nearest a point of a photo, using the face store.
+
+    Args:
+        digest (str): photo holding the face
+        x (float), y (float): point on the face as fractions of the image size
+    """
+    def __init__(self, digest: str, x: float, y: float, tolerance: float = TOLERANCE):
+        super().__init__()
+        self.digest = digest
+        self.x = x
+        self.y = y
+        self.tolerance = tolerance
+        self.signals = FaceSearchSignals()
+
+    @Slot()
+    def run(self):
+        try:
+            index = load_face_index()
+            row = index.face_at(self.digest, self.x, self.y)
+            if row is None:
+                self.signals.error.emit(
+                    "This photo is not in the face store yet. Run Tools > Detect Faces in Master first."
+                )
+                return
+            self.signals.finished.emit(sorted(index.photos_of(index.encodings[row], self.tolerance)))
+        except Exception as e:
+            self.signals.error.emit(str(e))
+
+
+class NameSuggestSignals(QObject):
+    finished = Signal(str, str)          # Emit (digest, suggested name or "")
+
+
+class NameSuggestWorker(QRunnable):
+    """
+    Suggest a name for a face from the closest tagged faces of the same person elsewhere.
+
+    Args:
+        digest (str): photo holding the face
+        x (float), y (float): point on the face as fractions of the image size
+        named_regions (dict): snapshot of FaceTagStore.named_regions()
+    """
+    def __init__(self, digest: str, x: float, y: float, named_regions: dict, tolerance: float = TOLERANCE):
+        super().__init__()
+        self.digest = digest
+        self.x = x
+        self.y = y
+        self.named_regions = named_regions
+        self.tolerance = tolerance
+        self.signals = NameSuggestSignals()
+
+    @Slot()
+    def run(self):
+        name = ""
+        try:
+            index = load_face_index()
+            row = index.face_at(self.digest, self.x, self.y)
+            if row is not None and self.named_regions:
+                names = face_index_names(index, self.named_regions)
+                for other, _ in index.nearest(index.encodings[row], k=20, tolerance=self.tolerance)[0]:
+                    if other != row and index.keys[other] in names:
+                        name = names[index.keys[other]]
+                        break
+        except Exception:
+            name = ""   # a suggestion is optional; tagging works without one
+        self.signals.finished.emit(self.digest, name)
+
+
+class NameProposalSignals(QObject):
+    finished = Signal(dict)              # Emit {name: [(digest, rect as fractions, share)]}
+    error = Signal(str)                  # Emit error message
+
+
+class NameProposalWorker(QRunnable):
+    """
+    Cluster every face of the face store by person and propose names for the untagged faces of the
+    clusters whose tagged faces mostly agree on a name.
+
+    Args:
+        named_regions (dict): snapshot of FaceTagStore.named_regions()
+        cancel_flag (threading.Event, optional): stop early
+    """
+    def __init__(self, named_regions: dict, cancel_flag=None, tolerance: float = CLUSTER_TOLERANCE):
+        super().__init__()
+        self.named_regions = named_regions
+        self.cancel_flag = cancel_flag
+        self.tolerance = tolerance
+        self.signals = NameProposalSignals()
+
+    @Slot()
+    def run(self):
+        try:
+            index = load_face_index()
+            if not len(index):
+                self.signals.error.emit("The face store is empty. Run Tools > Detect Faces in Master first.")
+                return
+            names = face_index_names(index, self.named_regions)
+            if not names:
+                self.signals.error.emit("Tag and name some faces first; names are proposed from them.")
+                return
+            labels = index.cluster(self.tolerance, cancel_flag=self.cancel_flag)
+            if labels is None:
+                return
+            proposals = {}
+            proposed = index.propose_names(labels, names)
+            for row, key in enumerate(index.keys):
+                if key in proposed:
+                    name, share = proposed[key]
+                    top, right, bottom, left = index.boxes[row]
+                    proposals.setdefault(name, []).append((key[0], (left, top, right - left, bottom - top), share))
+            self.signals.finished.emit(proposals)
+        except Exception as e:
+            self.signals.error.emit(str(e))
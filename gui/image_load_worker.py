@@ -0,0 +1,115 @@
+from PySide6.QtCore import QObject, QRunnable, Signal, Slot
+from PySide6.QtGui import QImage
+from pathlib import Path
+from core.file_info import EXIF_EXTENSIONS, indexed_digest
+from core.index_verify import hash_file_throttled
+from core.thumbnails import decode_scaled, shared_cache
+
+PREVIEW_EDGE = 128
+
+
+class ImageLoadSignals(QObject):
+    preview = Signal(str, QImage)        # Emit (path, quick low resolution image)
+    loaded = Signal(str, str, QImage)    # Emit (path, digest, image at display size)
+    error = Signal(str, str)             # Emit (path, error message)
+
+
+class ImageLoadWorker(QRunnable):
+    """
+    Load an image for display off the GUI thread: a quick preview first (the EXIF thumbnail where
+    there is one), then the image at display size from the thumbnail cache.  The digest is taken
+    from the given indexes when they hold the file, and only hashed otherwise.
+
+    Args:
+        path (str): image file
+        max_edge (int): longest edge of the displayed image
+        digest (str, optional): known digest of the file
+        indexes (list, optional): (index, meta) pairs to look the digest up in
+        cancel_flag (threading.Event, optional): stop early
+    """
+    def __init__(self, path: str, max_edge: int, digest: str = None, indexes=(), cancel_flag=None):
+        super().__init__()
+        self.path = str(path)
+        self.max_edge = max_edge
+        self.digest = digest
+        self.indexes = list(indexes)
+        self.cancel_flag = cancel_flag
+        self.signals = ImageLoadSignals()
+
+    def cancelled(self) -> bool:
+        return self.cancel_flag is not None and self.cancel_flag.is_set()
+
+    def find_digest(self) -> str:
+        for index, meta in self.indexes:
+            try:
+                digest = indexed_digest(index, meta, self.path)
+            except RuntimeError:
+                continue    # index edited while looking; hash the file instead
+            if digest:
+                return digest
+        return hash_file_throttled(self.path, cancel_flag=self.cancel_flag)
+
+    @Slot()
+    def run(self):
+        try:
+            # JPEG and friends give a preview almost for free; other types would cost a full decode.
+            # A prefetched image needs no preview at all.
+            prefetched = self.digest and shared_cache().in_memory(self.digest, self.max_edge)
+            if not prefetched and Path(self.path).suffix.lower() in EXIF_EXTENSIONS:
+                preview = decode_scaled(self.path, PREVIEW_EDGE)
+                if self.cancelled():
+                    return
+                if not preview.isNull():
+                    self.signals.preview.emit(self.path, preview)
+            digest = self.digest or self.find_digest()
+            if digest is None or self.cancelled():
+                return
+            image = shared_cache().get(self.path, self.max_edge, digest)
+            if self.cancelled():
+                return
+            if image.isNull():
+                self.signals.error.emit(self.path, "Could not read the image")
+            else:
+                self.signals.loaded.emit(self.path, digest, image)
+        except Exception as e:
+            self.signals.error.emit(self.path, str(e))
+
+
+class ImagePrefetchWorker(QRunnable):
+    """
+    Warm the thumbnail cache with the images the viewer is likely to show next, so stepping
+    through them finds each one already decoded at display size.  Files whose digest is not in
+    the given indexes are skipped rather than hashed.
+
+    Args:
+        items (list): (digest, path) pairs, most wanted first
+        max_edge (int): longest edge of the displayed image
+        indexes (list, optional): (index, meta) pairs to look missing digests up in
+        cancel_flag (threading.Event, optional): stop early, e.g. when the viewer moves on
+    """
+    def __init__(self, items, max_edge: int, indexes=(), cancel_flag=None):
+        super().__init__()
+        self.items = list(items)
+        self.max_edge = max_edge
+        self.indexes = list(indexes)
+        self.cancel_flag = cancel_flag
+
+    @Slot()
+    def run(self):
+        cache = shared_cache()
+        for digest, path in self.items:
+            if self.cancel_flag is not None and self.cancel_flag.is_set():
+                return
+            for index, meta in self.indexes:
+                if digest:
+                    break
+                try:
+                    digest = indexed_digest(index, meta, str(path))
+                except RuntimeError:
+                    pass
+            if not digest or cache.in_memory(digest, self.max_edge):
+                continue
+            try:
+                cache.get(path, self.max_edge, digest)
+            except Exception:
+                pass    # the viewer reports unreadable files when it gets to them
@@ -1,21 +1,47 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QLineEdit, QLabel, QDialog, QFileDialog
+    QLineEdit, QLabel, QDialog, QFileDialog, QMessageBox, QComboBox, QSpinBox, QCheckBox
 )
 from PySide6.QtGui import QPixmap, QDragEnterEvent, QDropEvent, QPainter, QPen, QColor
-from PySide6.QtCore import Qt, QRect, QPoint
+from PySide6.QtCore import Qt, QRect, QPoint, QThreadPool, Signal
 from gui.ClickableImageLabel import ClickableImageLabel
+from gui.image_load_worker import ImageLoadWorker, ImagePrefetchWorker
+from gui.face_search_worker import FaceSearchWorker, NameSuggestWorker
+from core.face_tags import shared_tag_store
+from core.file_info import IMAGE_EXTENSIONS
 from pathlib import Path
-import hashlib
+from bisect import bisect_left, bisect_right
+import os
+import threading
+from core.face_detect import detect_faces, HOG, CNN, WORKING_EDGE
 
+PREFETCH_AHEAD = 3     # images decoded ahead in the direction of travel
+PREFETCH_BEHIND = 1    # and behind, for stepping back
 
-import face_recognition
 
 class FaceTaggingWindow(QDialog):
-    def __init__(self, parent=None, image_path=None):
+    photos_found = Signal(list, str)     # Emit (digests of the photos of a person, description)
+
+    def __init__(self, parent=None, image_path=None, digest=None, indexes=(), sequence=(), position=0):
         super().__init__(parent)
-        self.hash = ""
+        self.hash = digest or ""
         self.image_path = image_path
+        self.indexes = list(indexes)    # (index, meta) pairs to take digests from
+        self.sequence = sequence        # (digest, path) items to step through, path None for gaps
+        self.position = position
+        # Image positions found once, so a step is a lookup rather than a walk over the table
+        # (splitext: Path.suffix would parse every path of a large table)
+        paths = sequence.paths() if hasattr(sequence, "paths") else [path for _, path in sequence]
+        self.image_positions = [p for p, path in enumerate(paths)
+                                if path is not None and os.path.splitext(str(path))[1].lower() in IMAGE_EXTENSIONS]
+        self.step_direction = 1
+        self.scaled_pixmap = None
+        self.threadpool = QThreadPool.globalInstance()
+        self.load_cancel_flag = threading.Event()
+        # Prefetching gets a thread of its own so it never holds up the image being shown
+        self.prefetch_pool = QThreadPool(self)
+        self.prefetch_pool.setMaxThreadCount(1)
+        self.prefetch_cancel_flag = threading.Event()
         self.setWindowTitle("Face Tagging")
         self.resize(600, 400)
 
@@ -24,17 +50,50 @@ class FaceTaggingWindow(QDialog):
         # Layouts
         main_layout = QVBoxLayout()
         control_layout = QHBoxLayout()
+        options_layout = QHBoxLayout()
 
         # Controls
+        self.prev_button = QPushButton("< Prev")
+        self.prev_button.setToolTip("Previous image (Left / Page Up)")
+        self.next_button = QPushButton("Next >")
+        self.next_button.setToolTip("Next image (Right / Page Down)")
         self.detect_button = QPushButton("Detect Faces")
         self.name_input = QLineEdit()
         self.save_button = QPushButton("Save")
         self.clear_button = QPushButton("Clear")
+        self.find_button = QPushButton("Find Person")
+        self.find_button.setToolTip("Show every photo of the selected face's person in the main table")
 
+        control_layout.addWidget(self.prev_button)
+        control_layout.addWidget(self.next_button)
         control_layout.addWidget(self.detect_button)
         control_layout.addWidget(self.name_input)
         control_layout.addWidget(self.save_button)
         control_layout.addWidget(self.clear_button)
+        control_layout.addWidget(self.find_button)
+
+        # Detection options: speed against accuracy
+        self.model_choice = QComboBox()
+        self.model_choice.addItem("HOG (fast)", HOG)
+        self.model_choice.addItem("CNN (accurate)", CNN)
+        self.upsample_choice = QSpinBox()
+        self.upsample_choice.setRange(0, 3)
+        self.upsample_choice.setValue(1)
+        self.upsample_choice.setToolTip("Upsample while detecting to find smaller faces (slower)")
+        self.working_size = QComboBox()
+        for edge in (800, WORKING_EDGE, 2400):
+            self.working_size.addItem(f"Detect at {edge} px", edge)
+        self.working_size.addItem("Detect at full size", 0)
+        self.working_size.setCurrentIndex(self.working_size.findData(WORKING_EDGE))
+        self.landmarks_check = QCheckBox("Landmarks")
+        self.landmarks_check.setToolTip("Also locate eyes, nose and mouth")
+
+        options_layout.addWidget(self.model_choice)
+        options_layout.addWidget(QLabel("Upsample:"))
+        options_layout.addWidget(self.upsample_choice)
+        options_layout.addWidget(self.working_size)
+        options_layout.addWidget(self.landmarks_check)
+        options_layout.addStretch()
 
         # Image display
         self.image_label = ClickableImageLabel("Drop an image here",on_region_selected=self.update_name_field)
@@ -44,16 +103,91 @@ class FaceTaggingWindow(QDialog):
 
         # Assemble
         main_layout.addLayout(control_layout)
+        main_layout.addLayout(options_layout)
         main_layout.addWidget(self.image_label)
         self.setLayout(main_layout)
 
         # Connect buttons
+        self.prev_button.clicked.connect(self.show_previous)
+        self.next_button.clicked.connect(self.show_next)
         self.detect_button.clicked.connect(self.detect_faces)
         self.save_button.clicked.connect(self.save_name)
         self.clear_button.clicked.connect(self.clear_selection)
+        self.find_button.clicked.connect(self.find_person)
+
+        self.update_navigation()
+        self.load_image_viewer()
 
+    def keyPressEvent(self, event):
+        # Left and Right reach here only when the name field does not want them
+        if event.key() in (Qt.Key_Left, Qt.Key_PageUp):
+            self.show_previous()
+        elif event.key() in (Qt.Key_Right, Qt.Key_PageDown):
+            self.show_next()
+        else:
+            super().keyPressEvent(event)
+
+    def image_item(self, position: int):
+        # (digest, path) at a position of the sequence when it is an image, else None
+        digest, path = self.sequence[position]
+        if path is not None and Path(path).suffix.lower() in IMAGE_EXTENSIONS:
+            return digest, path
+        return None
+
+    def neighbour(self, direction: int, start: int = None):
+        # Position of the next image from start in a direction, or None at the end.  Positions the
+        # table has since emptied or changed are passed over.
+        position = self.position if start is None else start
+        positions = self.image_positions
+        i = bisect_right(positions, position) if direction > 0 else bisect_left(positions, position) - 1
+        while 0 <= i < len(positions):
+            if positions[i] < len(self.sequence) and self.image_item(positions[i]) is not None:
+                return positions[i]
+            i += direction
+        return None
+
+    def show_previous(self):
+        self.step(-1)
+
+    def show_next(self):
+        self.step(1)
+
+    def step(self, direction: int):
+        position = self.neighbour(direction)
+        if position is None:
+            return
+        self.position = position
+        self.step_direction = direction
+        digest, self.image_path = self.image_item(position)
+        self.hash = digest or ""
+        self.name_input.clear()
+        self.update_navigation()
         self.load_image_viewer()
 
+    def update_navigation(self):
+        self.prev_button.setEnabled(self.neighbour(-1) is not None)
+        self.next_button.setEnabled(self.neighbour(1) is not None)
+        if self.image_path and len(self.sequence) > 1:
+            self.setWindowTitle(f"Face Tagging - {Path(self.image_path).name} ({self.position + 1} of {len(self.sequence)})")
+
+    def prefetch_neighbours(self):
+        # Decode the next few images into the thumbnail cache while this one is looked at
+        self.prefetch_cancel_flag.set()
+        self.prefetch_cancel_flag = threading.Event()
+        items = []
+        for direction, count in ((self.step_direction, PREFETCH_AHEAD), (-self.step_direction, PREFETCH_BEHIND)):
+            position = self.position
+            for _ in range(count):
+                position = self.neighbour(direction, position)
+                if position is None:
+                    break
+                items.append(self.image_item(position))
+        if items:
+            size = self.image_label.size()
+            self.prefetch_pool.start(ImagePrefetchWorker(
+                items, max(size.width(), size.height()), self.indexes, self.prefetch_cancel_flag
+            ))
+
     def dragEnterEvent(self, event: QDragEnterEvent):
         if event.mimeData().hasUrls():
             event.acceptProposedAction()
@@ -62,38 +196,105 @@ class FaceTaggingWindow(QDialog):
         urls = event.mimeData().urls()
         if urls:
             self.image_path = urls[0].toLocalFile()
+            self.hash = ""
+            self.sequence = ()      # a dropped file is looked at on its own
+            self.image_positions = []
+            self.update_navigation()
             self.load_image_viewer()
 
     def load_image_viewer(self):
         #load the viewer from the image_path
         if self.image_path:
-            #self.face_rects = []
-            self.hash = self.compute_hash(Path(self.image_path))
-            pixmap = QPixmap(self.image_path)
-            self.scaled_pixmap = pixmap.scaled(
-                self.image_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation
-            )
-            self.image_label.setPixmap(self.scaled_pixmap)
+            # Hashing and decoding run in a worker; a preview shows while the full image loads
+            self.load_cancel_flag.set()
+            self.load_cancel_flag = threading.Event()
+            self.scaled_pixmap = None
+            self.detect_button.setEnabled(False)
             self.image_label.clear_face_regions()
-    
-    def compute_hash(self, path: Path, chunk_size: int = 65536) -> str:
-        hasher = hashlib.sha256()
-        with path.open("rb") as f:
-            while chunk := f.read(chunk_size):
-                hasher.update(chunk)
-        return hasher.hexdigest()
-
-    def hash_file(self, path):
-        hash = self.compute_hash(path)
-        return (path, hash)
-    
+            self.image_label.setText("Loading...")
+            size = self.image_label.size()
+            worker = ImageLoadWorker(self.image_path, max(size.width(), size.height()), self.hash,
+                                     self.indexes, self.load_cancel_flag)
+            worker.signals.preview.connect(self.show_preview)
+            worker.signals.loaded.connect(self.image_loaded)
+            worker.signals.error.connect(self.image_load_error)
+            self.threadpool.start(worker)
+
+    def show_preview(self, path, image):
+        if path != str(self.image_path) or self.scaled_pixmap is not None:
+            return
+        self.image_label.setPixmap(QPixmap.fromImage(image).scaled(
+            self.image_label.size(), Qt.KeepAspectRatio, Qt.FastTransformation
+        ))
+
+    def image_loaded(self, path, digest, image):
+        if path != str(self.image_path):
+            return  # another image was opened meanwhile
+        self.hash = digest
+        self.scaled_pixmap = QPixmap.fromImage(image).scaled(
+            self.image_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation
+        )
+        self.image_label.setPixmap(self.scaled_pixmap)
+        self.image_label.clear_face_regions()
+        self.restore_tags()
+        self.detect_button.setEnabled(True)
+        self.prefetch_neighbours()
+
+    def restore_tags(self):
+        # Tags are stored per content, so any copy of the photo gets them back
+        width, height = self.scaled_pixmap.width(), self.scaled_pixmap.height()
+        for region in shared_tag_store().regions(self.hash):
+            x, y, w, h = region["rect"]
+            self.image_label.add_face_region(
+                QRect(round(x * width), round(y * height), round(w * width), round(h * height)), region["name"]
+            )
+        self.image_label.update()
+
+    def store_tags(self):
+        if not self.hash or self.scaled_pixmap is None:
+            return
+        width, height = self.scaled_pixmap.width(), self.scaled_pixmap.height()
+        store = shared_tag_store()
+        store.set_regions(self.hash, [
+            {"rect": [r.rect.x() / width, r.rect.y() / height, r.rect.width() / width, r.rect.height() / height],
+             "name": r.name}
+            for r in self.image_label.face_regions
+        ])
+        store.save()
+
+    def image_load_error(self, path, msg):
+        if path == str(self.image_path):
+            self.image_label.setText(f"Could not load image:\n{msg}")
+            self.prefetch_neighbours()
+
+    def done(self, result):
+        self.load_cancel_flag.set()
+        self.prefetch_cancel_flag.set()
+        super().done(result)
+
     def detect_faces(self):
         # Placeholder for face detection logic
         #print(f"Detecting faces in: {self.image_path}")
-        self.load_face_detector()
+        if self.scaled_pixmap is not None:
+            self.load_face_detector()
 
     def update_name_field(self, name):
         self.name_input.setText(name)
+        index = getattr(self.image_label, 'selected_index', -1)
+        if not name and index >= 0 and self.hash and self.scaled_pixmap is not None:
+            # Offer the name of the closest tagged face of the same person, if any
+            centre = self.image_label.face_regions[index].rect.center()
+            worker = NameSuggestWorker(
+                self.hash, centre.x() / self.scaled_pixmap.width(), centre.y() / self.scaled_pixmap.height(),
+                shared_tag_store().named_regions()
+            )
+            worker.signals.finished.connect(self.show_suggestion)
+            self.threadpool.start(worker)
+
+    def show_suggestion(self, digest, name):
+        if name and digest == self.hash and not self.name_input.text():
+            self.name_input.setText(name)
+            self.name_input.selectAll()     # Save accepts it, typing replaces it
 
     def save_name(self):
         # Placeholder for saving name logic
@@ -101,6 +302,7 @@ class FaceTaggingWindow(QDialog):
         index = getattr(self.image_label, 'selected_index', -1)
         if index >= 0:
             self.image_label.face_regions[index].name = name
+            self.store_tags()
             #print(f"Saved name '{name}' for face {index + 1}")
 
 
@@ -110,9 +312,33 @@ class FaceTaggingWindow(QDialog):
         if index >= 0:
             self.image_label.face_regions[index].name = ""
             self.name_input.clear()
+            self.store_tags()
             #print(f"Cleared name for face {index + 1}")
 
-    def draw_bounding_boxes(self, image):
+    def find_person(self):
+        index = getattr(self.image_label, 'selected_index', -1)
+        if index < 0 or self.scaled_pixmap is None or not self.hash:
+            return
+        region = self.image_label.face_regions[index]
+        centre = region.rect.center()
+        self.find_label = region.name or "the selected face"
+        worker = FaceSearchWorker(
+            self.hash, centre.x() / self.scaled_pixmap.width(), centre.y() / self.scaled_pixmap.height()
+        )
+        worker.signals.finished.connect(self.person_found)
+        worker.signals.error.connect(self.show_search_error)
+        self.find_button.setEnabled(False)
+        self.threadpool.start(worker)
+
+    def person_found(self, digests):
+        self.find_button.setEnabled(True)
+        self.photos_found.emit(digests, f"photos of {self.find_label}")
+
+    def show_search_error(self, msg):
+        self.find_button.setEnabled(True)
+        QMessageBox.information(self, "Find Person", msg, QMessageBox.Ok)
+
+    def draw_bounding_boxes(self, shape):
         painter = QPainter(self.scaled_pixmap)
         pen = QPen(QColor("red"))
         pen.setWidth(2)
@@ -120,8 +346,8 @@ class FaceTaggingWindow(QDialog):
 
         #self.face_rects = []  # Store QRect objects for interaction
 
-        x_scale = self.scaled_pixmap.width() / image.shape[1]
-        y_scale = self.scaled_pixmap.height() / image.shape[0]
+        x_scale = self.scaled_pixmap.width() / shape[1]
+        y_scale = self.scaled_pixmap.height() / shape[0]
         
         for top, right, bottom, left in self.face_locations:
             x = int(left * x_scale)
@@ -130,9 +356,17 @@ class FaceTaggingWindow(QDialog):
             h = int((bottom - top) * y_scale)
 
             rect = QRect(x, y, w, h)
-            self.image_label.add_face_region(rect)
+            # Faces already tagged (restored from the tag store or an earlier detection) are kept as they are
+            if not any(region.rect.intersects(rect) for region in self.image_label.face_regions):
+                self.image_label.add_face_region(rect)
             #self.face_rects.append(rect)
             painter.drawRect(rect)
+
+        # Landmarks, when asked for, as small dots
+        for face in self.face_landmarks:
+            for points in face.values():
+                for px, py in points:
+                    painter.drawEllipse(QPoint(int(px * x_scale), int(py * y_scale)), 1, 1)
             
         painter.end()
 
@@ -164,16 +398,15 @@ class FaceTaggingWindow(QDialog):
         self.image_label.setPixmap(self.scaled_pixmap)
             
     def load_face_detector(self):
-        # Load your image
-        image = face_recognition.load_image_file(str(self.image_path))  
-          
-        # Find all face locations
-        self.face_locations = face_recognition.face_locations(image)
-
-        # Optionally get facial landmarks
-        face_landmarks = face_recognition.face_landmarks(image)
+        # Detect at the working resolution; boxes come back in full image coordinates
+        found = detect_faces(
+            str(self.image_path), self.working_size.currentData(), self.model_choice.currentData(),
+            self.upsample_choice.value(), landmarks=self.landmarks_check.isChecked()
+        )
+        self.face_locations = found["boxes"]
+        self.face_landmarks = found.get("landmarks", [])
 
         # Draw bounding boxes
-        self.draw_bounding_boxes(image)
+        self.draw_bounding_boxes(found["shape"])
         
         #print(f"Found {len(self.face_locations)} face(s)")
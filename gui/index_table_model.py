@@ -0,0 +1,349 @@
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QBrush, QColor
+from enum import IntEnum
+from pathlib import Path
+import random
+from core.file_info import group_info
+
+
+class ViewMode(IntEnum):
+    ALL = 1
+    DUPLICATES = 2
+    UNIQUE = 3
+    SIMILAR = 4     # near-duplicate images; shown from a derived index of perceptual hash groups
+
+
+COPIED_ROLE = Qt.UserRole + 1
+COPIED_BRUSH = QBrush(QColor("#d0f0c0"))  # Light green
+
+
+def mode_accepts(mode: ViewMode, group) -> bool:
+    if mode == ViewMode.DUPLICATES:
+        return len(group) > 1
+    if mode == ViewMode.UNIQUE:
+        return len(group) == 1
+    return True
+
+
+class IndexTableModel(QAbstractTableModel):
+    """
+    Table model reading straight from an index (digest -> [paths]): one row per group with the
+    info columns first, then one column per path.
+
+    Nothing is materialised per cell; the view asks for the visible cells only.  The model keeps
+    just the ordered list of row keys for the current view, and caches that list per view mode so
+    switching between All/Duplicates/Unique or between indexes is instant once built.  Filtering and
+    sorting are done here on the key list (acting as its own proxy) because a QSortFilterProxyModel
+    would call back into Python once per row.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._index = {}
+        self._meta = {}
+        self._mode = ViewMode.ALL
+        self._info_columns = []
+        self._row_filter = None
+        self._rows = []
+        self._file_cols = 0
+        self._row_cache = {}        # id(index) -> (index, {(mode, sort, info headers): (keys, max group size)})
+        self._copied = set()        # (key, str(path)) marked as dropped elsewhere
+        self._sort = None           # (header, order), by name so it carries across views
+
+    # ---- building -------------------------------------------------------------
+    def set_index(self, index: dict, meta: dict = None, mode: ViewMode = ViewMode.ALL,
+                  info_columns=None, row_filter=None):
+        """
+        Show an index in the given view mode.
+
+        Args:
+            index (dict): digest -> [paths]
+            meta (dict, optional): index metadata passed to the info columns
+            mode (ViewMode, optional): All, Duplicates, Unique or Similar
+            info_columns (list, optional): [(header, fn(key, group, info) -> (text, sort_key))]
+            row_filter (callable, optional): fn(key, group) -> bool to narrow the rows further
+        """
+        self.beginResetModel()
+        self._index = index if index is not None else {}
+        self._meta = meta or {}
+        self._mode = mode
+        self._info_columns = info_columns or []
+        self._row_filter = row_filter
+        keys, max_cols = self._mode_rows(self._index, mode)
+        if row_filter is not None:
+            index = self._index
+            keys = [k for k in keys if row_filter(k, index[k])]
+        self._rows = keys
+        self._file_cols = 1 if mode == ViewMode.UNIQUE else max_cols
+        self.endResetModel()
+
+    def refresh(self):
+        """Re-read the current index, e.g. after it was changed outside the model."""
+        self.invalidate_cache(self._index)
+        self.set_index(self._index, self._meta, self._mode, self._info_columns, self._row_filter)
+
+    def invalidate_cache(self, index: dict = None):
+        """Forget cached row lists for one index (or all indexes); call after changing an index."""
+        if index is None:
+            self._row_cache.clear()
+        else:
+            self._row_cache.pop(id(index), None)
+
+    def _cache_for(self, index: dict) -> dict:
+        # Cached per index object (holding a reference so the id stays unique), for the two
+        # most recent indexes: master and candidate
+        entry = self._row_cache.pop(id(index), None)
+        if entry is None or entry[0] is not index:
+            entry = (index, {})
+        self._row_cache[id(index)] = entry
+        while len(self._row_cache) > 2:
+            del self._row_cache[next(iter(self._row_cache))]
+        return entry[1]
+
+    def _mode_rows(self, index: dict, mode: ViewMode):
+        by_mode = self._cache_for(index)
+        unsorted_key = (mode, None, ())
+        if unsorted_key not in by_mode:
+            if mode == ViewMode.ALL:
+                keys = list(index)
+            else:
+                keys = [k for k, group in index.items() if mode_accepts(mode, group)]
+            by_mode[unsorted_key] = (keys, max((len(index[k]) for k in keys), default=0))
+        if self._sort is None:
+            cache_key = unsorted_key
+        else:
+            cache_key = (mode, self._sort, tuple(h for h, _ in self._info_columns))
+            if cache_key not in by_mode:
+                keys, max_cols = by_mode[unsorted_key]
+                file_cols = 1 if mode == ViewMode.UNIQUE else max_cols
+                column = self._column_of(self._sort[0], file_cols)
+                by_mode[cache_key] = (self._sorted(keys, column, self._sort[1]), max_cols)
+        keys, max_cols = by_mode[cache_key]
+        return list(keys), max_cols
+
+    # ---- access ---------------------------------------------------------------
+    @property
+    def index_dict(self) -> dict:
+        return self._index
+
+    @property
+    def meta(self) -> dict:
+        return self._meta
+
+    @property
+    def mode(self) -> ViewMode:
+        return self._mode
+
+    @property
+    def info_columns(self) -> list:
+        return self._info_columns
+
+    @property
+    def row_filter(self):
+        return self._row_filter
+
+    @property
+    def first_file_column(self) -> int:
+        return len(self._info_columns)
+
+    @property
+    def file_column_count(self) -> int:
+        return self._file_cols
+
+    def row_keys(self) -> list:
+        return self._rows
+
+    def key_at(self, row: int):
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def group_at(self, row: int) -> list:
+        key = self.key_at(row)
+        return self._index.get(key, []) if key is not None else []
+
+    def path_at(self, index: QModelIndex):
+        """File path shown in a cell, or None for info columns and empty cells."""
+        if not index.isValid():
+            return None
+        slot = index.column() - self.first_file_column
+        group = self.group_at(index.row())
+        return Path(group[slot]) if 0 <= slot < len(group) else None
+
+    def cell_text(self, row: int, column: int) -> str:
+        key = self.key_at(row)
+        if key is None:
+            return ""
+        group = self._index.get(key, [])
+        if column < self.first_file_column:
+            return self._info_columns[column][1](key, group, group_info(self._meta, group))[0]
+        slot = column - self.first_file_column
+        return str(group[slot]) if slot < len(group) else ""
+
+    def row_values(self, row: int) -> list:
+        return [self.cell_text(row, col) for col in range(self.columnCount())]
+
+    def width_candidates(self, column: int, longest: int = 20, sample: int = 200) -> list:
+        """
+        Texts worth measuring to size a column without visiting every row: the longest paths in
+        the column, tracked in the index metadata as the index is built and edited, plus a random
+        sample of rows for the info columns, proportional-font outliers and indexes without them.
+        """
+        texts = []
+        slot = column - self.first_file_column
+        tracked = self._meta.get("longest")
+        if slot >= 0 and tracked:
+            duplicates = tracked["duplicates"]
+            if self._mode == ViewMode.SIMILAR:
+                lists = [tracked["unique"]] + duplicates    # rows merge groups, so any path may land here
+            elif self._mode == ViewMode.UNIQUE:
+                lists = [tracked["unique"]]
+            else:
+                lists = duplicates[slot:slot + 1]
+                if self._mode == ViewMode.ALL and slot == 0:
+                    lists.append(tracked["unique"])
+            # Skip entries for files no longer in the index (edited without updating them)
+            files = self._meta.get("files", {})
+            similar = self._mode == ViewMode.SIMILAR
+            texts += [text for entries in lists for text, digest in entries[:longest]
+                      if (similar or digest in self._index) and (not files or text in files)]
+        rows = range(len(self._rows))
+        for row in (random.sample(rows, sample) if len(rows) > sample else rows):
+            texts.append(self.cell_text(row, column))
+        return texts
+
+    def headers(self) -> list:
+        return [h for h, _ in self._info_columns] + [f"File {i+1}" for i in range(self._file_cols)]
+
+    # ---- Qt model interface ---------------------------------------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.first_file_column + self._file_cols
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return self.cell_text(index.row(), index.column())
+        if role in (Qt.BackgroundRole, COPIED_ROLE):
+            path = self.path_at(index)
+            copied = path is not None and (self.key_at(index.row()), str(path)) in self._copied
+            if role == COPIED_ROLE:
+                return "copied" if copied else None
+            return COPIED_BRUSH if copied else None
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            headers = self.headers()
+            return headers[section] if section < len(headers) else None
+        return section + 1
+
+    def flags(self, index: QModelIndex):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsSelectable | Qt.ItemIsEnabled
+        if self.path_at(index) is not None:
+            flags |= Qt.ItemIsDragEnabled
+        return flags
+
+    def sort(self, column: int, order=Qt.AscendingOrder):
+        headers = self.headers()
+        if not 0 <= column < len(headers):
+            return
+        self.layoutAboutToBeChanged.emit()
+        self._sort = (headers[column], order)
+        self._rows = self._sorted(self._rows, column, order)
+        self.layoutChanged.emit()
+
+    def set_sort(self, header: str, order=Qt.AscendingOrder):
+        """Choose the sort applied by the next set_index(), e.g. a view's default ordering."""
+        self._sort = (header, order) if header else None
+
+    @property
+    def sort_header(self):
+        return self._sort[0] if self._sort else None
+
+    def sort_column(self) -> int:
+        """Column of the current sort in the current view, or -1."""
+        if self._sort is None:
+            return -1
+        return self._column_of(self._sort[0], self._file_cols)
+
+    def sort_order(self):
+        return self._sort[1] if self._sort else Qt.AscendingOrder
+
+    def _column_of(self, header: str, file_cols: int) -> int:
+        for column, (name, _) in enumerate(self._info_columns):
+            if name == header:
+                return column
+        if header.startswith("File "):
+            slot = int(header[5:]) - 1
+            if 0 <= slot < file_cols:
+                return len(self._info_columns) + slot
+        return -1
+
+    def _sorted(self, keys: list, column: int, order) -> list:
+        if column < 0:
+            return list(keys)
+        index, meta = self._index, self._meta
+        first = self.first_file_column
+        if column < first:
+            value_fn = self._info_columns[column][1]
+            def sort_key(k):
+                group = index[k]
+                value = value_fn(k, group, group_info(meta, group))[1]
+                return (value is None, value)
+        else:
+            slot = column - first
+            def sort_key(k):
+                group = index[k]
+                return str(group[slot]) if slot < len(group) else ""
+        try:
+            return sorted(keys, key=sort_key, reverse=(order == Qt.DescendingOrder))
+        except TypeError:
+            return sorted(keys, key=lambda k: str(sort_key(k)), reverse=(order == Qt.DescendingOrder))
+
+    # ---- copied marks and edits -----------------------------------------------
+    def set_copied(self, indexes, copied: bool = True):
+        # indexes may be persistent indexes kept across a drag
+        for index in indexes:
+            path = self.path_at(index)
+            if path is None:
+                continue
+            mark = (self.key_at(index.row()), str(path))
+            if copied:
+                self._copied.add(mark)
+            else:
+                self._copied.discard(mark)
+            cell = self.index(index.row(), index.column())
+            self.dataChanged.emit(cell, cell, [Qt.BackgroundRole, COPIED_ROLE])
+
+    def update_groups(self, keys) -> None:
+        """
+        Refresh rows after their groups were changed in the index: rows of emptied groups are
+        removed, others repainted.  Large removals reset the model rather than removing row by row.
+        """
+        keys = set(keys)
+        if not keys:
+            return
+        self.invalidate_cache(self._index)
+        self._copied = {
+            (key, path) for key, path in self._copied
+            if key not in keys or path in {str(p) for p in self._index.get(key, [])}
+        }
+        positions = {key: row for row, key in enumerate(self._rows) if key in keys}
+        gone = sorted((row for key, row in positions.items() if not self._index.get(key)), reverse=True)
+        if len(gone) > 100:
+            self.beginResetModel()
+            self._rows = [k for k in self._rows if k not in keys or self._index.get(k)]
+            self.endResetModel()
+            return
+        for row in gone:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._rows[row]
+            self.endRemoveRows()
+        if len(gone) < len(positions) and self._rows:
+            # Cells shift left within changed groups; the view only repaints what is visible
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._rows) - 1, self.columnCount() - 1))
@@ -1,7 +1,8 @@
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton,
-    QFileDialog, QTableWidget, QTableWidgetItem, QMessageBox, QProgressBar, 
-    QApplication, QTextEdit, QMenuBar, QMenu, QRadioButton, QButtonGroup, QFrame 
+    QFileDialog, QMessageBox, QProgressBar, 
+    QApplication, QTextEdit, QMenuBar, QMenu, QRadioButton, QButtonGroup, QFrame, QComboBox, QLabel,
+    QInputDialog, QCheckBox
 )
 from PySide6.QtGui import QKeySequence, QAction, QDragEnterEvent, QDropEvent, QDragLeaveEvent
 from PySide6.QtCore import QEvent
@@ -12,18 +13,85 @@ from pathlib import Path
 from gui.widgets import DropDirLineEdit
 import threading
 import subprocess
+import csv
+import io
 import sys
 from gui.win_open_with_dlg import open_with_dialog
 from gui.scanner_worker import ScannerWorker
-from gui.image_window import FaceTaggingWindow
-from gui.DraggableTableWidget import DraggableTableWidget
+from gui.verify_worker import VerifyWorker
+from gui.verify_dialog import VerifyOptionsDialog
+from gui.diff_window import SnapshotDiffWindow
+from gui.search_index_worker import SearchIndexWorker
+from gui.export_worker import ExportWorker
+from gui.export_dialog import ExportOptionsDialog, ALL_ROWS, SELECTED_ROWS
+from gui.batch_worker import BatchWorker
+from gui.resolution_dialog import ResolutionDialog
+from gui.dir_report_window import DirReportWindow
+from gui.face_batch_worker import FaceBatchWorker
+from gui.DraggableTableView import DraggableTableView
+from gui.index_table_model import IndexTableModel, ViewMode
 from core.csv_json_tools import load_dict_from_json, save_dict_to_json
+from core.master_set import MasterSet
+from core.digest_file import export_digest_file
+from core.file_info import load_index_meta, save_index_meta, group_info, format_size
+from core.index_verify import apply_repairs, UNRECORDED
+from core.group_stats import compute_group_stats, compute_longest_paths, summarize
+from core.batch_actions import (
+    plan_delete, plan_move, plan_summary, apply_results, new_batch_id, last_undoable_journal,
+    undoable_entries, DELETE, MOVE, DONE, FAILED
+)
+from core.linking import HARDLINK, REFLINK
+from core.face_tags import shared_tag_store
+from core.perceptual import near_duplicate_groups, near_duplicate_index
+from collections import Counter
+from datetime import datetime
 from enum import IntEnum
 
-class ViewMode(IntEnum):
-    ALL = 1
-    DUPLICATES = 2
-    UNIQUE = 3
+def media_of(info) -> dict:
+    return (info or {}).get("media") or {}
+
+
+def dimensions(key, group, info):
+    media = media_of(info)
+    if not media.get("width"):
+        return "", -1
+    return f"{media['width']} x {media['height']}", media["width"] * media["height"]
+
+
+def duration(key, group, info):
+    seconds = media_of(info).get("duration")
+    if seconds is None:
+        return "", -1
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return (f"{hours}:{minutes:02}:{secs:02}" if hours else f"{minutes}:{secs:02}"), seconds
+
+
+class TableColumnSequence:
+    """
+    (digest, path) of the cells down one table column, in view order, for stepping through
+    images.  Cells are read when asked for, so the sequence follows later edits to the table;
+    empty cells give (None, None).
+    """
+    def __init__(self, model, column: int, digest_for_cell):
+        self.model = model
+        self.column = column
+        self.digest_for_cell = digest_for_cell
+
+    def __len__(self):
+        return self.model.rowCount()
+
+    def __getitem__(self, row: int):
+        index = self.model.index(row, self.column)
+        path = self.model.path_at(index)
+        return (self.digest_for_cell(index), path) if path is not None else (None, None)
+
+    def paths(self) -> list:
+        """Path of every cell (None when empty), read straight from the rows for a quick scan."""
+        slot = self.column - self.model.first_file_column
+        groups = (self.model.group_at(row) for row in range(self.model.rowCount()))
+        return [group[slot] if 0 <= slot < len(group) else None for group in groups]
+
 
 class DictMode(IntEnum):
     MASTER = 1
@@ -34,9 +102,33 @@ class DuplicateViewerWindow(QMainWindow):
         super().__init__()
         self.threadpool = QThreadPool()
         self.cancel_flag = threading.Event()
+        # Low priority jobs get their own pool so lowered thread priority never leaks into scans
+        self.background_pool = QThreadPool()
+        self.background_pool.setMaxThreadCount(1)
+        self.verify_cancel_flag = threading.Event()
+        self.export_cancel_flag = threading.Event()
+        self.batch_cancel_flag = threading.Event()
+        self.faces_cancel_flag = threading.Event()
+        self.digest_filter = None   # (digests, description) restricting the table, e.g. photos of a person
+        self._faces_running = False
+        self._batch_running = False
+        self._verify_running = False
+        self._verify_unrecorded = 0     # unrecorded files seen by the running verification
+        self._batch_targets = {}    # batch id -> (index, meta) the batch was run against, for undo
         self.master = {}
         self.master_tags={}
         self.candidate = {}
+        self.master_meta = {"files": {}}
+        self.candidate_meta = {"files": {}}
+        self._scan_meta = {"files": {}}
+        self.archives = MasterSet()
+        self.archive_matches = {}
+        self._column_widths = {}    # (id(index), view mode, header) -> width
+        self._near_indexes = {}     # id(index) -> (index, near-duplicate rows, row digests)
+        self._search_indexes = {}   # id(index) -> (index, PathSearchIndex or None while building, cancel flag)
+        self._file_types = {}       # id(meta) -> (meta, sorted extensions present, any media details)
+        self._summaries = {}        # id(index) -> (index, summary of its whole duplicates view)
+        self._type_rows = {}        # (id(rows), ext) -> (rows, keys of the rows of that type)
         self._dict_mode = DictMode.MASTER
         #self.active_dict = self.master 
         self.setWindowTitle("Photo Dedupe Viewer")
@@ -45,6 +137,8 @@ class DuplicateViewerWindow(QMainWindow):
         self.setup_menu_bar() 
         container.setLayout(self.build_framelayout())
         self.setCentralWidget(container)
+        self.summary_label = QLabel()
+        self.statusBar().addPermanentWidget(self.summary_label)
         #delete_action.setShortcut("Del")
         #DictMode(self.dict_group.checkedId())== DictMode.MASTER
 
@@ -59,6 +153,17 @@ class DuplicateViewerWindow(QMainWindow):
         else:
             self.candidate = new_dict
 
+    @property
+    def active_meta(self):
+        return self.master_meta if self._dict_mode == DictMode.MASTER else self.candidate_meta
+
+    @active_meta.setter
+    def active_meta(self, new_meta):
+        if self._dict_mode == DictMode.MASTER:
+            self.master_meta = new_meta
+        else:
+            self.candidate_meta = new_meta
+
     def set_dict_mode(self, mode, update_button=True):
         self._dict_mode = mode  # Called when radio button changes
         if update_button: 
@@ -85,10 +190,30 @@ class DuplicateViewerWindow(QMainWindow):
         save_dict_action.triggered.connect(self.save_master_dict)
         file_menu.addAction(save_dict_action)
 
-        export_table_action = QAction("Export Table to CSV", self)
+        export_digest_action = QAction("Export Master to Digest File", self)
+        export_digest_action.triggered.connect(self.export_master_digest_file)
+        file_menu.addAction(export_digest_action)
+
+        attach_archives_action = QAction("Attach Archive Masters from JSon", self)
+        attach_archives_action.triggered.connect(self.attach_archive_dicts)
+        file_menu.addAction(attach_archives_action)
+
+        detach_archives_action = QAction("Detach All Archive Masters", self)
+        detach_archives_action.triggered.connect(self.detach_archive_dicts)
+        file_menu.addAction(detach_archives_action)
+
+        diff_action = QAction("Compare Two Saved Scans...", self)
+        diff_action.triggered.connect(self.compare_saved_scans)
+        file_menu.addAction(diff_action)
+
+        export_table_action = QAction("Export Table to CSV...", self)
         export_table_action.triggered.connect(self.export_table)
         file_menu.addAction(export_table_action)
 
+        cancel_export_action = QAction("Cancel CSV Export", self)
+        cancel_export_action.triggered.connect(self.export_cancel_flag.set)
+        file_menu.addAction(cancel_export_action)
+
 
         exit_action = QAction("Exit", self)
         exit_action.triggered.connect(self.close)
@@ -102,10 +227,75 @@ class DuplicateViewerWindow(QMainWindow):
         copy_action.triggered.connect(self.copy_selected_cells_as_csv)
         edit_menu.addAction(copy_action)
 
+        edit_menu.addSeparator()
+
+        delete_selected_action = QAction("Delete Selected Files", self)
+        delete_selected_action.setShortcut(QKeySequence.Delete)
+        delete_selected_action.triggered.connect(self.delete_selected_files)
+        edit_menu.addAction(delete_selected_action)
+
+        move_selected_action = QAction("Move Selected Files To...", self)
+        move_selected_action.triggered.connect(self.move_selected_files)
+        edit_menu.addAction(move_selected_action)
+
+        undo_batch_action = QAction("Undo Last Batch", self)
+        undo_batch_action.setShortcut(QKeySequence.Undo)
+        undo_batch_action.triggered.connect(self.undo_last_batch)
+        edit_menu.addAction(undo_batch_action)
+
+        cancel_batch_action = QAction("Cancel Running Batch", self)
+        cancel_batch_action.triggered.connect(self.batch_cancel_flag.set)
+        edit_menu.addAction(cancel_batch_action)
+
+        clear_filter_action = QAction("Clear Photo Filter", self)
+        clear_filter_action.triggered.connect(self.clear_digest_filter)
+        edit_menu.addAction(clear_filter_action)
+
+        edit_menu.addSeparator()
+
         resize_action = QAction("Resize all columns", self)
         resize_action.setShortcut("Ctrl+R")
         resize_action.triggered.connect(self.slow_col_resize)
         edit_menu.addAction(resize_action)
+
+        # Tools Menu
+        tools_menu = menu_bar.addMenu("Tools")
+
+        resolve_action = QAction("Resolve Duplicates by Rules...", self)
+        resolve_action.triggered.connect(self.resolve_duplicates)
+        tools_menu.addAction(resolve_action)
+
+        dir_report_action = QAction("Find Duplicate Folders...", self)
+        dir_report_action.triggered.connect(self.find_duplicate_folders)
+        tools_menu.addAction(dir_report_action)
+
+        tools_menu.addSeparator()
+
+        faces_action = QAction("Detect Faces in Master", self)
+        faces_action.triggered.connect(self.detect_library_faces)
+        tools_menu.addAction(faces_action)
+
+        cancel_faces_action = QAction("Cancel Face Detection", self)
+        cancel_faces_action.triggered.connect(self.faces_cancel_flag.set)
+        tools_menu.addAction(cancel_faces_action)
+
+        tagged_action = QAction("Show Photos Tagged...", self)
+        tagged_action.triggered.connect(self.show_tagged_photos)
+        tools_menu.addAction(tagged_action)
+
+        proposals_action = QAction("Review Proposed Names...", self)
+        proposals_action.triggered.connect(self.review_name_proposals)
+        tools_menu.addAction(proposals_action)
+
+        tools_menu.addSeparator()
+
+        verify_action = QAction("Verify Master in Background...", self)
+        verify_action.triggered.connect(self.start_verify)
+        tools_menu.addAction(verify_action)
+
+        cancel_verify_action = QAction("Cancel Verification", self)
+        cancel_verify_action.triggered.connect(self.verify_cancel_flag.set)
+        tools_menu.addAction(cancel_verify_action)
         
     
     def show_context_menu(self, position: QPoint):
@@ -114,12 +304,10 @@ class DuplicateViewerWindow(QMainWindow):
             return  # Clicked outside any cell
 
         row, col = index.row(), index.column()
-        item = self.table.item(row, col)
-        if not item:
+        path = self.table_model.path_at(index)
+        if path is None:
             return
 
-        path = Path(item.text())  # Assuming cell text is a file path
-
         menu = QMenu(self)
 
         view_action = QAction("View With...", self)
@@ -130,15 +318,23 @@ class DuplicateViewerWindow(QMainWindow):
 
         delete_action = QAction("Delete", self)
         delete_action.setShortcut("Del")
-        delete_action.triggered.connect(lambda: self.delete_file(row, col, path))
+        if self.table.selectionModel().isSelected(index) and len(self.selected_file_items()) > 1:
+            delete_action.setText("Delete Selected Files")
+            delete_action.triggered.connect(self.delete_selected_files)
+        else:
+            delete_action.triggered.connect(lambda: self.delete_file(row, col, path))
+
+        move_action = QAction("Move Selected Files To...", self)
+        move_action.triggered.connect(self.move_selected_files)
 
         restore_action = QAction("Mark as Uncopied", self)
-        restore_action.triggered.connect(lambda: self.table.restore_item_state(item))
+        restore_action.triggered.connect(lambda: self.table.restore_item_state(index))
 
         menu.addAction(view_action)
         menu.addAction(open_folder_action)
         menu.addSeparator()
         menu.addAction(delete_action)
+        menu.addAction(move_action)
         menu.addSeparator()
         menu.addAction(restore_action)
 
@@ -148,6 +344,8 @@ class DuplicateViewerWindow(QMainWindow):
         self.radio_all = QRadioButton("All")
         self.radio_duplicates = QRadioButton("Duplicates")
         self.radio_unique = QRadioButton("Unique")
+        self.radio_similar = QRadioButton("Near Duplicates")
+        self.radio_similar.setToolTip("Similar images (resized, re-encoded copies); scan with near duplicates on")
 
         self.radio_all.setChecked(True)  # Default view
 
@@ -155,10 +353,12 @@ class DuplicateViewerWindow(QMainWindow):
         self.view_group.addButton(self.radio_all)
         self.view_group.addButton(self.radio_duplicates)
         self.view_group.addButton(self.radio_unique)
+        self.view_group.addButton(self.radio_similar)
         
         self.view_group.setId(self.radio_all, ViewMode.ALL)
         self.view_group.setId(self.radio_duplicates, ViewMode.DUPLICATES)
         self.view_group.setId(self.radio_unique, ViewMode.UNIQUE)
+        self.view_group.setId(self.radio_similar, ViewMode.SIMILAR)
 
         frame = QFrame()
         frame.setFrameShape(QFrame.StyledPanel)
@@ -169,11 +369,14 @@ class DuplicateViewerWindow(QMainWindow):
         layout.addWidget(self.radio_all)
         layout.addWidget(self.radio_duplicates)
         layout.addWidget(self.radio_unique)
+        layout.addWidget(self.radio_similar)
 
         frame.setLayout(layout)
-        self.radio_all.toggled.connect(lambda: self.update_table_view()) #"all"))
-        self.radio_duplicates.toggled.connect(lambda: self.update_table_view()) #"dupes"))
-        self.radio_unique.toggled.connect(lambda: self.update_table_view()) #"unique"))
+        # Only the button being checked refreshes, not the one being unchecked
+        self.radio_all.toggled.connect(lambda checked: checked and self.update_table_view()) #"all"))
+        self.radio_duplicates.toggled.connect(lambda checked: checked and self.update_table_view()) #"dupes"))
+        self.radio_unique.toggled.connect(lambda checked: checked and self.update_table_view()) #"unique"))
+        self.radio_similar.toggled.connect(lambda checked: checked and self.update_table_view())
 
         return frame
 
@@ -200,8 +403,8 @@ class DuplicateViewerWindow(QMainWindow):
         layout.addWidget(self.radio_candidate)
 
         frame.setLayout(layout)
-        self.radio_master.toggled.connect(lambda: self.update_table_view()) #"all"))
-        self.radio_candidate.toggled.connect(lambda: self.update_table_view()) #"dupes"))
+        self.radio_master.toggled.connect(lambda checked: checked and self.update_table_view()) #"all"))
+        self.radio_candidate.toggled.connect(lambda checked: checked and self.update_table_view()) #"dupes"))
     
         return frame
        
@@ -218,6 +421,9 @@ class DuplicateViewerWindow(QMainWindow):
         scan_btn = QPushButton("Scan")
         scan_btn.clicked.connect(self.start_scan) #scan_for_duplicates)
 
+        self.perceptual_check = QCheckBox("Near duplicates")
+        self.perceptual_check.setToolTip("Also hash images perceptually to find resized or re-encoded copies (slower)")
+
         self.progress_bar = QProgressBar()
         self.progress_bar.setRange(0, 0)  # Indeterminate mode
         self.progress_bar.setFixedHeight(24)
@@ -242,11 +448,30 @@ class DuplicateViewerWindow(QMainWindow):
         self.notinmast_button.setVisible(True)
         self.notinmast_button.clicked.connect(self.notinmaster_dict)
 
+        self.check_archives_button = QPushButton("Check Archives")
+        self.check_archives_button.setFixedWidth(160)
+        self.check_archives_button.setVisible(True)
+        self.check_archives_button.clicked.connect(self.check_archives)
+
+        self.type_filter = QComboBox()
+        self.type_filter.setFixedWidth(120)
+        self.type_filter.addItem("All Types", "")
+        self.type_filter.currentIndexChanged.connect(lambda: self.update_table_view())
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search paths (text or glob, e.g. *.jpg)")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(200)
+        self.search_timer.timeout.connect(self.update_table_view)
+        self.search_input.textChanged.connect(self.search_timer.start)
 
         top_bar = QHBoxLayout()
         top_bar.addWidget(self.root_dir_input)
         top_bar.addWidget(browse_btn)
         top_bar.addWidget(scan_btn)
+        top_bar.addWidget(self.perceptual_check)
 
         prog_bar = QHBoxLayout()
         prog_bar.addWidget(self.progress_bar)
@@ -257,6 +482,9 @@ class DuplicateViewerWindow(QMainWindow):
         selector_bar.addWidget(self.setup_view_selector())
         selector_bar.addWidget(self.setup_dict_selector())
         selector_bar.addWidget(self.notinmast_button)
+        selector_bar.addWidget(self.check_archives_button)
+        selector_bar.addWidget(self.type_filter)
+        selector_bar.addWidget(self.search_input)
         
         top_bar_box = QVBoxLayout()
         top_bar_box.addLayout(top_bar)
@@ -264,10 +492,10 @@ class DuplicateViewerWindow(QMainWindow):
         top_bar_box.addLayout(prog_bar)
         top_bar_box.addWidget(self.output)
         
-        self.table = DraggableTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["File 1", "File 2", "File 3"])
-        self.table.cellDoubleClicked.connect(self.handle_double_click)
+        self.table_model = IndexTableModel(self)
+        self.table = DraggableTableView()
+        self.table.setModel(self.table_model)
+        self.table.doubleClicked.connect(self.handle_double_click)
         self.table.setContextMenuPolicy(Qt.CustomContextMenu)
         self.table.customContextMenuRequested.connect(self.show_context_menu)
         self.table.setSortingEnabled(True)
@@ -313,57 +541,233 @@ class DuplicateViewerWindow(QMainWindow):
         """
         
     def populate_table(self, dupes: dict, selected_mode = ViewMode.ALL):
-        self.table.setRowCount(0)
-        if not dupes: 
+        meta = self.master_meta if dupes is self.master else self.candidate_meta if dupes is self.candidate else {}
+        self.refresh_type_filter(meta)
+        ext_filter = self.type_filter.currentData()
+        filters = []
+        # Near-duplicate rows hold several digests; filters on digests match any of them
+        rows = dupes
+        members = None
+        if selected_mode == ViewMode.SIMILAR:
+            rows, members = self.near_index_for(dupes, meta)
+        def digests_of(key):
+            return members[key] if members is not None else (key,)
+        if ext_filter:
+            typed = self.rows_of_type(rows, meta, ext_filter)
+            filters.append(lambda key, group: key in typed)
+        if self.digest_filter is not None:
+            digests = self.digest_filter[0]
+            filters.append(lambda key, group: any(d in digests for d in digests_of(key)))
+        query = self.search_input.text().strip()
+        if query:
+            search = self.search_index_for(dupes)
+            if search is not None:
+                matched = search.search(query)
+                filters.append(lambda key, group: any(d in matched for d in digests_of(key)))
+            else:
+                self.statusBar().showMessage("Building search index...")
+        row_filter = None
+        if len(filters) == 1:
+            row_filter = filters[0]
+        elif filters:
+            row_filter = lambda key, group: all(f(key, group) for f in filters)
+        columns = self.info_columns(dupes, meta, selected_mode)
+        if selected_mode == ViewMode.DUPLICATES and meta.get("groups") and self.table_model.sort_header is None:
+            self.table_model.set_sort("Wasted", Qt.DescendingOrder)  # largest reclaimable space first
+        self.table_model.set_index(rows, meta, selected_mode, columns, row_filter)
+        self.show_sort_indicator()
+        self.resize_columns_fully( self.table)
+        self.update_summary()
+
+    def near_index_for(self, index: dict, meta: dict):
+        """Rows of the near-duplicate view of an index: ({key: [paths]}, {key: [digests]}), cached."""
+        entry = self._near_indexes.get(id(index))
+        if entry is not None and entry[0] is index:
+            return entry[1], entry[2]
+        if "similar" not in meta and any("phash" in info for info in meta.get("files", {}).values()):
+            meta["similar"] = near_duplicate_groups(index, meta)
+        rows, members = near_duplicate_index(index, meta.get("similar"))
+        if not rows and "similar" not in meta:
+            self.statusBar().showMessage("No perceptual hashes: rescan with Near duplicates checked")
+        self._near_indexes[id(index)] = (index, rows, members)
+        return rows, members
+
+    def shown_index(self) -> dict:
+        """The index behind the table; the near-duplicate view shows rows derived from it."""
+        if self.table_model.mode == ViewMode.SIMILAR:
+            return self.active_dict
+        return self.table_model.index_dict
+
+    def digest_for_cell(self, index):
+        """Digest of the file shown in a cell; near-duplicate rows mix several digests."""
+        path = self.table_model.path_at(index)
+        key = self.table_model.key_at(index.row())
+        if path is None or self.table_model.mode != ViewMode.SIMILAR:
+            return key
+        source = self._near_indexes.get(id(self.active_dict))
+        for digest in (source[2].get(key, ()) if source else ()):
+            if any(str(p) == str(path) for p in self.active_dict.get(digest, ())):
+                return digest
+        return key
+
+    def show_sort_indicator(self):
+        # Reflect the model's sort in the header without sorting again
+        header = self.table.horizontalHeader()
+        header.blockSignals(True)
+        header.setSortIndicator(self.table_model.sort_column(), self.table_model.sort_order())
+        header.blockSignals(False)
+
+    def update_summary(self):
+        # Reclaimable space over the groups currently shown, from the precomputed group stats
+        groups = self.table_model.meta.get("groups")
+        if self.table_model.mode != ViewMode.DUPLICATES or not groups:
+            self.summary_label.setText("")
             return
-        # Determine max group size to set column count
-        if selected_mode == ViewMode.UNIQUE:
-            max_cols = 1
-        else:
-            max_cols = max(len(group) for group in dupes.values())
-        self.table.setColumnCount(max_cols)
-        self.table.setHorizontalHeaderLabels([f"File {i+1}" for i in range(max_cols)])
-        for i in range(max_cols): self.table.setColumnHidden(i, False)
-        self.table.setColumnCount(max_cols + 1)
-        self.table.setColumnHidden(max_cols, True)
-        self.hidden_index = max_cols
-
-        self.table.setSortingEnabled(False)
-
-        for key, group in dupes.items():
-            if selected_mode == ViewMode.DUPLICATES and len(group) <= 1:
-                continue
-            if selected_mode == ViewMode.UNIQUE and len(group) != 1:
-                continue
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            for col, file_path in enumerate(group):
-                item = QTableWidgetItem(str(file_path))
-                item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-                self.table.setItem(row, col, item)
-            self.table.setItem(row, self.hidden_index, QTableWidgetItem(str(key)))
-    
-        if selected_mode == ViewMode.ALL:
-            self.resize_columns_fully( self.table)
+        index = self.table_model.index_dict
+        entry = self._summaries.get(id(index)) if self.table_model.row_filter is None else None
+        if entry is None or entry[0] is not index:
+            summary = summarize(groups, self.table_model.row_keys())
+            if self.table_model.row_filter is None:
+                self._summaries[id(index)] = (index, summary)
         else:
-            self.table.resizeColumnsToContents()
-        self.table.setSortingEnabled(True)
+            summary = entry[1]
+        self.summary_label.setText(
+            f"{summary['groups']} duplicate groups, {summary['files']} files, "
+            f"{format_size(summary['wasted'])} reclaimable of {format_size(summary['total'])}"
+        )
 
 
+    def info_columns(self, dupes: dict, meta: dict, selected_mode=ViewMode.ALL):
+        # Non-path columns shown before the file columns as
+        # (header, fn(key, group, info) -> (text, sort_key)), all served from the index without file access
+        columns = []
+        groups = meta.get("groups") if meta else None
+        if selected_mode == ViewMode.DUPLICATES and groups:
+            def stat(name, fmt):
+                def column(key, group, info):
+                    value = groups.get(key, {}).get(name)
+                    return (fmt(value), value) if value is not None else ("", -1)
+                return column
+            columns += [
+                ("Copies", stat("count", str)),
+                ("Wasted", stat("wasted", format_size)),
+                ("Total", stat("total", format_size)),
+            ]
+        if dupes is self.candidate and self.archive_matches:
+            def archives(key, group, info):
+                text = ", ".join(self.archive_matches.get(key, []))
+                return text, text
+            columns.append(("Archives", archives))
+        if meta and meta.get("files"):
+            columns += [
+                ("Size", lambda key, group, info: (format_size(info["size"]), info["size"]) if info else ("", -1)),
+                ("Type", lambda key, group, info: (info.get("ext", ""), info.get("ext", ""))),
+                ("Taken", lambda key, group, info: (info.get("taken", "").replace("T", " "), info.get("taken", ""))),
+                ("Modified", lambda key, group, info: (
+                    datetime.fromtimestamp(info["mtime"]).isoformat(" ", "seconds"), info["mtime"]
+                ) if info else ("", -1)),
+            ]
+            if self.file_types_entry(meta)[2]:
+                columns += [
+                    ("Camera", lambda key, group, info: (media_of(info).get("camera", ""),) * 2),
+                    ("Dimensions", dimensions),
+                    ("Duration", duration),
+                ]
+        return columns
+
+    def file_types_entry(self, meta: dict) -> tuple:
+        # (meta, extensions present, whether any file has media details), cached until the index changes
+        entry = self._file_types.get(id(meta))
+        if entry is None or entry[0] is not meta:
+            files = meta.get("files", {}).values()
+            types = sorted({info.get("ext", "") for info in files} - {""})
+            entry = self._file_types[id(meta)] = (meta, types, any("media" in info for info in files))
+        return entry
+
+    def file_types(self, meta: dict) -> list:
+        """Extensions present in an index's metadata, cached until the index changes."""
+        return self.file_types_entry(meta)[1]
+
+    def rows_of_type(self, rows: dict, meta: dict, ext: str) -> set:
+        """Keys of the rows whose files are of one type, cached until the index changes."""
+        entry = self._type_rows.get((id(rows), ext))
+        if entry is None or entry[0] is not rows:
+            keys = {key for key, group in rows.items() if group_info(meta, group).get("ext") == ext}
+            entry = self._type_rows[(id(rows), ext)] = (rows, keys)
+        return entry[1]
+
+    def refresh_type_filter(self, meta: dict):
+        # Offer the file types present in the index, keeping the current choice where possible
+        types = self.file_types(meta) if meta else []
+        if [self.type_filter.itemData(i) for i in range(1, self.type_filter.count())] == types:
+            return
+        current = self.type_filter.currentData()
+        self.type_filter.blockSignals(True)
+        self.type_filter.clear()
+        self.type_filter.addItem("All Types", "")
+        for ext in types:
+            self.type_filter.addItem(ext, ext)
+        index = self.type_filter.findData(current)
+        self.type_filter.setCurrentIndex(max(index, 0))
+        self.type_filter.blockSignals(False)
+
     def slow_col_resize(self):
+        self._column_widths = {}
         self.resize_columns_fully( self.table)
 
     def resize_columns_fully(self, table):
+        # Measures the model's width candidates (longest paths + a bounded sample) rather than
+        # every cell, so the cost does not grow with the row count
         font_metrics = table.fontMetrics()
-        for col in range(table.columnCount()):
-            max_width = 0
-            for row in range(table.rowCount()):
-                item = table.item(row, col)
-                if item:
-                    text = item.text()
-                    width = font_metrics.boundingRect(text).width()
-                    max_width = max(max_width, width)
-            table.setColumnWidth(col, max_width + 20)  # Add padding
+        header_metrics = table.horizontalHeader().fontMetrics()
+        model = table.model()
+        for col, header in enumerate(model.headers()):
+            widths = self._column_widths.get((id(model.index_dict), model.mode, header))
+            if widths is None:
+                texts = model.width_candidates(col)
+                max_width = max((font_metrics.horizontalAdvance(t) for t in texts if t), default=0)
+                widths = max(max_width, header_metrics.horizontalAdvance(header)) + 20  # Add padding
+                self._column_widths[(id(model.index_dict), model.mode, header)] = widths
+            table.setColumnWidth(col, widths)
+
+    def index_changed(self, index: dict):
+        # Drop cached rows, column widths and search index for an index that was replaced or edited
+        self.table_model.invalidate_cache(index)
+        self._near_indexes.pop(id(index), None)
+        self._column_widths = {}
+        self._file_types = {}
+        self._type_rows = {}
+        self._summaries.pop(id(index), None)
+        entry = self._search_indexes.pop(id(index), None)
+        if entry is not None:
+            entry[2].set()
+
+    def search_index_for(self, index: dict):
+        """The path search index of an index, or None while it is built in the background."""
+        entry = self._search_indexes.get(id(index))
+        if entry is not None and entry[0] is index:
+            return entry[1]
+        self.build_search_index(index)
+        return None
+
+    def build_search_index(self, index: dict):
+        if not index:
+            return
+        cancel_flag = threading.Event()
+        self._search_indexes[id(index)] = (index, None, cancel_flag)
+        worker = SearchIndexWorker(index, cancel_flag)
+        worker.signals.finished.connect(self.search_index_built)
+        worker.signals.error.connect(self.show_error)
+        self.threadpool.start(worker)
+
+    def search_index_built(self, index, search):
+        entry = self._search_indexes.get(id(index))
+        if entry is None or entry[0] is not index or entry[2].is_set():
+            return  # index was replaced or edited while building
+        self._search_indexes[id(index)] = (index, search, entry[2])
+        if index is self.active_dict and self.search_input.text().strip():
+            self.statusBar().showMessage(f"Search index ready ({len(search)} paths)")
+            self.update_table_view()
 
         
     def copy_selected_cells_as_csv(self):
@@ -375,27 +779,50 @@ class DuplicateViewerWindow(QMainWindow):
         rows = {}
 
         for index in selected:
-            item = self.table.item(index.row(), index.column())
-            text = item.text() if item is not None else ""
+            text = self.table_model.cell_text(index.row(), index.column())
             rows.setdefault(index.row(), {})[index.column()] = text
 
-        output = []
+        output = io.StringIO()
+        writer = csv.writer(output, quoting=csv.QUOTE_ALL, lineterminator="\n")
         for row in sorted(rows):
             cols = rows[row]
-            line = ",".join(f'"{cols.get(col, "")}"' for col in range(self.table.columnCount()))
-            output.append(line)
+            writer.writerow([cols.get(col, "") for col in range(self.table_model.columnCount())])
 
         clipboard = QApplication.clipboard()
-        clipboard.setText("\n".join(output))
+        clipboard.setText(output.getvalue().rstrip("\n"))
             
-    def export_table_to_csv(self, filepath: Path):
-        with filepath.open("w", encoding="utf-8") as f:
-            for row in range(self.table.rowCount()):
-                row_data = []
-                for col in range(self.table.columnCount()):
-                    item = self.table.item(row, col)
-                    row_data.append(item.text() if item else "")
-                f.write(",".join(f'"{cell}"' for cell in row_data) + "\n")
+    def export_table_to_csv(self, filepath: Path, scope: str = None, compress: bool = False):
+        # Rows are streamed from the index on a worker; only the key list is copied here
+        model = self.table_model
+        index = model.index_dict
+        if scope == ALL_ROWS:
+            keys = list(index)
+            file_cols = max((len(group) for group in index.values()), default=0)
+        elif scope == SELECTED_ROWS:
+            keys = [model.key_at(row) for row in sorted({i.row() for i in self.table.selectedIndexes()})]
+            file_cols = model.file_column_count
+        else:
+            keys = list(model.row_keys())
+            file_cols = model.file_column_count
+        self.export_cancel_flag.clear()
+        worker = ExportWorker(
+            index, model.meta, keys, model.info_columns, file_cols, filepath, self.export_cancel_flag, compress
+        )
+        worker.signals.progress.connect(self.export_progress)
+        worker.signals.finished.connect(self.export_finished)
+        worker.signals.error.connect(self.show_error)
+        worker.signals.cancelled.connect(self.export_cancelled)
+        self._export_file = filepath
+        self.threadpool.start(worker)
+
+    def export_progress(self, written, total):
+        self.statusBar().showMessage(f"Exporting to CSV: {written} of {total} rows")
+
+    def export_finished(self, written):
+        self.statusBar().showMessage(f"Exported {written} rows to {self._export_file}")
+
+    def export_cancelled(self):
+        self.statusBar().showMessage("CSV export cancelled")
 
     def view_with(self, path):
         launched = open_with_dialog(path)
@@ -438,57 +865,244 @@ class DuplicateViewerWindow(QMainWindow):
             QMessageBox.critical(self, "Error", f"Could not open folder:\n{e}")
             
     def get_selected_image_path(self):
-        selected_items = self.table.selectedItems()
-        if not selected_items:
+        paths = [p for p in map(self.table_model.path_at, self.table.selectedIndexes()) if p is not None]
+        if not paths:
             return None  # No selection
 
-        item = selected_items[0]  # Assuming single selection
-        path = Path(item.text())  # Assuming cell text is a file path
-        return path
+        return paths[0]  # Assuming single selection
+
+    def show_digests(self, digests, description):
+        # Restrict the table to the given files until the filter is cleared
+        self.digest_filter = (set(digests), description)
+        self.update_table_view()
+        self.statusBar().showMessage(f"Showing {len(digests)} {description} (Edit > Clear Photo Filter to show all)")
+
+    def show_tagged_photos(self):
+        names = shared_tag_store().names()
+        if not names:
+            QMessageBox.information(self, "Tagged Photos", "No faces have been tagged yet.", QMessageBox.Ok)
+            return
+        choices = [f"{name} ({count})" for name, count in names.items()]
+        choice, ok = QInputDialog.getItem(self, "Tagged Photos", "Show photos tagged:", choices, 0, False)
+        if ok:
+            name = list(names)[choices.index(choice)]
+            self.show_digests(shared_tag_store().photos_of(name), f"photos tagged {name}")
+
+    def review_name_proposals(self):
+        # Loaded on first use like the face viewer: clustering brings in numpy
+        from gui.name_proposals_dialog import NameProposalsDialog
+        self.proposals_window = NameProposalsDialog(self)
+        self.proposals_window.photos_found.connect(self.show_digests)
+        self.proposals_window.show()
+
+    def clear_digest_filter(self):
+        if self.digest_filter is not None:
+            self.digest_filter = None
+            self.update_table_view()
 
     def open_face_tagging_window(self):
-        selected_path = self.get_selected_image_path()
-        self.face_window = FaceTaggingWindow(self, image_path=selected_path)
+        # The face viewer brings in the face search stack (numpy); load it on first use, not at startup
+        from gui.image_window import FaceTaggingWindow
+        items = self.selected_file_items()
+        digest, selected_path = items[0] if items else (None, None)
+        if len(items) > 1:
+            # Step through the selection
+            sequence, position = items, 0
+        else:
+            # Step down the column of the selected file in view order, or the first one from the top
+            cells = [i for i in self.table.selectedIndexes() if self.table_model.path_at(i) is not None]
+            column = cells[0].column() if cells else self.table_model.first_file_column
+            sequence = TableColumnSequence(self.table_model, column, self.digest_for_cell)
+            position = cells[0].row() if cells else -1
+        self.face_window = FaceTaggingWindow(
+            self, image_path=selected_path, digest=digest,
+            indexes=[(self.master, self.master_meta), (self.candidate, self.candidate_meta)],
+            sequence=sequence, position=position
+        )
+        self.face_window.photos_found.connect(self.show_digests)
         self.face_window.show()
 
-    def shift_cells_left(self, row: int, start_col: int, exclude_col: int):
-        col_count = self.table.columnCount()
-        for col in range(start_col, col_count - 1):  # exclude last (hidden) column
-            next_item = self.table.item(row, col + 1)
-            if next_item is None or not next_item.text().strip():
-                self.table.takeItem(row, col)  # Clear current cell
-                break
-            self.table.setItem(row, col, QTableWidgetItem(next_item.text()))
-        self.table.takeItem(row, col_count - 2)  # Clear last visible cell
-
     def delete_file(self, row: int, col: int, path: Path):
-        # Confirm, delete from disk, table, and self.master
+        # A single file goes through the batch engine too, so it lands in the trash and can be undone
+        hash_key = self.digest_for_cell(self.table_model.index(row, col))
+        if hash_key is not None:
+            self.start_batch(plan_delete([(hash_key, path)], self.table_model.meta))
+
+    def selected_file_items(self) -> list:
+        # (digest, path) of every selected file cell
+        items = []
+        for index in self.table.selectedIndexes():
+            path = self.table_model.path_at(index)
+            if path is not None:
+                items.append((self.digest_for_cell(index), path))
+        return items
+
+    def delete_selected_files(self):
+        items = self.selected_file_items()
+        if items:
+            self.start_batch(plan_delete(items, self.table_model.meta))
+
+    def move_selected_files(self):
+        items = self.selected_file_items()
+        if not items:
+            return
+        folder = QFileDialog.getExistingDirectory(self, "Move Selected Files To")
+        if folder:
+            self.start_batch(plan_move(items, folder, self.table_model.meta))
+
+    #batch delete/move with undo journal
+    def start_batch(self, plan: list, confirm: bool = True) -> bool:
+        if not plan:
+            return False
+        if self._batch_running:
+            QMessageBox.information(self, "Batch", "Another batch is still running.", QMessageBox.Ok)
+            return False
+        index, meta = self.shown_index(), self.table_model.meta
+        if confirm:
+            summary = plan_summary(plan, index)
+            verb = {DELETE: "Delete", MOVE: "Move", HARDLINK: "Hard link", REFLINK: "Reflink"}[plan[0]["action"]]
+            text = f"{verb} {summary['files']} files ({format_size(summary['bytes'])})?"
+            if summary["emptied_groups"]:
+                text += f"\n\nWarning: {summary['emptied_groups']} groups would lose every copy."
+            text += "\n\nThis can be reversed with Edit > Undo Last Batch."
+            if QMessageBox.question(self, f"Confirm {verb}", text, QMessageBox.Yes | QMessageBox.No) != QMessageBox.Yes:
+                return False
+        batch_id = new_batch_id()
+        self._batch_targets[batch_id] = (index, meta)
+        self.run_batch_worker(BatchWorker(plan, self.batch_cancel_flag, batch_id), index, meta)
+        return True
+
+    def resolve_duplicates(self):
+        model = self.table_model
+        index = self.shown_index()
+        if not any(len(group) > 1 for group in index.values()):
+            QMessageBox.information(self, "Resolve Duplicates", "There are no duplicates to resolve.", QMessageBox.Ok)
+            return
+        keys = model.row_keys()
+        if model.mode == ViewMode.SIMILAR:
+            # Exact duplicates among the near-duplicate groups shown
+            members = self.near_index_for(index, model.meta)[1]
+            keys = [digest for key in keys for digest in members.get(key, ())]
+        dialog = ResolutionDialog(self, index, model.meta, keys)
+        if dialog.exec() == ResolutionDialog.Accepted:
+            # The dry run was the confirmation
+            self.start_batch(dialog.plan(), confirm=False)
+
+    def find_duplicate_folders(self):
+        model = self.table_model
+        if not self.shown_index():
+            QMessageBox.information(self, "Duplicate Folders", "Load or scan an index first.", QMessageBox.Ok)
+            return
+        self.dir_report_window = DirReportWindow(self, self.shown_index(), model.meta)
+        self.dir_report_window.plan_ready.connect(self.start_batch)
+        self.dir_report_window.show()
+
+    def detect_library_faces(self):
+        # Resumable: images already in the face store are skipped
+        if self._faces_running:
+            QMessageBox.information(self, "Face Detection", "Face detection is already running.", QMessageBox.Ok)
+            return
+        if not self.master:
+            QMessageBox.information(self, "Face Detection", "Load or scan a master index first.", QMessageBox.Ok)
+            return
+        self._faces_running = True
+        self.faces_cancel_flag.clear()
+        worker = FaceBatchWorker(self.master, self.master_meta, self.faces_cancel_flag)
+        worker.signals.progress.connect(self.faces_progress)
+        worker.signals.finished.connect(self.faces_finished)
+        worker.signals.error.connect(self.faces_error)
+        worker.signals.cancelled.connect(self.faces_cancelled)
+        self.threadpool.start(worker)
+
+    def faces_progress(self, done, total, faces):
+        self.statusBar().showMessage(f"Detecting faces: {done} of {total} images, {faces} faces found")
+
+    def faces_finished(self, counts):
+        self._faces_running = False
+        message = f"Face detection: {counts['images']} images processed, {counts['faces']} faces found"
+        if counts["skipped"]:
+            message += f", {counts['skipped']} images already done"
+        if counts["errors"]:
+            message += f", {counts['errors']} unreadable"
+        self.statusBar().showMessage(message)
+
+    def faces_error(self, msg):
+        self._faces_running = False
+        self.show_error(msg)
+
+    def faces_cancelled(self):
+        self.output.append("Face detection cancelled; it resumes where it stopped when run again.")
+
+    def undo_last_batch(self):
+        if self._batch_running:
+            QMessageBox.information(self, "Undo", "Wait for the running batch to finish.", QMessageBox.Ok)
+            return
+        journal = last_undoable_journal()
+        if journal is None:
+            QMessageBox.information(self, "Undo", "There is no batch to undo.", QMessageBox.Ok)
+            return
+        count = len(undoable_entries(journal))
         reply = QMessageBox.question(
-            self,
-            "Confirm Delete",
-            f"Delete this file from disk, table, and dictionary?\n{path}",
-            QMessageBox.Yes | QMessageBox.No
+            self, "Undo Last Batch", f"Restore {count} files of batch {journal.stem}?", QMessageBox.Yes | QMessageBox.No
         )
         if reply != QMessageBox.Yes:
             return
+        # Batches from an earlier session only restore the files; the index then needs a rescan
+        index, meta = self._batch_targets.get(journal.stem, (None, None))
+        self.run_batch_worker(BatchWorker([], self.batch_cancel_flag, undo_journal=journal), index, meta)
+
+    def run_batch_worker(self, worker: BatchWorker, index, meta):
+        self._batch_running = True
+        self._batch_reclaimed = 0
+        self._batch_target = (index, meta)
+        self.batch_cancel_flag.clear()
+        worker.signals.progress.connect(self.batch_progress)
+        worker.signals.results.connect(self.batch_results)
+        worker.signals.finished.connect(self.batch_finished)
+        worker.signals.error.connect(self.batch_error)
+        worker.signals.cancelled.connect(self.batch_cancelled)
+        self.threadpool.start(worker)
 
-        try:
-            path.unlink()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to delete file:\n{e}")
+    def batch_progress(self, done, total):
+        self.statusBar().showMessage(f"Batch: {done} of {total} files" if total else f"Batch: {done} files")
+
+    def batch_results(self, results):
+        index, meta = self._batch_target
+        for result in results:
+            if result["status"] == FAILED:
+                self.output.append(f"Failed: {result['path']}: {result.get('error', '')}")
+            elif result["status"] == DONE and result["action"] in (HARDLINK, REFLINK) and result["linked"]:
+                self._batch_reclaimed += (result.get("info") or {}).get("size", 0)
+        if index is None:
             return
+        touched = apply_results(index, meta, results)
+        if index is self.table_model.index_dict:
+            self.table_model.update_groups(touched)
+
+    def batch_finished(self, counts):
+        self._batch_running = False
+        index, meta = self._batch_target
+        if index is not None:
+            self.index_changed(index)
+            self.build_search_index(index)
+            if index is self.table_model.index_dict:
+                self.update_summary()
+            elif index is self.active_dict and self.table_model.mode == ViewMode.SIMILAR:
+                self.update_table_view()    # near-duplicate rows are derived from the index
+        summary = ", ".join(f"{n} {status}" for status, n in counts.items()) or "nothing to do"
+        if self._batch_reclaimed:
+            summary += f", {format_size(self._batch_reclaimed)} reclaimed"
+        self.statusBar().showMessage(f"Batch complete: {summary}")
+        if counts.get(FAILED):
+            self.output.setVisible(True)
+
+    def batch_error(self, msg):
+        self._batch_running = False
+        self.show_error(msg)
+
+    def batch_cancelled(self):
+        self.output.append("Batch cancelled.")
 
-        hash_key = self.get_hash_key_for_row(row)
-        if hash_key and hash_key in self.active_dict:
-            self.active_dict[hash_key] = [p for p in self.active_dict[hash_key] if p != path]
-            if not self.active_dict[hash_key]:
-                del self.active_dict[hash_key]
-
-        self.table.takeItem(row, col)
-        self.shift_cells_left( row, col, self.hidden_index)
-        self.table.resizeColumnsToContents()
-
-    
     def browse_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Select Folder")
         if folder:
@@ -496,9 +1110,22 @@ class DuplicateViewerWindow(QMainWindow):
 
 
     def export_table(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Save CSV", "", "CSV Files (*.csv)")
+        dialog = ExportOptionsDialog(self, bool(self.table.selectedIndexes()))
+        if dialog.exec() != ExportOptionsDialog.Accepted:
+            return
+        options = dialog.options()
+        suffix = ".csv.gz" if options["compress"] else ".csv"
+        path, _ = QFileDialog.getSaveFileName(self, "Save CSV", "", f"CSV Files (*{suffix})")
         if path:
-            self.export_table_to_csv(Path(path))
+            filepath = Path(path)
+            # Add only the missing parts of the suffix: x, x.csv and x.csv.gz all give x.csv(.gz)
+            name = filepath.name
+            if name.lower().endswith(".gz"):
+                name = name[:-3]
+            if not name.lower().endswith(".csv"):
+                name += ".csv"
+            filepath = filepath.with_name(name + (".gz" if options["compress"] else ""))
+            self.export_table_to_csv(filepath, options["scope"], options["compress"])
 
     def save_master_dict(self):
         path, _ = QFileDialog.getSaveFileName(self, "Save JSon", "", "JSon Files (*.json)")
@@ -508,6 +1135,8 @@ class DuplicateViewerWindow(QMainWindow):
                 filepath = filepath.with_suffix(".json")
             path = filepath.as_posix()
             result, err = save_dict_to_json(self.master, path)
+            if result:
+                result, err = save_index_meta(self.master_meta, path)
             if not result:
                 QMessageBox.information(
                     self,
@@ -517,12 +1146,33 @@ class DuplicateViewerWindow(QMainWindow):
                 )
                 
             
+    def export_master_digest_file(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Digest File", "", "Digest Files (*.pmdg)")
+        if path:
+            filepath = Path(path)
+            if filepath.suffix.lower() != ".pmdg":
+                filepath = filepath.with_suffix(".pmdg")
+            try:
+                count = export_digest_file(self.master, filepath)
+                self.statusBar().showMessage(f"Exported {count} digests to {filepath}")
+            except Exception as e:
+                QMessageBox.information(self, "Error", f"Can't export digest file\n{e}", QMessageBox.Ok)
+
     def load_master_dict(self):
         path, _ = QFileDialog.getOpenFileName(self, "Load JSon", "", "JSon Files (*.json)")
         if path:
             try:
+                self.index_changed(self.master)
                 self.master = load_dict_from_json( path)
-                self.set_dict_mode(DictMode.MASTER) 
+                self.master_meta = load_index_meta(path)
+                if "groups" not in self.master_meta and self.master_meta.get("files"):
+                    # Sidecars saved before group stats existed
+                    self.master_meta["groups"] = compute_group_stats(self.master, self.master_meta)
+                if "longest" not in self.master_meta and self.master_meta.get("files"):
+                    self.master_meta["longest"] = compute_longest_paths(self.master)
+                self.build_search_index(self.master)
+                self.set_dict_mode(DictMode.MASTER)
+                self.update_table_view()    # the radio emits nothing when Master is already shown
                 #self.populate_table(self.master, ViewMode(self.view_group.checkedId()))
             except Exception as e:
                 QMessageBox.information(
@@ -532,11 +1182,63 @@ class DuplicateViewerWindow(QMainWindow):
                     QMessageBox.Ok
                 )
 
+    def attach_archive_dicts(self):
+        paths, _ = QFileDialog.getOpenFileNames(
+            self, "Attach Archive Masters", "", "Master Files (*.json *.pmdg);;JSon Files (*.json);;Digest Files (*.pmdg)"
+        )
+        for path in paths:
+            name = self.archives.attach(path)
+            self.statusBar().showMessage(f"Attached archive '{name}' ({len(self.archives)} attached)")
+        self.archive_matches = {}
+
+    def detach_archive_dicts(self):
+        self.archives.clear()
+        self.archive_matches = {}
+        self.statusBar().showMessage("Detached all archive masters")
+        self.update_table_view()
+
+    def check_archives(self):
+        # Report, without removing anything, which archives already hold each candidate file
+        if not self.candidate:
+            QMessageBox.information(self, "Check Archives", "Scan a candidate folder first.", QMessageBox.Ok)
+            return
+        try:
+            self.archive_matches = self.archives.match(self.candidate)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Can't load archive master:\n{e}")
+            return
+        for key in self.candidate.keys() & self.master.keys():
+            self.archive_matches.setdefault(key, []).insert(0, "Master")
+        self.index_changed(self.candidate)
+        self.statusBar().showMessage(
+            f"{len(self.archive_matches)} of {len(self.candidate)} candidate files already archived"
+        )
+        self.set_dict_mode(DictMode.CANDIDATE)
+        self.update_table_view()
+
+    def compare_saved_scans(self):
+        old_path, _ = QFileDialog.getOpenFileName(self, "Earlier Scan", "", "JSon Files (*.json)")
+        if not old_path:
+            return
+        new_path, _ = QFileDialog.getOpenFileName(self, "Later Scan", str(Path(old_path).parent), "JSon Files (*.json)")
+        if not new_path:
+            return
+        self.diff_window = SnapshotDiffWindow(self, old_path, new_path)
+        self.diff_window.show()
+
     def notinmaster_dict(self):
+        try:
+            archived = self.archives.match(self.candidate)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Can't load archive master:\n{e}")
+            return
         for key in list(self.candidate.keys()):
-            if key in self.master: 
+            if key in self.master or key in archived:
                 del self.candidate[key]
+        self.index_changed(self.candidate)
+        self.archive_matches = {}
         self.set_dict_mode(DictMode.CANDIDATE)
+        self.update_table_view()    # the radio emits nothing when Candidate is already shown
 
     #multi threaded scanner
     def start_scan(self):
@@ -549,9 +1251,10 @@ class DuplicateViewerWindow(QMainWindow):
 
         self.set_progress_visibility(True)
         QApplication.processEvents()
-        worker = ScannerWorker(path, self.cancel_flag, False)
+        worker = ScannerWorker(path, self.cancel_flag, False, perceptual=self.perceptual_check.isChecked())
 
         worker.signals.progress.connect(self.update_progress)
+        worker.signals.metadata.connect(self.scan_metadata)
         worker.signals.finished.connect(self.scan_finished)
         worker.signals.error.connect(self.show_error)
         worker.signals.cancelled.connect(self.scan_cancelled)
@@ -561,11 +1264,19 @@ class DuplicateViewerWindow(QMainWindow):
     def update_progress(self, path):
         self.output.append(f"Scanning: {path}")
 
+    def scan_metadata(self, meta):
+        self._scan_meta = meta
+
     def scan_finished(self, result):
         self.progress_bar.setRange(0, 1)
         self.output.append(f"Scan complete. Found {len(result)} files.")
         self.set_progress_visibility(False)
+        self.index_changed(self.active_dict)
         self.active_dict = result
+        self.active_meta = self._scan_meta
+        if self._dict_mode == DictMode.CANDIDATE:
+            self.archive_matches = {}
+        self.build_search_index(result)
             
         self.populate_table(result, ViewMode(self.view_group.checkedId()))
 
@@ -580,6 +1291,75 @@ class DuplicateViewerWindow(QMainWindow):
         self.cancel_flag.set()
 
 
+    #background verification of the master against the disk
+    def start_verify(self):
+        # One at a time: the result is applied to the verified master and the cancel flag is shared
+        if self._verify_running:
+            QMessageBox.information(self, "Verify Master", "Verification is already running.", QMessageBox.Ok)
+            return
+        if not self.master:
+            QMessageBox.information(self, "Verify Master", "Load or scan a master first.", QMessageBox.Ok)
+            return
+        dialog = VerifyOptionsDialog(self)
+        if dialog.exec() != VerifyOptionsDialog.Accepted:
+            return
+        options = dialog.options()
+        self.verify_cancel_flag.clear()
+        worker = VerifyWorker(
+            self.master, self.master_meta, self.verify_cancel_flag, options["sample_rate"],
+            options["rehash_suspicious"], options["max_bytes_per_second"]
+        )
+        # Repairs apply to the master that was verified, even if another is loaded meanwhile
+        self._verify_target = (self.master, self.master_meta, options["repair"])
+        self._verify_running = True
+        self._verify_unrecorded = 0
+        worker.signals.progress.connect(self.verify_progress)
+        worker.signals.drifts.connect(self.verify_drifts)
+        worker.signals.finished.connect(self.verify_finished)
+        worker.signals.error.connect(self.verify_error)
+        worker.signals.cancelled.connect(self.verify_cancelled)
+        self.background_pool.start(worker)
+
+    def verify_progress(self, checked, total):
+        self.statusBar().showMessage(f"Verifying master: {checked} of {total} files")
+
+    def verify_drifts(self, drifts):
+        # Unrecorded files are only counted: an index without metadata would list every path
+        lines = []
+        for drift in drifts:
+            if drift["status"] == UNRECORDED:
+                self._verify_unrecorded += 1
+            else:
+                lines.append(f"{drift['status']}: {drift['path']}")
+        if lines:
+            self.output.append("\n".join(lines))
+
+    def verify_error(self, msg):
+        self._verify_running = False
+        self.show_error(msg)
+
+    def verify_cancelled(self):
+        self._verify_running = False
+        self.statusBar().showMessage("Verification cancelled")
+
+    def verify_finished(self, drifts):
+        self._verify_running = False
+        index, meta, repair = self._verify_target
+        counts = Counter(d["status"] for d in drifts)
+        summary = ", ".join(f"{n} {status}" for status, n in counts.items()) or "no drift"
+        if repair and drifts:
+            repaired = apply_repairs(index, meta, drifts)
+            self.index_changed(index)
+            summary += f"\n{repaired} index entries fixed"
+            if index is self.active_dict:
+                self.update_table_view()
+        self.statusBar().showMessage(f"Verification complete: {summary}")
+        if self._verify_unrecorded:
+            self.output.append(f"{self._verify_unrecorded} files have no recorded size or date")
+        if drifts:
+            self.output.setVisible(True)
+        QMessageBox.information(self, "Verify Master", f"Verification complete:\n{summary}", QMessageBox.Ok)
+
     #unthreaded scanner
     def scan_for_duplicates(self):
         path = self.root_dir_input.text().strip()
@@ -595,13 +1375,11 @@ class DuplicateViewerWindow(QMainWindow):
         self.populate_table(self.master)
 
     def get_hash_key_for_row(self, row: int) :
-        item = self.table.item(row, self.hidden_index)
-        return item.text() if item else None
+        return self.table_model.key_at(row)
 
 
-    def handle_double_click(self, row, col):
-        item = self.table.item(row, col)
-        if item:
-            path = Path(item.text())
+    def handle_double_click(self, index):
+        path = self.table_model.path_at(index)
+        if path is not None:
             open_file(path)
 
@@ -0,0 +1,101 @@
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+    QTableWidget, QTableWidgetItem, QAbstractItemView
+)
+from PySide6.QtCore import QThreadPool, Signal
+import threading
+from core.face_tags import shared_tag_store
+from gui.face_search_worker import NameProposalWorker
+
+
+class NameProposalsDialog(QDialog):
+    """
+    Names proposed for untagged faces by clustering the whole face store, one row per name.  The
+    photos behind a proposal can be shown in the main table before accepting it, which tags the
+    faces with the name.
+    """
+    photos_found = Signal(list, str)     # Emit (digests of the photos of a proposal, description)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.proposals = {}
+        self.threadpool = QThreadPool.globalInstance()
+        self.cancel_flag = threading.Event()
+        self.setWindowTitle("Proposed Names")
+        self.resize(600, 400)
+
+        self.summary = QLabel("Clustering faces...")
+
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(["Name", "Faces", "Photos", "Agreement"])
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+
+        self.show_button = QPushButton("Show Photos")
+        self.show_button.clicked.connect(self.show_selected)
+        self.accept_button = QPushButton("Tag Faces With Name")
+        self.accept_button.setToolTip("Faces already named are left as they are")
+        self.accept_button.clicked.connect(self.accept_selected)
+
+        controls = QHBoxLayout()
+        controls.addStretch()
+        controls.addWidget(self.show_button)
+        controls.addWidget(self.accept_button)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.summary)
+        layout.addWidget(self.table)
+        layout.addLayout(controls)
+        self.setLayout(layout)
+
+        self.show_button.setEnabled(False)
+        self.accept_button.setEnabled(False)
+        worker = NameProposalWorker(shared_tag_store().named_regions(), self.cancel_flag)
+        worker.signals.finished.connect(self.show_proposals)
+        worker.signals.error.connect(self.show_error)
+        self.threadpool.start(worker)
+
+    def show_proposals(self, proposals):
+        self.proposals = proposals
+        names = sorted(proposals, key=lambda name: -len(proposals[name]))
+        self.table.setRowCount(len(names))
+        for row, name in enumerate(names):
+            faces = proposals[name]
+            share = min(s for _, _, s in faces)
+            values = (name, str(len(faces)), str(len({d for d, _, _ in faces})), f"{share:.0%}")
+            for col, value in enumerate(values):
+                self.table.setItem(row, col, QTableWidgetItem(value))
+        self.table.resizeColumnsToContents()
+        count = sum(len(faces) for faces in proposals.values())
+        self.summary.setText(f"{count} untagged faces with a proposed name" if count
+                             else "No names to propose: the untagged faces match no tagged person.")
+        self.show_button.setEnabled(bool(names))
+        self.accept_button.setEnabled(bool(names))
+
+    def show_error(self, msg):
+        self.summary.setText(msg)
+
+    def selected_names(self) -> list:
+        rows = sorted({index.row() for index in self.table.selectedIndexes()})
+        return [self.table.item(row, 0).text() for row in rows]
+
+    def show_selected(self):
+        for name in self.selected_names()[:1]:
+            digests = sorted({digest for digest, _, _ in self.proposals[name]})
+            self.photos_found.emit(digests, f"photos proposed as {name}")
+
+    def accept_selected(self):
+        store = shared_tag_store()
+        tagged = 0
+        for name in self.selected_names():
+            for digest, rect, _ in self.proposals.pop(name):
+                tagged += store.tag_face(digest, rect, name)
+        if tagged:
+            store.save()
+        for row in sorted({index.row() for index in self.table.selectedIndexes()}, reverse=True):
+            self.table.removeRow(row)
+        self.summary.setText(f"Tagged {tagged} faces.")
+
+    def done(self, result):
+        self.cancel_flag.set()
+        super().done(result)
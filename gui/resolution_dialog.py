@@ -0,0 +1,162 @@
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QPushButton, QLabel, QComboBox, QLineEdit,
+    QCheckBox, QTableWidget, QTableWidgetItem, QFileDialog, QAbstractItemView
+)
+from PySide6.QtCore import Qt, QThreadPool
+import threading
+from core.file_info import format_size
+from core.resolution_rules import KEEP_RULES
+from core.batch_actions import DELETE
+from core.linking import HARDLINK, REFLINK
+from gui.resolution_worker import ResolutionWorker
+
+PREVIEW_ROWS = 2000
+
+
+class ResolutionDialog(QDialog):
+    """
+    Set duplicate resolution rules, preview the resulting plan as a dry run and carry it out.
+    The dialog only plans; the accepted plan is run by the batch engine.
+    """
+    def __init__(self, parent=None, index: dict = None, meta: dict = None, shown_keys=None):
+        super().__init__(parent)
+        self.index = index or {}
+        self.meta = meta or {}
+        self.shown_keys = shown_keys
+        self.resolution = None
+        self.threadpool = QThreadPool.globalInstance()
+        self.cancel_flag = threading.Event()
+        self.setWindowTitle("Resolve Duplicates by Rules")
+        self.resize(1000, 600)
+
+        self.keep = QComboBox()
+        for rule, (description, _) in KEEP_RULES.items():
+            self.keep.addItem(description, rule)
+
+        self.action = QComboBox()
+        self.action.addItem("Move the other copies to the trash", DELETE)
+        self.action.addItem("Replace the other copies with hard links", HARDLINK)
+        self.action.addItem("Replace the other copies with reflinks (copy-on-write)", REFLINK)
+        self.action.setToolTip("Links keep every path in place; each copy is re-hashed before it is replaced")
+        self.action.currentIndexChanged.connect(self.rules_changed)
+
+        self.prefer_roots = QLineEdit()
+        self.prefer_roots.setPlaceholderText("Folders whose copies are kept first, separated by ;")
+        self.protected_roots = QLineEdit()
+        self.protected_roots.setPlaceholderText("Folders never touched, separated by ;")
+
+        self.only_shown = QCheckBox("Only the groups shown in the table")
+        self.only_shown.setChecked(shown_keys is not None)
+        self.only_shown.setEnabled(shown_keys is not None)
+
+        for widget in (self.prefer_roots, self.protected_roots):
+            widget.textChanged.connect(self.rules_changed)
+        self.keep.currentIndexChanged.connect(self.rules_changed)
+        self.only_shown.toggled.connect(self.rules_changed)
+
+        self.summary = QLabel("Set the rules and press Preview.")
+
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["Keep", "Replace", "Reclaimed"])
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+        self.preview_button = QPushButton("Preview")
+        self.preview_button.clicked.connect(self.preview)
+        self.run_button = QPushButton("Carry Out")
+        self.run_button.setEnabled(False)
+        self.run_button.clicked.connect(self.accept)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.reject)
+
+        form = QFormLayout()
+        form.addRow("Keep", self.keep)
+        form.addRow("Then", self.action)
+        form.addRow("Prefer folders", self.folder_row(self.prefer_roots))
+        form.addRow("Never touch", self.folder_row(self.protected_roots))
+        form.addRow(self.only_shown)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.summary)
+        buttons.addStretch()
+        buttons.addWidget(self.preview_button)
+        buttons.addWidget(self.run_button)
+        buttons.addWidget(close_button)
+
+        layout = QVBoxLayout()
+        layout.addLayout(form)
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+    def folder_row(self, line_edit: QLineEdit):
+        row = QHBoxLayout()
+        browse = QPushButton("Add Folder...")
+        browse.clicked.connect(lambda: self.add_folder(line_edit))
+        row.addWidget(line_edit)
+        row.addWidget(browse)
+        return row
+
+    def add_folder(self, line_edit: QLineEdit):
+        folder = QFileDialog.getExistingDirectory(self, "Select Folder")
+        if folder:
+            folders = [f for f in line_edit.text().split(";") if f.strip()]
+            line_edit.setText(";".join(folders + [folder]))
+
+    def rules(self) -> dict:
+        def folders(line_edit):
+            return [f.strip() for f in line_edit.text().split(";") if f.strip()]
+        return {
+            "keep": self.keep.currentData(),
+            "prefer_roots": folders(self.prefer_roots),
+            "protected_roots": folders(self.protected_roots),
+            "action": self.action.currentData(),
+        }
+
+    def rules_changed(self):
+        # A preview only stands for the rules it was built with; one still running is dropped
+        self.cancel_flag.set()
+        self.resolution = None
+        self.run_button.setEnabled(False)
+        self.summary.setText("Press Preview to plan with these rules.")
+
+    def preview(self):
+        self.rules_changed()
+        self.cancel_flag = threading.Event()
+        self.summary.setText("Planning...")
+        keys = list(self.shown_keys) if self.only_shown.isChecked() else None
+        worker = ResolutionWorker(self.index, self.meta, self.rules(), self.cancel_flag, keys)
+        worker.signals.finished.connect(self.show_resolution)
+        worker.signals.error.connect(self.show_error)
+        self.threadpool.start(worker)
+
+    def show_resolution(self, resolution, cancel_flag):
+        if cancel_flag is not self.cancel_flag or cancel_flag.is_set() or resolution["rules"] != self.rules():
+            return  # built for rules changed since; carrying it out would ignore the new ones
+        self.resolution = resolution
+        groups = resolution["groups"]
+        self.table.setRowCount(min(len(groups), PREVIEW_ROWS))
+        for row, (digest, kept, removed, reclaimed) in enumerate(groups[:PREVIEW_ROWS]):
+            values = ("\n".join(map(str, kept)), "\n".join(map(str, removed)), format_size(reclaimed))
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
+                self.table.setItem(row, col, item)
+        self.table.resizeColumnsToContents()
+        self.table.resizeRowsToContents()
+        verb = "remove" if self.rules()["action"] == DELETE else "link"
+        text = (f"{len(groups)} groups, {resolution['files']} files to {verb}, "
+                f"{format_size(resolution['bytes'])} reclaimed")
+        if len(groups) > PREVIEW_ROWS:
+            text += f" (showing the first {PREVIEW_ROWS} groups)"
+        self.summary.setText(text)
+        self.run_button.setEnabled(resolution["files"] > 0)
+
+    def show_error(self, msg):
+        self.summary.setText(f"Error: {msg}")
+
+    def plan(self) -> list:
+        return self.resolution["plan"] if self.resolution else []
+
+    def done(self, result):
+        self.cancel_flag.set()
+        super().done(result)
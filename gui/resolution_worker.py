@@ -0,0 +1,32 @@
+from PySide6.QtCore import QObject, QRunnable, Signal, Slot
+from core.resolution_rules import build_resolution
+
+
+class ResolutionSignals(QObject):
+    finished = Signal(object, object)    # Emit (resolution: plan, per-group report, totals and rules; its cancel flag)
+    error = Signal(str)                  # Emit error message
+
+
+class ResolutionWorker(QRunnable):
+    """Build a dry-run duplicate resolution over an index in the background."""
+    def __init__(self, index: dict, meta: dict, rules: dict, cancel_flag, keys=None):
+        super().__init__()
+        self.index = index
+        self.meta = meta
+        self.rules = rules
+        self.cancel_flag = cancel_flag
+        self.keys = keys
+        self.signals = ResolutionSignals()
+
+    @Slot()
+    def run(self):
+        try:
+            resolution = build_resolution(
+                self.index, self.meta, self.rules["keep"], self.rules["prefer_roots"],
+                self.rules["protected_roots"], self.keys, self.cancel_flag, self.rules["action"]
+            )
+            if resolution is not None and not self.cancel_flag.is_set():
+                resolution["rules"] = self.rules
+                self.signals.finished.emit(resolution, self.cancel_flag)
+        except Exception as e:
+            self.signals.error.emit(str(e))
@@ -4,22 +4,35 @@ from pathlib import Path
 import hashlib
 import os
 import threading
+from core.file_info import file_info
+from core.group_stats import compute_group_stats, compute_longest_paths
+from core.batch_actions import TRASH_FOLDER
+from core.dir_hashes import compute_dir_hashes
+from core.app_paths import app_dir
+from core.perceptual import dhash, near_duplicate_groups, DHASH_EXTENSIONS, PHASH_STORE
+from core.media_info import MediaCache, media_details, MEDIA_EXTENSIONS
 
 class ScannerSignals(QObject):
     progress = Signal(str)               # Emit file path
+    metadata = Signal(dict)              # Emit index metadata, just before finished
     finished = Signal(dict)              # Emit final result
     error = Signal(str)                  # Emit error message
     cancelled = Signal()                 # Emit if cancelled
 
 class ScannerWorker(QRunnable):
-    def __init__(self, root_path: str, cancel_flag, dupe_only : bool, max_workers: int = 8):
+    def __init__(self, root_path: str, cancel_flag, dupe_only : bool, max_workers: int = 8, perceptual: bool = False):
         super().__init__()
+        self.perceptual = perceptual    # also compute perceptual hashes of images for near duplicates
         self.root_path = Path(root_path)
         self.max_workers = max_workers
         self.signals = ScannerSignals()
         self.cancel_flag = cancel_flag
         self.dupe_only = dupe_only
         self.fdict = {}
+        self.files_meta = {}
+        self.media_cache = None
+        self.phash_cache = None
+        self.new_media = {}     # digest -> media details found in this scan
 
     def compute_hash(self, path: Path, chunk_size: int = 65536) -> str:
         hasher = hashlib.sha256()
@@ -32,6 +45,61 @@ class ScannerWorker(QRunnable):
         hash = self.compute_hash(path)
         return (path, hash)
 
+    def hash_file_with_info(self, path: Path, chunk_size: int = 65536):
+        # Stat and read EXIF and media headers from the open file and first chunk while hashing
+        hasher = hashlib.sha256()
+        with path.open("rb") as f:
+            st = os.fstat(f.fileno())
+            head = f.read(chunk_size)
+            hasher.update(head)
+            while chunk := f.read(chunk_size):
+                hasher.update(chunk)
+            digest = hasher.hexdigest()
+            info = file_info(path, st, head)
+            media = None
+            if info["ext"] in MEDIA_EXTENSIONS:
+                media = self.media_cache.get(digest) if self.media_cache else None
+                if media is None:
+                    media = media_details(f, head, info["ext"], st.st_size)
+                    self.new_media[digest] = media
+            if media:
+                info["media"] = media
+        return (path, digest, info)
+
+    def safe_dhash(self, path: Path):
+        # An image Qt cannot decode gets no perceptual hash but stays in the index
+        try:
+            return dhash(path)
+        except Exception:
+            return None
+
+    def add_phashes(self, executor) -> bool:
+        # Perceptual hashes once per digest, from the cache or one copy, given to every copy.
+        # Returns False if cancelled.
+        found = {}
+        futures = {}
+        for digest, paths in self.fdict.items():
+            if self.files_meta[str(paths[0])]["ext"] not in DHASH_EXTENSIONS:
+                continue
+            phash = self.phash_cache.get(digest)
+            if phash is None:
+                futures[executor.submit(self.safe_dhash, paths[0])] = digest
+            else:
+                found[digest] = phash
+        new = {}
+        for future in as_completed(futures):
+            if self.cancel_flag.is_set():
+                return False
+            value = future.result()
+            if value is not None:
+                new[futures[future]] = format(value, "016x")
+        self.phash_cache.add_many(new)
+        found.update(new)
+        for digest, phash in found.items():
+            for p in self.fdict[digest]:
+                self.files_meta[str(p)]["phash"] = phash
+        return True
+
     """
     @Slot()
     def run8(self):
@@ -71,25 +139,48 @@ class ScannerWorker(QRunnable):
     @Slot()
     def run(self):
         try:
-            futures = []
+            self.media_cache = MediaCache()
+            if self.perceptual:
+                self.phash_cache = MediaCache(app_dir("media") / PHASH_STORE, "phash")
+            futures = {}
             with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
                 for root, dirs, files in os.walk(self.root_path):
+                    dirs[:] = [d for d in dirs if d != TRASH_FOLDER]
                     for file in files:
                         if self.cancel_flag.is_set():
                             self.signals.cancelled.emit()
                             return
-                        futures.append(executor.submit(self.hash_file, Path(root) / file))
+                        path = Path(root) / file
+                        futures[executor.submit(self.hash_file_with_info, path)] = path
 
                 for future in as_completed(futures):
                     if self.cancel_flag.is_set():
                         self.signals.cancelled.emit()
                         return
                     try:
-                        path, hash_val = future.result()
+                        path, hash_val, info = future.result()
                         self.fdict.setdefault(hash_val, []).append(path)
+                        self.files_meta[str(path)] = info
                         self.signals.progress.emit(str(path))
                     except Exception as e:
-                        self.signals.error.emit(f"{path}: {e}")
+                        self.signals.error.emit(f"{futures[future]}: {e}")
+
+                if self.perceptual and not self.add_phashes(executor):
+                    self.signals.cancelled.emit()
+                    return
+
+            self.media_cache.add_many(self.new_media)
+            meta = {"files": self.files_meta}
+            meta["groups"] = compute_group_stats(self.fdict, meta)
+            meta["longest"] = compute_longest_paths(self.fdict)
+            meta["dirs"] = compute_dir_hashes(self.fdict, meta)
+            if self.perceptual:
+                similar = near_duplicate_groups(self.fdict, meta, cancel_flag=self.cancel_flag)
+                if similar is None:
+                    self.signals.cancelled.emit()
+                    return
+                meta["similar"] = similar
+            self.signals.metadata.emit(meta)
 
             if self.dupe_only:
                 duplicates = {k: v for k, v in self.fdict.items() if len(v) > 1}
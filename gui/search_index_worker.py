@@ -0,0 +1,25 @@
+from PySide6.QtCore import QObject, QRunnable, Signal, Slot
+from core.path_search import PathSearchIndex
+
+
+class SearchIndexSignals(QObject):
+    finished = Signal(object, object)    # Emit (source index, PathSearchIndex)
+    error = Signal(str)                  # Emit error message
+
+
+class SearchIndexWorker(QRunnable):
+    """Builds the path search index for an index in the background."""
+    def __init__(self, index: dict, cancel_flag):
+        super().__init__()
+        self.index = index
+        self.cancel_flag = cancel_flag
+        self.signals = SearchIndexSignals()
+
+    @Slot()
+    def run(self):
+        try:
+            search = PathSearchIndex.from_index(self.index, self.cancel_flag)
+            if search is not None:
+                self.signals.finished.emit(self.index, search)
+        except Exception as e:
+            self.signals.error.emit(str(e))
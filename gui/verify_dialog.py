@@ -0,0 +1,48 @@
+from PySide6.QtWidgets import (
+    QDialog, QFormLayout, QSpinBox, QCheckBox, QDialogButtonBox
+)
+
+
+class VerifyOptionsDialog(QDialog):
+    """Options for a background verification run of the master index."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Verify Master")
+
+        self.sample_percent = QSpinBox()
+        self.sample_percent.setRange(0, 100)
+        self.sample_percent.setSuffix(" %")
+        self.sample_percent.setValue(1)
+        self.sample_percent.setToolTip("Share of unchanged files to re-hash, to catch bit rot")
+
+        self.rehash_suspicious = QCheckBox("Re-hash files whose size or date changed")
+        self.rehash_suspicious.setChecked(True)
+
+        self.max_rate = QSpinBox()
+        self.max_rate.setRange(0, 10000)
+        self.max_rate.setSuffix(" MB/s")
+        self.max_rate.setSpecialValueText("Unlimited")
+        self.max_rate.setValue(20)
+
+        self.repair = QCheckBox("Fix the index when finished")
+        self.repair.setChecked(False)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QFormLayout()
+        layout.addRow("Re-hash sample", self.sample_percent)
+        layout.addRow(self.rehash_suspicious)
+        layout.addRow("Read limit", self.max_rate)
+        layout.addRow(self.repair)
+        layout.addRow(buttons)
+        self.setLayout(layout)
+
+    def options(self) -> dict:
+        return {
+            "sample_rate": self.sample_percent.value() / 100,
+            "rehash_suspicious": self.rehash_suspicious.isChecked(),
+            "max_bytes_per_second": self.max_rate.value() * 1024 * 1024,
+            "repair": self.repair.isChecked(),
+        }
@@ -0,0 +1,69 @@
+import time
+from PySide6.QtCore import QObject, QRunnable, Signal, Slot
+from core.index_verify import verify_entries, OK
+from core.throttle import RateLimiter, enter_background_priority, leave_background_priority
+
+
+class VerifySignals(QObject):
+    progress = Signal(int, int)          # Emit (paths checked, total paths)
+    drifts = Signal(list)                # Emit drift records in batches as they are found
+    finished = Signal(list)              # Emit all drift records
+    error = Signal(str)                  # Emit error message
+    cancelled = Signal()                 # Emit if cancelled
+
+
+# Drift records are sent to the GUI at most this often, so a large drift cannot flood its event queue
+BATCH_SECONDS = 0.5
+BATCH_RECORDS = 500
+
+
+class VerifyWorker(QRunnable):
+    """
+    Background verification of an index against the disk at low CPU and I/O priority.
+
+    Run it on a dedicated thread pool: the lowered priority stays with the pool thread on
+    platforms where it cannot be raised again.
+    """
+    def __init__(self, index: dict, meta: dict, cancel_flag, sample_rate: float = 0.0,
+                 rehash_suspicious: bool = True, max_bytes_per_second: float = 0):
+        super().__init__()
+        # Snapshots so the GUI can keep editing the index and its metadata while the walk runs
+        self.entries = [(digest, list(paths)) for digest, paths in index.items()]
+        self.meta = {"files": dict(meta.get("files", {}))} if meta else {}
+        self.cancel_flag = cancel_flag
+        self.sample_rate = sample_rate
+        self.rehash_suspicious = rehash_suspicious
+        self.limiter = RateLimiter(max_bytes_per_second)
+        self.signals = VerifySignals()
+
+    @Slot()
+    def run(self):
+        enter_background_priority()
+        try:
+            total = sum(len(paths) for _, paths in self.entries)
+            drifts = []
+            checked = 0
+            sent = 0
+            last_sent = time.monotonic()
+            for record in verify_entries(self.entries, self.meta, self.sample_rate,
+                                         self.rehash_suspicious, self.limiter, self.cancel_flag):
+                checked += 1
+                if record["status"] != OK:
+                    drifts.append(record)
+                    if len(drifts) - sent >= BATCH_RECORDS or time.monotonic() - last_sent >= BATCH_SECONDS:
+                        self.signals.drifts.emit(drifts[sent:])
+                        sent = len(drifts)
+                        last_sent = time.monotonic()
+                if checked % 500 == 0:
+                    self.signals.progress.emit(checked, total)
+            if self.cancel_flag.is_set():
+                self.signals.cancelled.emit()
+                return
+            if sent < len(drifts):
+                self.signals.drifts.emit(drifts[sent:])
+            self.signals.progress.emit(checked, total)
+            self.signals.finished.emit(drifts)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        finally:
+            leave_background_priority()
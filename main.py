@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import sys
 
@@ -11,6 +12,7 @@ from gui.main_window import DuplicateViewerWindow
 
 if __name__ == "__main__":
     import sys
+    multiprocessing.freeze_support()    # process pools in the bundled app
     app = QApplication(sys.argv)
     window = DuplicateViewerWindow()
     window.show()
@@ -0,0 +1,32 @@
+from core.resolution_rules import KEEP_DATED, resolve_group
+
+
+def files_for(paths, taken="2019-05-12T10:00:00"):
+    return {p: {"size": 100, "mtime": mtime, "taken": taken} for mtime, p in enumerate(paths)}
+
+
+def test_dated_keeps_copy_filed_by_date_over_dated_file_name():
+    # The backup copy is older and its file name carries the date; only folder names count
+    filed = "/photos/2019/05/IMG_20190512_1.jpg"
+    unsorted = "/backup/misc/IMG_20190512_1.jpg"
+    kept, removed = resolve_group([filed, unsorted], files_for([unsorted, filed]), KEEP_DATED)
+    assert kept == [filed]
+    assert removed == [unsorted]
+
+
+def test_dated_matches_whole_folder_names():
+    month_folder = "/photos/2019-05 Trip/a.jpg"
+    year_only = "/photos/2019/a.jpg"
+    lookalike = "/photos/20190/05/a.jpg"
+    kept, _ = resolve_group([lookalike, year_only, month_folder], files_for([lookalike, year_only, month_folder]),
+                            KEEP_DATED)
+    assert kept == [month_folder]
+    kept, _ = resolve_group([lookalike, year_only], files_for([lookalike, year_only]), KEEP_DATED)
+    assert kept == [year_only]
+
+
+def test_dated_reads_windows_paths():
+    filed = "D:\\Pictures\\2019\\05\\a.jpg"
+    other = "D:\\Pictures\\Unsorted\\a.jpg"
+    kept, _ = resolve_group([other, filed], files_for([other, filed]), KEEP_DATED)
+    assert kept == [filed]